@@ -0,0 +1,210 @@
+import argparse
+import json
+import random
+from dataclasses import replace
+from time import perf_counter
+
+from colorama import Style, init
+from dacite import from_dict
+from decode import decode
+from game import codec, rules, vecsim
+from game.bitboard import Bitboards, get_ball_masks
+from game.models import Board
+from game.generator import SCENARIOS, stream_scenarios
+from game.logic.WawanMKS import WawanMKS
+from game.simulator import Simulator
+from game.controllers import CONTROLLERS, get_controller
+
+init()
+
+
+def report(label: str, count: int, elapsed: float) -> None:
+    rate = count / elapsed if elapsed > 0 else float("inf")
+    print(
+        Style.BRIGHT
+        + "{}: {} in {:.2f}s ({:.0f}/s, {:.1f}us each)".format(
+            label, count, elapsed, rate, elapsed * 1e6 / max(1, count)
+        )
+        + Style.RESET_ALL
+    )
+
+
+def bench_generate(args) -> None:
+    start = perf_counter()
+    objects = 0
+    for board in stream_scenarios(args.boards, args.seed, scenario_config(args), args.vary):
+        objects += len(board.game_objects)
+    report("boards generated ({} objects)".format(objects), args.boards, perf_counter() - start)
+
+
+def bench_decide(args) -> None:
+    logic_class = get_controller(args.logic)
+    if logic_class is None:
+        parser.error("unknown logic {}".format(args.logic))
+    logic = logic_class()
+    decisions = 0
+    elapsed = 0.0
+    for board in stream_scenarios(args.boards, args.seed, scenario_config(args), args.vary):
+        # Only the decisions are timed, not generating the boards.
+        start = perf_counter()
+        for bot in board.bots:
+            logic.next_move(bot, board)
+            decisions += 1
+        elapsed += perf_counter() - start
+    report("{} decisions".format(args.logic), decisions, elapsed)
+
+
+def bench_rules(args) -> None:
+    """Random playouts straight on `game.rules` states, no models involved."""
+    rng = random.Random(args.seed)
+    steps = 0
+    elapsed = 0.0
+    for board in stream_scenarios(args.boards, args.seed, scenario_config(args), args.vary):
+        state = rules.GameState.from_board(board)
+        start = perf_counter()
+        for _ in range(args.depth):
+            for i in range(len(state.bots)):
+                state = rules.apply(state, i, rng.choice(rules.legal_moves(state, i)))
+                steps += 1
+        elapsed += perf_counter() - start
+    report("rule applications", steps, elapsed)
+
+
+def _legacy_parse(raw: bytes) -> Board:
+    """What `Api` did before `game.codec`: stdlib json, snake_case copy, dacite."""
+    return from_dict(Board, decode(codec.unwrap(json.loads(raw))))
+
+
+def bench_codec(args) -> None:
+    """Response bytes -> Board, per JSON backend, on boards as the server sends them."""
+    payloads = [
+        json.dumps(codec.board_payload(board)).encode()
+        for board in stream_scenarios(args.boards, args.seed, scenario_config(args), args.vary)
+    ]
+    size = sum(len(raw) for raw in payloads)
+    print("{} payloads, {:.1f} KiB on average".format(len(payloads), size / 1024 / max(1, len(payloads))))
+    expected = [_legacy_parse(raw) for raw in payloads]
+
+    parsers = [("json + decode + dacite", _legacy_parse)]
+    parsers += [
+        ("codec/{}".format(name), lambda raw, name=name: codec.parse_board(raw, name))
+        for name in codec.BACKENDS
+    ]
+    for label, parse in parsers:
+        for _ in range(args.rounds):
+            start = perf_counter()
+            boards = [parse(raw) for raw in payloads]
+            elapsed = perf_counter() - start
+        if boards != expected:
+            print(Style.BRIGHT + "{}: boards differ from the legacy parser".format(label) + Style.RESET_ALL)
+        report(label, len(payloads), elapsed)
+
+
+def bench_bitboard(args) -> None:
+    """Diamonds within --radius of every bot: loop over the objects vs ball mask & popcount."""
+    boards = list(stream_scenarios(args.boards, args.seed, scenario_config(args), args.vary))
+    radius = args.radius
+    queries = sum(len(board.bots) for board in boards)
+
+    start = perf_counter()
+    expected = [
+        sum(abs(bot.position.x - d.position.x) + abs(bot.position.y - d.position.y) <= radius for d in board.diamonds)
+        for board in boards
+        for bot in board.bots
+    ]
+    report("object loop queries", queries, perf_counter() - start)
+
+    for board in boards:
+        get_ball_masks(board.width, board.height).ball(0, 0, radius)
+    start = perf_counter()
+    bitboards = [Bitboards.from_board(board) for board in boards]
+    report("bitboard builds", len(boards), perf_counter() - start)
+    start = perf_counter()
+    counts = [bb.within(bb.diamonds, bot.position, radius) for bb, board in zip(bitboards, boards) for bot in board.bots]
+    report("bitboard queries", queries, perf_counter() - start)
+    if counts != expected:
+        print(Style.BRIGHT + "bitboard counts differ from the object loop" + Style.RESET_ALL)
+
+
+def bench_vecsim(args) -> None:
+    """K simplified games of WawanMKS bots in lockstep, checked against the scalar simulator."""
+    if vecsim.np is None:
+        parser.error("vecsim needs numpy")
+    config = replace(scenario_config(args), seconds=args.seconds)
+    sim = vecsim.VectorSimulator.generate(args.boards, config, args.seed)
+    start = perf_counter()
+    scores = sim.run()
+    report("vectorized game-ticks ({} games)".format(args.boards), args.boards * sim.total_ticks, perf_counter() - start)
+
+    bots = scores.shape[1]
+    mismatches = 0
+    elapsed = 0.0
+    checked = min(args.check, args.boards)
+    for k in range(checked):
+        players = [(str(i), WawanMKS()) for i in range(bots)]
+        start = perf_counter()
+        result = Simulator(players, vecsim.simplified(config), seed=args.seed + k, shuffle=False).run()
+        elapsed += perf_counter() - start
+        if [result[str(i)] for i in range(bots)] != scores[k].tolist():
+            mismatches += 1
+    if checked:
+        report("scalar game-ticks ({} games)".format(checked), checked * sim.total_ticks, elapsed)
+        print("{} of {} games differ from scalar WawanMKS".format(mismatches, checked))
+
+
+def scenario_config(args):
+    config = SCENARIOS[args.scenario]
+    overrides = {
+        name: getattr(args, name)
+        for name in ("width", "height", "bots", "teleport_pairs", "generation_ratio", "red_ratio")
+        if getattr(args, name) is not None
+    }
+    return replace(config, **overrides)
+
+
+parser = argparse.ArgumentParser(description="Benchmarks on synthetic boards")
+subparsers = parser.add_subparsers(dest="command", required=True)
+
+common = argparse.ArgumentParser(add_help=False)
+common.add_argument("--scenario", choices=list(SCENARIOS), default="default")
+common.add_argument("--boards", type=int, default=1000)
+common.add_argument("--seed", type=int, default=0)
+common.add_argument("--vary", action="store_true", help="Vary bot count and diamond density per board")
+common.add_argument("--width", type=int)
+common.add_argument("--height", type=int)
+common.add_argument("--bots", type=int)
+common.add_argument("--teleport-pairs", type=int)
+common.add_argument("--generation-ratio", type=float)
+common.add_argument("--red-ratio", type=float)
+
+generate_parser = subparsers.add_parser("generate", parents=[common], help="Board generation throughput")
+generate_parser.set_defaults(run=bench_generate)
+
+decide_parser = subparsers.add_parser("decide", parents=[common], help="Decisions per second of a logic")
+decide_parser.add_argument(
+    "--logic", default="GachoanBot", help="One of {}, or module:Class".format(", ".join(CONTROLLERS))
+)
+decide_parser.set_defaults(run=bench_decide)
+
+rules_parser = subparsers.add_parser("rules", parents=[common], help="Random playouts on the rules engine")
+rules_parser.add_argument("--depth", type=int, default=100, help="Rounds played per board")
+rules_parser.set_defaults(run=bench_rules)
+
+codec_parser = subparsers.add_parser("codec", parents=[common], help="Parsing board responses per JSON backend")
+codec_parser.add_argument("--rounds", type=int, default=3, help="Passes per backend, the last one is reported")
+codec_parser.set_defaults(run=bench_codec)
+
+bitboard_parser = subparsers.add_parser("bitboard", parents=[common], help="Neighbourhood counts on bitboards")
+bitboard_parser.add_argument("--radius", type=int, default=3, help="Manhattan radius of the query")
+bitboard_parser.set_defaults(run=bench_bitboard)
+
+vecsim_parser = subparsers.add_parser(
+    "vecsim", parents=[common], help="Lockstep NumPy simulation of --boards games (needs numpy)"
+)
+vecsim_parser.add_argument("--seconds", type=int, default=60, help="Game length")
+vecsim_parser.add_argument("--check", type=int, default=20, help="Games replayed by the scalar simulator for parity")
+vecsim_parser.set_defaults(run=bench_vecsim)
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    args.run(args)
@@ -1,23 +1,120 @@
 import json
-from dataclasses import dataclass
-from typing import List, Optional, Tuple, Union
+import random
+from dataclasses import dataclass, field
+from time import monotonic, sleep
+from typing import Dict, List, Optional, Tuple, Union
 
 import requests
 from colorama import Back, Fore, Style, init
-from dacite import from_dict
-from decode import decode
+from game import codec
 from game.models import Board, Bot
 from requests import Response
+from urllib3.exceptions import NewConnectionError
+
+
+@dataclass
+class ApiStats:
+    requests: int = 0
+    retries: int = 0
+    # Requests that hit their timeout
+    stalls: int = 0
+    failures: int = 0
+    circuit_opens: int = 0
+    short_circuited: int = 0
+    resyncs: int = 0
+
+
+@dataclass
+class CircuitBreaker:
+    """
+    Stops sending requests after `failure_threshold` consecutive failures.
+    After `reset_timeout` seconds one request is let through again; the
+    circuit closes when it succeeds and stays open when it fails.
+    """
+
+    failure_threshold: int = 4
+    reset_timeout: float = 2.0
+    failures: int = 0
+    opened_at: Optional[float] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        return self.opened_at is None or monotonic() - self.opened_at >= self.reset_timeout
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> bool:
+        """Returns True when this failure opened the circuit."""
+        self.failures += 1
+        was_open = self.is_open
+        if was_open or self.failures >= self.failure_threshold:
+            self.opened_at = monotonic()
+        return not was_open and self.is_open
+
+
+def _never_sent(error: requests.RequestException) -> bool:
+    """True when the connection failed before any bytes of the request went out."""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.ConnectionError) or not error.args:
+        return False
+    # requests wraps urllib3's MaxRetryError, whose reason is the real error
+    reason = getattr(error.args[0], "reason", error.args[0])
+    return isinstance(reason, NewConnectionError)
+
+
+# (connect, read) timeouts in seconds per kind of request
+DEFAULT_TIMEOUTS = {
+    "move": (1.0, 2.0),
+    "board": (1.0, 2.0),
+    "default": (3.0, 10.0),
+}
 
 
 @dataclass
 class Api:
     url: str
+    timeouts: Dict[str, Tuple[float, float]] = field(default_factory=lambda: dict(DEFAULT_TIMEOUTS))
+    retries: int = 2
+    backoff: float = 0.1
+    max_backoff: float = 1.0
+    breaker: CircuitBreaker = field(default_factory=CircuitBreaker)
+    stats: ApiStats = field(default_factory=ApiStats)
+    # JSON parser used on response bodies, see `codec.BACKENDS`
+    json_backend: Optional[str] = None
+    session: requests.Session = field(default_factory=requests.Session, repr=False)
 
     def _get_url(self, endpoint: str) -> str:
         return "{}{}".format(self.url, endpoint)
 
-    def _req(self, endpoint: str, method: str, body: dict) -> Response:
+    def _req(
+        self,
+        endpoint: str,
+        method: str,
+        body: dict,
+        kind: str = "default",
+        probe: bool = False,
+    ) -> Optional[Response]:
+        """
+        Send a request, or return None when it could not be completed.
+
+        GET requests are retried on any network error or 5xx answer, with
+        jittered exponential backoff. Other requests are only retried when
+        the connection could not even be opened, since the server may
+        already have acted on them (a move must not be sent twice).
+
+        A `probe` is sent even when the circuit is open, and closes it
+        when it succeeds.
+        """
+        if not probe and not self.breaker.allow():
+            self.stats.short_circuited += 1
+            return None
+
         print(
             ">>> {} {} {}".format(
                 Style.BRIGHT + method.upper() + Style.RESET_ALL,
@@ -25,20 +122,59 @@ class Api:
                 body,
             )
         )
-        func = getattr(requests, method)
+        func = getattr(self.session, method)
         headers = {"Content-Type": "application/json"}
-        res = func(self._get_url(endpoint), headers=headers, data=json.dumps(body))
-        if res.status_code == 200:
-            print("<<< {} OK".format(res.status_code))
-        else:
-            print("<<< {} {}".format(res.status_code, res.text))
-        return res
+        idempotent = method == "get"
+        timeout = self.timeouts.get(kind, self.timeouts["default"])
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats.retries += 1
+                sleep(random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt)))
+            self.stats.requests += 1
+            try:
+                res = func(
+                    self._get_url(endpoint),
+                    headers=headers,
+                    data=json.dumps(body),
+                    timeout=timeout,
+                )
+            except requests.RequestException as e:
+                if isinstance(e, requests.Timeout):
+                    self.stats.stalls += 1
+                print(Fore.YELLOW + "<<< {}".format(type(e).__name__) + Style.RESET_ALL)
+                if idempotent or _never_sent(e):
+                    continue
+                break
+
+            if res.status_code >= 500 and idempotent and attempt < self.retries:
+                print("<<< {} {}".format(res.status_code, res.text))
+                continue
+            if res.status_code >= 500:
+                self._record_failure()
+            else:
+                self.breaker.record_success()
+            if res.status_code == 200:
+                print("<<< {} OK".format(res.status_code))
+            else:
+                print("<<< {} {}".format(res.status_code, res.text))
+            return res
+
+        self.stats.failures += 1
+        self._record_failure()
+        print(Fore.RED + "<<< {} {} failed".format(method.upper(), endpoint) + Style.RESET_ALL)
+        return None
+
+    def _record_failure(self) -> None:
+        if self.breaker.record_failure():
+            self.stats.circuit_opens += 1
 
     def bots_get(self, bot_token: str) -> Optional[Bot]:
         response = self._req("/bots/{}".format(bot_token), "get", {})
-        data, status = self._return_response_and_status(response)
+        if response is None:
+            return None
+        resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Bot, data)
+            return codec.bot(resp)
         return None
 
     def bots_register(
@@ -49,65 +185,96 @@ class Api:
             "post",
             {"email": email, "name": name, "password": password, "team": team},
         )
+        if response is None:
+            return None
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Bot, resp)
+            return codec.bot(resp)
         return None
 
     def boards_list(self) -> Optional[List[Board]]:
         response = self._req("/boards", "get", {})
+        if response is None:
+            return None
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return [from_dict(Board, board) for board in resp]
+            return [codec.board(board) for board in resp]
         return None
 
     def bots_join(self, bot_token: str, board_id: int) -> bool:
         response = self._req(
             f"/bots/{bot_token}/join", "post", {"preferredBoardId": board_id}
         )
+        if response is None:
+            return False
 
         resp, status = self._return_response_and_status(response)
         if status == 200:
             return True
         return False
 
-    def boards_get(self, board_id: str) -> Optional[Board]:
-        response = self._req("/boards/{}".format(board_id), "get", {})
+    def boards_get(self, board_id: str, probe: bool = False) -> Optional[Board]:
+        response = self._req(
+            "/boards/{}".format(board_id), "get", {}, kind="board", probe=probe
+        )
+        if response is None:
+            return None
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Board, resp)
+            return codec.board(resp)
         return None
 
-    def bots_move(self, bot_token: str, direction: str) -> Optional[Board]:
+    def bots_move(
+        self, bot_token: str, direction: str, board_id: Optional[int] = None
+    ) -> Optional[Board]:
         response = self._req(
             "/bots/{}/move".format(bot_token),
             "post",
             {"direction": direction},
+            kind="move",
         )
+        if response is None:
+            # The move may or may not have happened: resync from the board
+            # instead of guessing. The failure may just have opened the
+            # circuit, so the resync goes through as a probe.
+            if board_id is None:
+                return None
+            self.stats.resyncs += 1
+            return self.boards_get(board_id, probe=True)
         resp, status = self._return_response_and_status(response)
         if status == 200:
-            return from_dict(Board, resp)
+            return codec.board(resp)
         return None
 
+    def bots_move_ack(self, bot_token: str, direction: str) -> bool:
+        """Move without parsing the board in the answer, for bots that read boards elsewhere."""
+        response = self._req(
+            "/bots/{}/move".format(bot_token),
+            "post",
+            {"direction": direction},
+            kind="move",
+        )
+        return response is not None and response.status_code == 200
+
     def bots_recover(self, email: str, password: str) -> Optional[str]:
-        try:
-            response = self._req(
-                "/bots/recover", "post", {"email": email, "password": password}
-            )
-            resp, status = self._return_response_and_status(response)
-            if status == 201:
-                return resp["id"]
-            return None
-        except:
+        response = self._req(
+            "/bots/recover", "post", {"email": email, "password": password}
+        )
+        if response is None:
             return None
+        resp, status = self._return_response_and_status(response)
+        if status == 201 and isinstance(resp, dict):
+            return resp.get("id")
+        return None
 
     def _return_response_and_status(
         self, response: Response
-    ) -> Tuple[Union[dict, List], int]:
-        resp = response.json()
-
-        response_data = resp.get("data") if isinstance(resp, dict) else resp
-        if not response_data:
-            response_data = resp
+    ) -> Tuple[Optional[Union[dict, List]], Optional[int]]:
+        """The status is None when the body could not be parsed."""
+        try:
+            resp = codec.loads(response.content, self.json_backend)
+        except ValueError:
+            print(Fore.RED + "<<< unreadable body" + Style.RESET_ALL)
+            return None, None
 
-        return decode(response_data), response.status_code
+        return codec.unwrap(resp), response.status_code
@@ -0,0 +1,251 @@
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .models import Board, GameObject, Position
+from .rules import RED_POINTS
+
+try:
+    popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+
+    def popcount(mask: int) -> int:
+        return bin(mask).count("1")
+
+
+# Object type -> bitboard it is drawn on (diamonds are split by points)
+LAYERS: Dict[str, str] = {
+    "BotGameObject": "bots",
+    "BaseGameObject": "bases",
+    "TeleportGameObject": "teleporters",
+    "DiamondButtonGameObject": "buttons",
+}
+
+
+class BallMasks:
+    """
+    Manhattan balls as bitboards: `ball(x, y, r)` has the bit of every cell
+    within `r` steps of (x, y) set, cell (x, y) being bit `y * width + x`.
+
+    The masks of radius `r` for all cells are built on first use from those
+    of radius `r - 1`, by one dilation step each, and kept.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        cells = width * height
+        self.full = (1 << cells) - 1
+        left = sum(1 << (y * width) for y in range(height))
+        # Shifting by one column must not wrap into the neighbouring row
+        self._not_first = self.full & ~left
+        self._not_last = self.full & ~(left << (width - 1))
+        self.max_radius = width + height - 2
+        self._balls: List[List[int]] = [[1 << i for i in range(cells)]]
+
+    def _dilate(self, mask: int) -> int:
+        width = self.width
+        return self.full & (
+            mask
+            | (mask << 1 & self._not_first)
+            | (mask >> 1 & self._not_last)
+            | mask << width
+            | mask >> width
+        )
+
+    def ball(self, x: int, y: int, radius: int) -> int:
+        if radius < 0:
+            return 0
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return self._outside_ball(x, y, radius)
+        radius = min(radius, self.max_radius)
+        while len(self._balls) <= radius:
+            self._balls.append([self._dilate(m) for m in self._balls[-1]])
+        return self._balls[radius][y * self.width + x]
+
+    def _outside_ball(self, x: int, y: int, radius: int) -> int:
+        mask = 0
+        for cy in range(max(0, y - radius), min(self.height, y + radius + 1)):
+            reach = radius - abs(cy - y)
+            lo, hi = max(0, x - reach), min(self.width - 1, x + reach)
+            if lo <= hi:
+                mask |= ((1 << (hi - lo + 1)) - 1) << (cy * self.width + lo)
+        return mask
+
+
+@lru_cache(maxsize=16)
+def get_ball_masks(width: int, height: int) -> BallMasks:
+    return BallMasks(width, height)
+
+
+class Bitboards:
+    """
+    Occupancy of a board as Python int masks, one bit per cell: `red` and
+    `blue` diamonds, `bots`, `bases`, `teleporters` and `buttons`.
+    Neighbourhood questions become mask operations, e.g. the diamonds within
+    3 steps of a cell are `popcount(bb.ball(pos, 3) & bb.diamonds)`.
+
+    `update` diffs the board against the previous one by object id and only
+    flips the bits of objects that appeared, moved or disappeared. A layer
+    keeps a count per cell, so two objects sharing a cell (a bot on its
+    base, two bots on a base) are removed correctly; the masks themselves
+    count cells, not objects.
+    """
+
+    def __init__(self, width: int, height: int):
+        self.width = width
+        self.height = height
+        self.balls = get_ball_masks(width, height)
+        self.red = 0
+        self.blue = 0
+        self.bots = 0
+        self.bases = 0
+        self.teleporters = 0
+        self.buttons = 0
+        # Diamonds carried by each bot, by cell, for `bots_carrying`
+        self.loads: Dict[int, Tuple[int, int]] = {}
+        self._objects: Dict[int, Tuple[str, int]] = {}
+        # Objects per cell of every layer: a bit is cleared when its count drops to 0
+        self._counts: Dict[str, Dict[int, int]] = {
+            layer: {} for layer in ("red", "blue", *LAYERS.values())
+        }
+        # Objects added, moved or removed by the last `update`
+        self.changed = 0
+
+    @classmethod
+    def from_board(cls, board: Board) -> "Bitboards":
+        bitboards = cls(board.width, board.height)
+        bitboards.update(board)
+        return bitboards
+
+    @property
+    def diamonds(self) -> int:
+        return self.red | self.blue
+
+    def index(self, pos: Position) -> int:
+        return pos.y * self.width + pos.x
+
+    def bit(self, pos: Position) -> int:
+        if not (0 <= pos.x < self.width and 0 <= pos.y < self.height):
+            return 0
+        return 1 << self.index(pos)
+
+    def ball(self, pos: Position, radius: int) -> int:
+        return self.balls.ball(pos.x, pos.y, radius)
+
+    def within(self, mask: int, pos: Position, radius: int) -> int:
+        """Number of cells of `mask` at most `radius` steps from `pos`."""
+        return popcount(mask & self.ball(pos, radius))
+
+    def bots_carrying(self, min_diamonds: int, exclude: Optional[int] = None) -> int:
+        """Cells of the bots (but `exclude`) carrying at least `min_diamonds`."""
+        mask = 0
+        for bot_id, (cell, diamonds) in self.loads.items():
+            if diamonds >= min_diamonds and bot_id != exclude:
+                mask |= 1 << cell
+        return mask
+
+    def without(self, ids: Iterable[int]) -> "Bitboards":
+        """Copy of these bitboards with the objects `ids` left out, in O(len(ids))."""
+        copy = Bitboards.__new__(Bitboards)
+        copy.__dict__.update(self.__dict__)
+        copy._counts = dict(self._counts)
+        copy._objects = dict(self._objects)
+        copy.loads = dict(self.loads)
+        for obj_id in ids:
+            entry = copy._objects.pop(obj_id, None)
+            if entry is None:
+                continue
+            copy.loads.pop(obj_id, None)
+            layer, cell = entry
+            # Copy a layer's counts only when one of its objects goes
+            if copy._counts[layer] is self._counts[layer]:
+                copy._counts[layer] = dict(self._counts[layer])
+            cells = copy._counts[layer]
+            cells[cell] -= 1
+            if not cells[cell]:
+                del cells[cell]
+                setattr(copy, layer, getattr(copy, layer) & ~(1 << cell))
+        copy.changed = 0
+        return copy
+
+    def update(self, board: Board) -> int:
+        """Bring the masks up to date with `board`. Returns the number of objects that changed."""
+        width, height = board.width, board.height
+        if (width, height) != (self.width, self.height):
+            self.__init__(width, height)
+        masks = {layer: getattr(self, layer) for layer in self._counts}
+        counts = self._counts
+        previous = self._objects
+        current: Dict[int, Tuple[str, int]] = {}
+        loads: Dict[int, Tuple[int, int]] = {}
+        changes = []
+        for obj in board.game_objects or ():
+            kind = obj.type
+            if kind == "DiamondGameObject":
+                layer = "red" if obj.properties and obj.properties.points == RED_POINTS else "blue"
+            else:
+                layer = LAYERS.get(kind)
+                if layer is None:
+                    continue
+            pos = obj.position
+            if not (0 <= pos.x < width and 0 <= pos.y < height):
+                continue
+            entry = (layer, pos.y * width + pos.x)
+            current[obj.id] = entry
+            if layer == "bots":
+                loads[obj.id] = (entry[1], obj.properties.diamonds or 0)
+            old = previous.pop(obj.id, None)
+            if old != entry:
+                if old is not None:
+                    changes.append((old, -1))
+                changes.append((entry, 1))
+        changes.extend((old, -1) for old in previous.values())
+
+        for (layer, cell), delta in changes:
+            cells = counts[layer]
+            n = cells.get(cell, 0) + delta
+            if n:
+                cells[cell] = n
+            else:
+                del cells[cell]
+            if n == 0 or (n == 1 and delta > 0):
+                masks[layer] ^= 1 << cell
+        for layer, mask in masks.items():
+            setattr(self, layer, mask)
+        self._objects = current
+        self.loads = loads
+        self.changed = sum(1 for _, delta in changes if delta > 0) + len(previous)
+        return self.changed
+
+
+_bitboards: "OrderedDict[tuple, Bitboards]" = OrderedDict()
+_MAX_BITBOARDS = 8
+# Several helpers ask for the bitboards of the same board within one tick
+_last_lookup: Tuple[Optional[Board], Optional[Bitboards]] = (None, None)
+
+
+def get_bitboards(board: Board) -> Bitboards:
+    """
+    Bitboards of `board`, updated in place from those of the previous board
+    with the same id and size (or, for a team view, derived from the board's).
+    """
+    global _last_lookup
+    if _last_lookup[0] is board:
+        return _last_lookup[1]
+    # Views of `game.team.BoardAnalysis` derive theirs from the board's
+    analysis = getattr(board, "analysis", None)
+    if analysis is not None:
+        return analysis.bitboards_for(board)
+
+    key = (board.id, board.width, board.height)
+    bitboards = _bitboards.get(key)
+    if bitboards is None:
+        bitboards = _bitboards[key] = Bitboards(board.width, board.height)
+        if len(_bitboards) > _MAX_BITBOARDS:
+            _bitboards.popitem(last=False)
+    else:
+        _bitboards.move_to_end(key)
+    bitboards.update(board)
+    _last_lookup = (board, bitboards)
+    return bitboards
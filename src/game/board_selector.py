@@ -0,0 +1,112 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from time import monotonic
+from typing import List, Optional
+
+from .api import Api
+from .models import Board
+
+
+@dataclass
+class BoardRank:
+    board: Board
+    bots: int
+    # None when the board's capacity is unknown
+    free_slots: Optional[int]
+    # Diamond points per cell
+    density: float
+    move_delay: int
+
+    @property
+    def score(self) -> float:
+        """
+        Diamond points per cell we can expect to share, per second of moves:
+        more diamonds, fewer bots and a shorter move delay all help.
+        """
+        return self.density / (self.bots + 1) * 1000 / max(1, self.move_delay)
+
+
+def rank_board(board: Board, max_bots: Optional[int] = None) -> BoardRank:
+    bots = len(board.bots)
+    points = sum(d.properties.points or 1 for d in board.diamonds)
+    return BoardRank(
+        board=board,
+        bots=bots,
+        free_slots=max(0, max_bots - bots) if max_bots is not None else None,
+        density=points / max(1, board.width * board.height),
+        move_delay=board.minimum_delay_between_moves,
+    )
+
+
+def weighted_order(ranks: List[BoardRank]) -> List[BoardRank]:
+    """
+    `ranks` in a random order where a board comes first with probability
+    proportional to its score (weighted sampling without replacement).
+    Boards scoring 0 are only drawn after all the others.
+    """
+    def key(rank: BoardRank) -> float:
+        if rank.score <= 0:
+            return random.random() - 1
+        return random.random() ** (1 / rank.score)
+
+    return sorted(ranks, key=key, reverse=True)
+
+
+@dataclass
+class BoardSelector:
+    """
+    Picks the board to join when none was given.
+
+    The board list is refreshed with one concurrent `boards_get` per board,
+    boards are ranked by `BoardRank.score` (full boards left out) and the
+    first one that accepts us is joined. The boards scoring at least `near`
+    times the best come first, in an order drawn at random weighted by
+    score, so bots started together (in this process or in others) spread
+    over the good boards instead of all piling onto the best one. The
+    ranking is kept for `ttl` seconds, counting our own joins, so bots of
+    the same process spread out without refetching everything.
+    """
+
+    api: Api
+    max_bots: Optional[int] = None
+    ttl: float = 2.0
+    workers: int = 8
+    # Fraction of the best score a board needs to be drawn among the best
+    near: float = 0.8
+    _ranking: List[BoardRank] = field(default_factory=list)
+    _ranked_at: Optional[float] = None
+
+    def _fetch(self) -> List[Board]:
+        listed = self.api.boards_list() or []
+        if not listed:
+            return []
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(listed))) as pool:
+            fresh = list(pool.map(lambda b: self.api.boards_get(b.id), listed))
+        # A board we could not refresh is still worth trying as listed
+        return [new or old for new, old in zip(fresh, listed)]
+
+    def rank(self, refresh: bool = False) -> List[BoardRank]:
+        if refresh or self._ranked_at is None or monotonic() - self._ranked_at > self.ttl:
+            self._ranking = [rank_board(b, self.max_bots) for b in self._fetch()]
+            self._ranked_at = monotonic()
+        available = sorted(
+            (r for r in self._ranking if r.free_slots != 0), key=lambda r: r.score, reverse=True
+        )
+        if not available:
+            return available
+        cutoff = available[0].score * self.near
+        best = [r for r in available if r.score >= cutoff]
+        return weighted_order(best) + available[len(best):]
+
+    def join(self, token: str) -> Optional[int]:
+        """Join the best board that accepts us, returns its id."""
+        for rank in self.rank():
+            if self.api.bots_join(token, rank.board.id):
+                rank.bots += 1
+                if rank.free_slots is not None:
+                    rank.free_slots -= 1
+                return rank.board.id
+            # Full or gone: skip it until the next refresh
+            rank.free_slots = 0
+        return None
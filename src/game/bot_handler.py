@@ -5,6 +5,7 @@ from typing import Optional
 
 import requests
 from game.api import Api
+from game.moves import DIRECTION_NAMES
 from game.models import Board, Bot
 
 
@@ -13,17 +14,11 @@ class BotHandler:
     api: Api
 
     @staticmethod
-    def _get_direction(dx: int, dy: int):
-        if dx == -1 and dy == 0:
-            return "WEST"
-        elif dx == 1 and dy == 0:
-            return "EAST"
-        elif dx == 0 and dy == -1:
-            return "NORTH"
-        elif dx == 0 and dy == 1:
-            return "SOUTH"
-        else:
-            raise Exception("Invalid move")
+    def _get_direction(dx: int, dy: int) -> str:
+        direction = DIRECTION_NAMES.get((dx, dy))
+        if direction is None:
+            raise ValueError("Invalid move ({}, {})".format(dx, dy))
+        return direction
 
     def get_my_info(self, token: str) -> Bot:
         return self.api.bots_get(token)
@@ -33,7 +28,10 @@ class BotHandler:
 
     def move(self, token: str, board_id: int, dx: int, dy: int) -> Optional[Board]:
         # TODO: Returns board??
-        return self.api.bots_move(token, BotHandler._get_direction(dx, dy))
+        return self.api.bots_move(token, BotHandler._get_direction(dx, dy), board_id)
+
+    def move_ack(self, token: str, dx: int, dy: int) -> bool:
+        return self.api.bots_move_ack(token, BotHandler._get_direction(dx, dy))
 
     def register(
         self, name: str, email: str, password: str, team: str
@@ -0,0 +1,284 @@
+import mmap
+import os
+import struct
+import tempfile
+import threading
+import zlib
+from dataclasses import dataclass
+from time import monotonic, sleep, time
+from typing import Optional, Tuple
+
+from .board_handler import BoardHandler
+from .models import Board, GameObject
+from .snapshot import pack_board, unpack_board
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# File layout: header, then `slots` snapshot slots of `slot_size` bytes
+#
+#   header   magic, slots, slot size, board id, latest seq, wall clock
+#            time the latest board was requested from the server
+#
+# The seq in the header is only written once its slot holds the whole
+# board, and every slot carries its own seq (see `game.snapshot`), so
+# readers detect a slot that was reused while they were decoding it.
+MAGIC = 0x44494D42
+HEADER = struct.Struct("<IIIIId")
+DEFAULT_SLOTS = 4
+DEFAULT_SLOT_SIZE = 1 << 20
+MIN_INTERVAL = 0.05
+# Leader polls per move delay, so a board newer than any move is at most
+# a fraction of a move delay away
+POLLS_PER_MOVE = 4
+# How often `board_after` looks at the ring again while waiting
+WAIT_STEP = 0.01
+
+
+def ring_path(url: str, board_id: int) -> str:
+    """Ring file shared by every bot of this host playing `board_id` on the server at `url`."""
+    # Memory backed where the system has it
+    directory = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+    return os.path.join(
+        directory, "diamonds-{:08x}-board-{}.ring".format(zlib.crc32(url.encode()), board_id)
+    )
+
+
+@dataclass
+class BroadcastStats:
+    # Boards this process downloaded and published as the leader
+    published: int = 0
+    # Boards decoded from the ring
+    reads: int = 0
+    # Calls answered with the board decoded on the previous call
+    reuses: int = 0
+    # Slots overwritten while being decoded
+    torn: int = 0
+    # Boards fetched from the server because the ring had nothing fresh
+    fallbacks: int = 0
+    # Calls to `board_after` that had to wait for a board newer than our move
+    waits: int = 0
+    takeovers: int = 0
+
+
+class BoardBroadcast:
+    """
+    Host-local sharing of one board between bot processes.
+
+    The process holding the lock on the ring file is the leader: a thread
+    polls `/boards/{id}` every `interval` seconds (default: a quarter of
+    the board's move delay) and publishes each board into a memory-mapped ring of
+    `game.snapshot` slots. Every other process reads the latest slot
+    straight from the mapping instead of downloading and parsing the board
+    itself. When the leader stops publishing for `stale` seconds (it
+    crashed or left the game), the next reader to notice takes the lock
+    and becomes the leader; until then, and when no ring can be used at
+    all, boards come from the server as before.
+
+    `get_board` has the signature of `BoardHandler.get_board`, so either
+    can serve as the board source of a bot loop. After a move, use
+    `board_after`: the latest board may have been requested before the
+    server applied it.
+    """
+
+    def __init__(
+        self,
+        board_handler: BoardHandler,
+        board_id: int,
+        path: Optional[str] = None,
+        slots: int = DEFAULT_SLOTS,
+        slot_size: int = DEFAULT_SLOT_SIZE,
+        interval: Optional[float] = None,
+        stale: float = 2.0,
+    ):
+        if fcntl is None:
+            raise RuntimeError("board broadcast needs fcntl (POSIX)")
+        self.board_handler = board_handler
+        self.board_id = board_id
+        self.path = path or ring_path(board_handler.api.url, board_id)
+        self.slots = slots
+        self.slot_size = slot_size
+        self.interval = interval
+        self.stale = stale
+        self.stats = BroadcastStats()
+        self.leader = False
+        self._size = HEADER.size + slots * slot_size
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+        self._lock_fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        self._map: Optional[mmap.mmap] = None
+        self._view: Optional[memoryview] = None
+        self._seq = 0
+        # Latest board and the wall clock time it was requested, replaced
+        # together so the publisher thread never pairs a board with the
+        # time of another
+        self._current: Tuple[Optional[Board], float] = (None, 0.0)
+        self._published_at = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._try_lead()
+
+    def _attach(self) -> bool:
+        """Map the ring once it has its full size; never shrink it under another process."""
+        if self._view is not None:
+            return True
+        if os.fstat(self._fd).st_size < self._size:
+            if not self.leader:
+                return False
+            os.ftruncate(self._fd, self._size)
+        self._map = mmap.mmap(self._fd, self._size)
+        self._view = memoryview(self._map)
+        return True
+
+    def _header(self):
+        magic, slots, slot_size, board_id, seq, published = HEADER.unpack_from(self._view, 0)
+        if (magic, slots, slot_size, board_id) != (MAGIC, self.slots, self.slot_size, self.board_id):
+            return 0, 0.0
+        return seq, published
+
+    def _try_lead(self) -> bool:
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        self.leader = True
+        self._attach()
+        self._seq, _ = self._header()
+        self._thread = threading.Thread(target=self._publish_loop, name="board-broadcast", daemon=True)
+        self._thread.start()
+        return True
+
+    def publish(self, board: Board, requested_at: Optional[float] = None) -> int:
+        """
+        Write `board` into the next slot (leader only). `requested_at` is
+        the wall clock time it was requested (default: now). Returns its seq.
+        """
+        if requested_at is None:
+            requested_at = time()
+        seq = self._seq % 0xFFFFFFFF + 1
+        pack_board(self._map, HEADER.size + (seq % self.slots) * self.slot_size, seq, board)
+        HEADER.pack_into(self._map, 0, MAGIC, self.slots, self.slot_size, self.board_id, seq, requested_at)
+        self._current = (board, requested_at)
+        self._seq, self._published_at = seq, monotonic()
+        self.stats.published += 1
+        return seq
+
+    def poll_interval(self, board: Optional[Board] = None) -> float:
+        """Seconds between the leader's polls: `interval`, or a fraction of the move delay of `board`."""
+        if self.interval is not None:
+            return max(MIN_INTERVAL, self.interval)
+        if board is None:
+            return 1.0 / POLLS_PER_MOVE
+        return max(MIN_INTERVAL, board.minimum_delay_between_moves / 1000 / POLLS_PER_MOVE)
+
+    def _publish_loop(self) -> None:
+        while not self._stop.is_set():
+            started = monotonic()
+            requested_at = time()
+            board = self.board_handler.get_board(self.board_id)
+            if board is not None:
+                try:
+                    self.publish(board, requested_at)
+                except ValueError:
+                    # Does not fit a slot: readers fall back to the server
+                    pass
+            self._stop.wait(max(MIN_INTERVAL, self.poll_interval(board or self._current[0]) - (monotonic() - started)))
+
+    def latest(self) -> Optional[Board]:
+        """The newest board in the ring, or None when nothing fresh was published."""
+        if self.leader:
+            # Our own poller is failing too: let the caller see it
+            return self._current[0] if monotonic() - self._published_at <= self.stale else None
+        if not self._attach():
+            return None
+        for _ in range(3):
+            seq, published = self._header()
+            if not seq or time() - published > self.stale:
+                return None
+            if seq == self._seq:
+                self.stats.reuses += 1
+                return self._current[0]
+            read_seq, board = unpack_board(self._view, HEADER.size + (seq % self.slots) * self.slot_size)
+            if read_seq == seq:
+                self._seq, self._current = seq, (board, published)
+                self.stats.reads += 1
+                return board
+            self.stats.torn += 1
+        return None
+
+    def get_board(self, board_id: int) -> Optional[Board]:
+        if board_id != self.board_id:
+            return self.board_handler.get_board(board_id)
+        board = self.latest()
+        if board is None and not self.leader and self._try_lead():
+            self.stats.takeovers += 1
+            # Give the new publisher thread a moment for its first board
+            sleep(MIN_INTERVAL)
+            board = self.latest()
+        if board is None:
+            self.stats.fallbacks += 1
+            board = self.board_handler.get_board(board_id)
+        return board
+
+    def board_after(
+        self, board_id: int, since: float, bot: Optional[GameObject] = None, timeout: Optional[float] = None
+    ) -> Optional[Board]:
+        """
+        Like `get_board`, but only a board that already shows what happened
+        at wall clock time `since` (usually: when our move was acknowledged)
+        is taken from the ring: one requested after `since`, or one where
+        `bot` (our bot before the move) has a new position and a new
+        `milliseconds_left`. The ring is watched for up to `timeout` seconds
+        (default: two poll intervals); after that the board is fetched from
+        the server.
+        """
+        if board_id != self.board_id:
+            return self.board_handler.get_board(board_id)
+        if timeout is None:
+            timeout = 2 * self.poll_interval(self._current[0])
+        deadline = monotonic() + timeout
+        waited = False
+        while True:
+            board = self.latest()
+            if board is None and not self.leader and self._try_lead():
+                self.stats.takeovers += 1
+                sleep(MIN_INTERVAL)
+                board = self.latest()
+            if board is None:
+                break
+            # The board of `latest` or a newer one: never fresher than it is
+            if self._current[1] >= since or (bot is not None and _moved(board, bot)):
+                return board
+            if monotonic() >= deadline:
+                break
+            if not waited:
+                waited = True
+                self.stats.waits += 1
+            sleep(WAIT_STEP)
+        self.stats.fallbacks += 1
+        return self.board_handler.get_board(board_id)
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(2.0)
+        if self.leader:
+            if self._seq:
+                # Mark the ring stale so the next reader takes over right away
+                HEADER.pack_into(self._map, 0, MAGIC, self.slots, self.slot_size, self.board_id, self._seq, 0.0)
+            fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+        if self._view is not None:
+            self._view.release()
+            self._map.close()
+        os.close(self._fd)
+        os.close(self._lock_fd)
+
+
+def _moved(board: Board, bot: GameObject) -> bool:
+    """Whether `board` shows `bot` somewhere else and with another `milliseconds_left`, or without it."""
+    for other in board.bots:
+        if other.id == bot.id:
+            return other.position != bot.position and \
+                other.properties.milliseconds_left != bot.properties.milliseconds_left
+    return True
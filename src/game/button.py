@@ -0,0 +1,335 @@
+import random
+import zlib
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from math import sqrt
+from time import perf_counter
+from typing import FrozenSet, List, Optional, Sequence, Tuple
+
+from .generator import ScenarioConfig
+from .models import Board, GameObject
+from .rules import inventory_size
+
+# (x, y, free inventory room) of a bot
+Claimant = Tuple[int, int, int]
+# (x, y, points) of every diamond generated by one reset
+Layout = Tuple[Tuple[int, int, int], ...]
+
+
+def diamond_config(board: Board) -> Tuple[float, float]:
+    """(generation_ratio, red_ratio) of the board's DiamondsFeature, or the generator defaults."""
+    defaults = ScenarioConfig()
+    generation, red = defaults.generation_ratio, defaults.red_ratio
+    for feature in board.features or ():
+        if feature.name == "DiamondsFeature" and feature.config is not None:
+            if feature.config.generation_ratio is not None:
+                generation = feature.config.generation_ratio
+            if feature.config.red_ratio is not None:
+                red = feature.config.red_ratio
+    return generation, red
+
+
+def advantage(
+    diamonds: Sequence[Tuple[int, int, int]],
+    bots: Sequence[Claimant],
+    me: int,
+    horizon: int,
+    discount: float,
+) -> float:
+    """
+    How much better a diamond layout is for bot `me` than for its best
+    opponent. Every diamond goes to the closest bot with room for it (ties
+    share it), worth `points * discount ** distance`; diamonds further than
+    `horizon` from every such bot are worth nothing.
+    """
+    shares = [0.0] * len(bots)
+    for x, y, points in diamonds:
+        best, owners = horizon + 1, []
+        for i, (bx, by, room) in enumerate(bots):
+            if room < points:
+                continue
+            d = abs(bx - x) + abs(by - y)
+            if d > horizon:
+                continue
+            if d < best:
+                best, owners = d, [i]
+            elif d == best:
+                owners.append(i)
+        if owners:
+            value = points * discount ** best / len(owners)
+            for i in owners:
+                shares[i] += value
+    theirs = max((s for i, s in enumerate(shares) if i != me), default=0.0)
+    return shares[me] - theirs
+
+
+@dataclass
+class ResetProblem:
+    """
+    Everything the diamond layouts after a button press depend on
+    (picklable). The bots are not part of it: they move every tick, while
+    these only change when the button does.
+    """
+
+    width: int
+    height: int
+    # Cells no diamond is generated on: bases, teleporters and the button
+    occupied: FrozenSet[int]
+    diamonds: int
+    red_ratio: float
+
+    def key(self) -> tuple:
+        return self.width, self.height, tuple(sorted(self.occupied)), self.diamonds, self.red_ratio
+
+
+def sample_layouts(problem: ResetProblem, seed: int, count: int) -> List[Layout]:
+    """`count` random layouts after a reset."""
+    rng = random.Random(seed)
+    cells = problem.width * problem.height
+    wanted = min(problem.diamonds, cells - len(problem.occupied))
+    layouts = []
+    for _ in range(count):
+        taken = set()
+        layout = []
+        while len(layout) < wanted:
+            cell = rng.randrange(cells)
+            if cell in problem.occupied or cell in taken:
+                continue
+            taken.add(cell)
+            points = 2 if rng.random() < problem.red_ratio else 1
+            layout.append((cell % problem.width, cell // problem.width, points))
+        layouts.append(tuple(layout))
+    return layouts
+
+
+def evaluate(
+    layouts: Sequence[Layout], bots: Sequence[Claimant], me: int, horizon: int, discount: float
+) -> Tuple[int, float, float]:
+    """
+    (count, sum, sum of squares) of `advantage` over `layouts`. Diamonds
+    on a bot's cell are left out: the layouts are drawn without knowing
+    where the bots stand, and the server would have put them elsewhere.
+    """
+    cells = {(x, y) for x, y, _ in bots}
+    total = total_sq = 0.0
+    for layout in layouts:
+        diamonds = [d for d in layout if (d[0], d[1]) not in cells]
+        value = advantage(diamonds, bots, me, horizon, discount)
+        total += value
+        total_sq += value * value
+    return len(layouts), total, total_sq
+
+
+@dataclass
+class _Samples:
+    count: int = 0
+    total: float = 0.0
+    total_sq: float = 0.0
+
+    def add(self, result: Tuple[int, float, float]) -> None:
+        self.count += result[0]
+        self.total += result[1]
+        self.total_sq += result[2]
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    @property
+    def stderr(self) -> float:
+        if self.count < 2:
+            return float("inf")
+        variance = max(0.0, self.total_sq / self.count - self.mean ** 2)
+        return sqrt(variance / (self.count - 1))
+
+
+@dataclass
+class _Layouts:
+    layouts: List[Layout] = field(default_factory=list)
+    # Batches handed out so far, for the seeds of the next ones
+    batches: int = 0
+    # Batches on the pool and how many layouts each will bring
+    pending: List[Tuple[Future, int]] = field(default_factory=list)
+
+    def collect(self) -> None:
+        """Keep the layouts of the pool batches that are done."""
+        running = []
+        for future, count in self.pending:
+            if not future.done():
+                running.append((future, count))
+            elif not future.cancelled() and future.exception() is None:
+                self.layouts.extend(future.result())
+        self.pending = running
+
+
+@dataclass
+class ButtonEstimate:
+    # Expected advantage after pressing, in today's value, minus the advantage now
+    gain: float
+    reset: float
+    current: float
+    samples: int
+    stderr: float
+    # The layouts came (at least partly) from earlier calls on the same problem
+    cached: bool
+
+
+@dataclass
+class ButtonStats:
+    estimates: int = 0
+    cache_hits: int = 0
+    samples: int = 0
+    # Calls that ran out of budget before `samples` samples
+    partial: int = 0
+    seconds: float = 0.0
+
+
+class ButtonEstimator:
+    """
+    Monte Carlo value of pressing the red button.
+
+    Pressing removes every diamond and generates `generation_ratio * cells`
+    new ones, red with probability `red_ratio`, on free cells. The estimator
+    samples such layouts and compares our `advantage` over the best opponent
+    on them, standing on the button `steps` moves from now, with our
+    advantage on the current layout.
+
+    The layouts only depend on the `ResetProblem` and are cached per
+    problem, so later ticks reuse them while the bots move; every call
+    scores them against where the bots stand now, until `samples` are
+    scored or the per call `budget` (seconds) is spent. Missing layouts
+    are drawn in batches, in this process or on a pool of `workers`
+    processes; pool batches that finish after the budget are kept for the
+    next call.
+    """
+
+    def __init__(
+        self,
+        samples: int = 256,
+        budget: float = 0.005,
+        workers: int = 0,
+        batch: int = 32,
+        discount: float = 0.9,
+        cache_size: int = 16,
+    ):
+        self.samples = samples
+        self.budget = budget
+        self.workers = workers
+        self.batch = batch
+        self.discount = discount
+        self.cache_size = cache_size
+        self.stats = ButtonStats()
+        self._cache: "OrderedDict[tuple, _Layouts]" = OrderedDict()
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def problem(self, board: Board, button: GameObject) -> ResetProblem:
+        width = board.width
+        occupied = {button.position.y * width + button.position.x}
+        for obj in board.game_objects:
+            if obj.type in ("BaseGameObject", "TeleportGameObject", "DiamondButtonGameObject"):
+                occupied.add(obj.position.y * width + obj.position.x)
+            elif obj.type == "BotGameObject" and obj.properties.base is not None:
+                base = obj.properties.base
+                occupied.add(base.y * width + base.x)
+        generation, red = diamond_config(board)
+        return ResetProblem(width, board.height, frozenset(occupied), int(width * board.height * generation), red)
+
+    def claimants(self, board: Board, bot: GameObject, button: GameObject) -> Tuple[List[Claimant], int]:
+        """Bots as they will stand when the button is pressed (we are on it), and our index."""
+        claimants: List[Claimant] = []
+        me = 0
+        for obj in board.bots:
+            room = inventory_size(obj) - (obj.properties.diamonds or 0)
+            if obj.id == bot.id:
+                me = len(claimants)
+                claimants.append((button.position.x, button.position.y, room))
+            else:
+                claimants.append((obj.position.x, obj.position.y, room))
+        return claimants, me
+
+    def current(self, board: Board, bot: GameObject, horizon: int) -> float:
+        bots = board.bots
+        claimants = [(b.position.x, b.position.y, inventory_size(b) - (b.properties.diamonds or 0)) for b in bots]
+        me = next(i for i, b in enumerate(bots) if b.id == bot.id)
+        diamonds = [(d.position.x, d.position.y, d.properties.points or 1) for d in board.diamonds]
+        return advantage(diamonds, claimants, me, max(0, horizon), self.discount)
+
+    def _entry(self, key: tuple) -> Tuple[_Layouts, bool]:
+        entry = self._cache.get(key)
+        if entry is not None:
+            self._cache.move_to_end(key)
+            return entry, True
+        entry = self._cache[key] = _Layouts()
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return entry, False
+
+    def _next_seed(self, entry: _Layouts, seed: int) -> int:
+        entry.batches += 1
+        return seed + entry.batches
+
+    def _submit(self, problem: ResetProblem, entry: _Layouts, seed: int) -> None:
+        """Hand the layouts still missing to the pool."""
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        missing = self.samples - len(entry.layouts) - sum(count for _, count in entry.pending)
+        while missing > 0:
+            count = min(self.batch, missing)
+            missing -= count
+            future = self._pool.submit(sample_layouts, problem, self._next_seed(entry, seed), count)
+            entry.pending.append((future, count))
+
+    def estimate(
+        self,
+        board: Board,
+        bot: GameObject,
+        button: GameObject,
+        steps: int,
+        horizon: int,
+        budget: Optional[float] = None,
+    ) -> ButtonEstimate:
+        """
+        Value of walking `steps` moves to `button` and pressing it, for
+        diamonds reachable within `horizon` moves.
+        """
+        started = perf_counter()
+        deadline = started + (self.budget if budget is None else budget)
+        problem = self.problem(board, button)
+        key = problem.key()
+        entry, cached = self._entry(key)
+        seed = zlib.crc32(repr(key).encode())
+        bots, me = self.claimants(board, bot, button)
+        reach = max(0, horizon - steps)
+        if self.workers > 0:
+            entry.collect()
+            self._submit(problem, entry, seed)
+
+        samples = _Samples()
+        while samples.count < self.samples and perf_counter() < deadline:
+            batch = entry.layouts[samples.count:min(self.samples, samples.count + self.batch)]
+            if not batch:
+                if not entry.pending:
+                    entry.layouts += sample_layouts(
+                        problem, self._next_seed(entry, seed), min(self.batch, self.samples - samples.count)
+                    )
+                else:
+                    wait([f for f, _ in entry.pending], max(0.0, deadline - perf_counter()), FIRST_COMPLETED)
+                    entry.collect()
+                continue
+            samples.add(evaluate(batch, bots, me, reach, self.discount))
+
+        reset = samples.mean * self.discount ** steps
+        now = self.current(board, bot, horizon)
+        stats = self.stats
+        stats.estimates += 1
+        stats.cache_hits += cached
+        stats.samples += samples.count
+        stats.partial += samples.count < self.samples
+        stats.seconds += perf_counter() - started
+        return ButtonEstimate(reset - now, reset, now, samples.count, samples.stderr * self.discount ** steps, cached)
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
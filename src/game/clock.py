@@ -0,0 +1,77 @@
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from .models import Board, GameObject
+
+
+@dataclass
+class GameClock:
+    """
+    Remaining game time for our bot, in milliseconds and in moves.
+
+    The server reports `milliseconds_left` on our bot with every board. A
+    board is already `latency / 2` old when we read it, and it is read
+    again a while later when the logic decides, so the reported value is
+    extrapolated with the local clock. The local clock's rate is corrected
+    against the server's (drift), and the time one of our moves costs is
+    learned from how much server time passes between two boards.
+
+    `time_source` is the local clock, in seconds (tests and simulators
+    pass their own).
+    """
+
+    smoothing: float = 0.3
+    max_drift: float = 0.25
+    move_delay_ms: float = 1000.0
+    latency_ms: float = 0.0
+    move_period_ms: Optional[float] = None
+    rate: float = 1.0
+    server_ms_left: Optional[float] = None
+    observed_at: Optional[float] = None
+    time_source: Callable[[], float] = field(default=time.monotonic, repr=False, compare=False)
+
+    def _ema(self, old: Optional[float], new: float) -> float:
+        return new if old is None else old + self.smoothing * (new - old)
+
+    def observe(self, board_bot: GameObject, board: Board, now: Optional[float] = None) -> None:
+        now = self.time_source() if now is None else now
+        self.move_delay_ms = float(board.minimum_delay_between_moves or self.move_delay_ms)
+        ms_left = board_bot.properties.milliseconds_left
+        if ms_left is None:
+            return
+
+        if self.server_ms_left is not None and ms_left < self.server_ms_left:
+            server_elapsed = self.server_ms_left - ms_left
+            local_elapsed = (now - self.observed_at) * 1000
+            self.move_period_ms = self._ema(self.move_period_ms, server_elapsed)
+            if local_elapsed > 0:
+                ratio = server_elapsed / local_elapsed
+                ratio = min(1 + self.max_drift, max(1 - self.max_drift, ratio))
+                self.rate = self._ema(self.rate, ratio)
+
+        self.server_ms_left = float(ms_left)
+        self.observed_at = now
+
+    def record_latency(self, seconds: float) -> None:
+        """Round trip time of a request to the server, measured by the runner."""
+        self.latency_ms = self._ema(self.latency_ms or None, seconds * 1000)
+
+    def remaining_ms(self, now: Optional[float] = None) -> Optional[float]:
+        if self.server_ms_left is None:
+            return None
+        now = self.time_source() if now is None else now
+        since_observed = (now - self.observed_at) * 1000 * self.rate
+        return max(0.0, self.server_ms_left - self.latency_ms / 2 - since_observed)
+
+    def period_ms(self) -> float:
+        """Server time one of our moves costs."""
+        if self.move_period_ms is not None:
+            return max(self.move_delay_ms, self.move_period_ms)
+        return self.move_delay_ms + self.latency_ms
+
+    def remaining_moves(self, now: Optional[float] = None, default: int = 999) -> int:
+        remaining = self.remaining_ms(now)
+        if remaining is None:
+            return default
+        return int(remaining // max(1.0, self.period_ms()))
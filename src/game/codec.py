@@ -0,0 +1,123 @@
+import json
+from dataclasses import asdict
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .models import Base, Board, Bot, Config, Feature, GameObject, Position, Properties
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+# Raw JSON bytes -> Python objects, fastest available first
+BACKENDS: Dict[str, Callable[[bytes], Any]] = {}
+if orjson is not None:
+    BACKENDS["orjson"] = orjson.loads
+if msgspec is not None:
+    BACKENDS["msgspec"] = msgspec.json.Decoder().decode
+BACKENDS["json"] = json.loads
+DEFAULT_BACKEND = next(iter(BACKENDS))
+
+
+def loads(raw: Union[bytes, str], backend: Optional[str] = None) -> Any:
+    return BACKENDS[backend or DEFAULT_BACKEND](raw)
+
+
+def unwrap(payload: Any) -> Any:
+    """The server wraps most answers in `{"data": ...}`."""
+    data = payload.get("data") if isinstance(payload, dict) else payload
+    return data if data else payload
+
+
+# The builders below read the server's camelCase keys directly, so a board
+# is built from the parsed JSON in one pass, without an intermediate
+# snake_case copy or dacite.
+
+
+def position(d: dict) -> Position:
+    return Position(d["y"], d["x"])
+
+
+def properties(d: Optional[dict]) -> Optional[Properties]:
+    if d is None:
+        return None
+    get = d.get
+    base = get("base")
+    return Properties(
+        points=get("points"),
+        pair_id=get("pairId"),
+        diamonds=get("diamonds"),
+        score=get("score"),
+        name=get("name"),
+        inventory_size=get("inventorySize"),
+        can_tackle=get("canTackle"),
+        milliseconds_left=get("millisecondsLeft"),
+        time_joined=get("timeJoined"),
+        base=Base(base["y"], base["x"]) if base else None,
+    )
+
+
+def game_object(d: dict) -> GameObject:
+    return GameObject(d["id"], position(d["position"]), d["type"], properties(d.get("properties")))
+
+
+def config(d: Optional[dict]) -> Optional[Config]:
+    if d is None:
+        return None
+    get = d.get
+    return Config(
+        generation_ratio=get("generationRatio"),
+        min_ratio_for_generation=get("minRatioForGeneration"),
+        red_ratio=get("redRatio"),
+        seconds=get("seconds"),
+        pairs=get("pairs"),
+        inventory_size=get("inventorySize"),
+        can_tackle=get("canTackle"),
+    )
+
+
+def feature(d: dict) -> Feature:
+    return Feature(d["name"], config(d.get("config")))
+
+
+def board(d: dict) -> Board:
+    objects = d.get("gameObjects")
+    return Board(
+        id=d["id"],
+        width=d["width"],
+        height=d["height"],
+        features=[feature(f) for f in d.get("features") or []],
+        minimum_delay_between_moves=d["minimumDelayBetweenMoves"],
+        game_objects=[game_object(o) for o in objects] if objects is not None else None,
+    )
+
+
+def bot(d: dict) -> Bot:
+    return Bot(d["name"], d["email"], d["id"])
+
+
+def parse_board(raw: Union[bytes, str], backend: Optional[str] = None) -> Board:
+    return board(unwrap(loads(raw, backend)))
+
+
+def _camel(key: str) -> str:
+    head, *rest = key.split("_")
+    return head + "".join(part.title() for part in rest)
+
+
+def _camel_keys(data: Any) -> Any:
+    if isinstance(data, dict):
+        return {_camel(k): _camel_keys(v) for k, v in data.items()}
+    if isinstance(data, list):
+        return [_camel_keys(v) for v in data]
+    return data
+
+
+def board_payload(b: Board) -> dict:
+    """`b` as the server would send it (camelCase keys, wrapped in data)."""
+    return {"data": _camel_keys(asdict(b))}
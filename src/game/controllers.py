@@ -0,0 +1,34 @@
+import importlib
+from typing import Dict, Optional, Type
+
+from .logic.GACHOANLEVEL8 import GACHOANLEVEL8
+from .logic.WawanMKS import WawanMKS
+from .logic.base import BaseLogic
+from .logic.gachoan import GachoanBot
+from .logic.random import RandomLogic
+
+CONTROLLERS: Dict[str, Type[BaseLogic]] = {
+    "Random": RandomLogic,
+    "GachoanBot": GachoanBot,
+    "GACHOANLEVEL8": GACHOANLEVEL8,
+    "WawanMKS": WawanMKS,
+}
+
+
+def get_controller(name: str) -> Optional[Type[BaseLogic]]:
+    """
+    A registered controller by name, or any `BaseLogic` subclass given as
+    `package.module:ClassName`.
+    """
+    if name in CONTROLLERS:
+        return CONTROLLERS[name]
+    module_name, _, class_name = name.rpartition(":")
+    if not module_name:
+        return None
+    try:
+        logic = getattr(importlib.import_module(module_name), class_name, None)
+    except ImportError:
+        return None
+    if isinstance(logic, type) and issubclass(logic, BaseLogic):
+        return logic
+    return None
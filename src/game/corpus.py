@@ -0,0 +1,22 @@
+import json
+from dataclasses import asdict
+from typing import IO, Iterator, Optional, Tuple
+
+from dacite import from_dict
+
+from .models import Board
+
+
+def write_board(f: IO[str], board: Board, bot: Optional[str] = None) -> None:
+    """Append one board (and the name of the bot that saw it) as a JSON line."""
+    f.write(json.dumps({"bot": bot, "board": asdict(board)}) + "\n")
+
+
+def read_corpus(path: str) -> Iterator[Tuple[Optional[str], Board]]:
+    """Boards recorded with `write_board` (e.g. by `main.py --record-boards`)."""
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                entry = json.loads(line)
+                yield entry.get("bot"), from_dict(Board, entry["board"])
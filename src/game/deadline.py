@@ -0,0 +1,158 @@
+import threading
+from dataclasses import dataclass
+from time import monotonic
+from typing import Iterator, Optional, Tuple
+
+from .logic.base import BaseLogic
+from .models import Board, GameObject
+from .moves import get_move_table
+from .util import get_direction
+
+# Never give a logic less than this, however late the board arrived
+MIN_BUDGET = 0.01
+
+
+class Deadline:
+    def __init__(self, seconds: float):
+        self.at = monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.at - monotonic())
+
+    def expired(self) -> bool:
+        return monotonic() >= self.at
+
+
+def move_budget(board: Board, latency: float = 0.0, margin: float = 0.05) -> float:
+    """
+    Seconds a logic may think about a board: the move delay, minus the
+    time the move request takes to reach the server and a safety margin.
+    """
+    return max(MIN_BUDGET, board.minimum_delay_between_moves / 1000 - latency - margin)
+
+
+def fallback_move(board_bot: GameObject, board: Board) -> Tuple[int, int]:
+    """A legal move computed in microseconds: towards base, else anywhere."""
+    pos, base = board_bot.position, board_bot.properties.base
+    intent = get_direction(pos.x, pos.y, base.x, base.y) if base else (0, 0)
+    if intent == (0, 0):
+        intent = (1, 0)
+    move = get_move_table(board.width, board.height).fallback(pos.x, pos.y, *intent)
+    return move or intent
+
+
+@dataclass
+class DeadlineStats:
+    ticks: int = 0
+    # The logic finished before the deadline
+    completed: int = 0
+    # Deadline hit while the logic was still improving its answer
+    partial: int = 0
+    # Deadline hit before any answer: fallback move sent
+    misses: int = 0
+    # The previous tick's computation was still running: fallback move sent
+    overruns: int = 0
+    errors: int = 0
+    worst_ms: float = 0.0
+    total_ms: float = 0.0
+
+    @property
+    def miss_rate(self) -> float:
+        return (self.misses + self.overruns) / self.ticks if self.ticks else 0.0
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.ticks if self.ticks else 0.0
+
+
+class _Search:
+    def __init__(self):
+        # (move, branch) last yielded, replaced as a whole so that a late
+        # yield cannot pair one answer's move with another's branch
+        self.best: Optional[Tuple[Tuple[int, int], Optional[str]]] = None
+        self.error: Optional[BaseException] = None
+        self.done = threading.Event()
+
+
+class DeadlineRunner:
+    """
+    Runs `logic.next_move_anytime` against a deadline.
+
+    The logic runs in a background thread and every move it yields replaces
+    the best answer so far; at the deadline the runner returns that answer,
+    or `fallback_move` when there is none yet, so a move always goes out on
+    time. A logic still running at the next tick is left to finish (its
+    state must not be touched by two searches) and that tick also gets the
+    fallback move. Logics without an anytime version answer once through
+    `BaseLogic.next_move_anytime`.
+    """
+
+    def __init__(self, logic: BaseLogic, smoothing: float = 0.3):
+        self.logic = logic
+        self.smoothing = smoothing
+        self.latency = 0.0
+        self.last_branch: Optional[str] = None
+        self.stats = DeadlineStats()
+        self._search: Optional[_Search] = None
+
+    @property
+    def busy(self) -> bool:
+        """
+        A search from an earlier tick is still running and may still change
+        the logic's state: no new search starts, and the logic must not be
+        swapped (or its state handed over) until it is done.
+        """
+        return self._search is not None and not self._search.done.is_set()
+
+    def record_latency(self, seconds: float) -> None:
+        """Round trip time of a move request, taken out of the next budgets."""
+        self.latency += self.smoothing * (seconds - self.latency)
+
+    def budget(self, board: Board) -> float:
+        return move_budget(board, self.latency)
+
+    def _run(self, search: _Search, moves: Iterator[Tuple[int, int]]) -> None:
+        try:
+            for move in moves:
+                search.best = move, self.logic.last_branch
+        except Exception as e:
+            search.error = e
+        finally:
+            search.done.set()
+
+    def next_move(
+        self, board_bot: GameObject, board: Board, deadline: Optional[Deadline] = None
+    ) -> Tuple[int, int]:
+        start = monotonic()
+        deadline = deadline or Deadline(self.budget(board))
+        stats = self.stats
+        stats.ticks += 1
+        if self.busy:
+            stats.overruns += 1
+            move, self.last_branch = fallback_move(board_bot, board), "fallback"
+        else:
+            search = self._search = _Search()
+            thread = threading.Thread(
+                target=self._run,
+                args=(search, self.logic.next_move_anytime(board_bot, board, deadline)),
+                name="anytime-logic",
+                daemon=True,
+            )
+            thread.start()
+            finished = search.done.wait(deadline.remaining())
+            # Read once: whatever the search yields from now on is discarded
+            move, self.last_branch = search.best or (None, None)
+            if search.error is not None:
+                stats.errors += 1
+            if move is None:
+                stats.misses += 1
+                move, self.last_branch = fallback_move(board_bot, board), "fallback"
+            elif finished:
+                stats.completed += 1
+            else:
+                stats.partial += 1
+
+        elapsed_ms = (monotonic() - start) * 1000
+        stats.total_ms += elapsed_ms
+        stats.worst_ms = max(stats.worst_ms, elapsed_ms)
+        return move
@@ -0,0 +1,174 @@
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from .models import Position
+
+Distance = Callable[[Position, Position], int]
+
+
+class _OutOfBudget(Exception):
+    pass
+
+
+@dataclass
+class EndgameSolution:
+    # Next stop: a diamond or our base
+    target: Position
+    # Points banked at base by the end of the game along `route`
+    value: int
+    route: List[Position]
+    # Whether every reachable diamond was considered
+    complete: bool
+
+
+@dataclass
+class EndgameStats:
+    solves: int = 0
+    # Ticks where even the smallest problem did not fit in the budget
+    aborts: int = 0
+    # Ticks solved on a subset of the diamonds only
+    truncated: int = 0
+    nodes: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class EndgameSolver:
+    """
+    Exact plan for the last moves of a game.
+
+    Stops are the diamonds that can still be picked up and brought home in
+    time, plus our base; travelling between stops costs the teleporter
+    aware distance. A memoized DP over (stop, diamonds carried, set of
+    diamonds taken, moves left) finds the route that banks the most points
+    before the time runs out (ties: the one that finishes earliest).
+    Diamonds still carried at the end count for nothing.
+
+    Routes are modelled as distances between stops, not as the cells walked
+    through. A candidate diamond on a shortest path between two stops costs
+    no extra moves, so the DP takes it when it fits. Other diamonds the bot
+    walks over are not modelled: the game picks them up if there is room,
+    which may bring more points than planned, or fill the room kept for a
+    later stop, which is then skipped when reached.
+
+    The budget is hard: the DP is solved on the `k` most promising diamonds
+    for growing `k`, and the last problem that finished within `max_nodes`
+    DP states and `max_seconds` gives the answer.
+    """
+
+    max_candidates: int = 12
+    max_nodes: int = 20_000
+    max_seconds: float = 0.02
+    stats: EndgameStats = field(default_factory=EndgameStats)
+
+    def solve(
+        self,
+        start: Position,
+        base: Position,
+        carried: int,
+        capacity: int,
+        moves_left: int,
+        diamonds: Sequence[Tuple[Position, int]],
+        distance: Distance,
+    ) -> Optional[EndgameSolution]:
+        started = perf_counter()
+        deadline = started + self.max_seconds
+        self.stats.solves += 1
+
+        home = distance(start, base)
+        reachable = []
+        for position, points in diamonds:
+            there = distance(start, position)
+            back = distance(position, base)
+            if there + back <= moves_left and points <= capacity:
+                reachable.append((there + back, position, points))
+        reachable.sort(key=lambda c: c[0])
+        reachable = reachable[: self.max_candidates]
+
+        best: Optional[EndgameSolution] = None
+        sizes = sorted({min(k, len(reachable)) for k in (2, 4, 6, 8, 10, len(reachable))})
+        budget = [self.max_nodes]
+        for size in sizes:
+            try:
+                solution = self._solve(
+                    start, base, carried, capacity, moves_left, home,
+                    [(p, pts) for _, p, pts in reachable[:size]], distance, budget, deadline,
+                )
+            except _OutOfBudget:
+                break
+            best = EndgameSolution(*solution, complete=size == len(reachable))
+
+        self.stats.nodes += self.max_nodes - budget[0]
+        self.stats.seconds += perf_counter() - started
+        if best is None:
+            self.stats.aborts += 1
+        elif not best.complete:
+            self.stats.truncated += 1
+        return best
+
+    def _solve(
+        self, start, base, carried, capacity, moves_left, home, candidates, distance, budget, deadline
+    ) -> Tuple[Position, int, List[Position]]:
+        # Stop 0 is the start, stop 1 our base, stops 2.. the diamonds
+        stops = [start, base] + [p for p, _ in candidates]
+        points = [0, 0] + [pts for _, pts in candidates]
+        n = len(stops)
+        # Both ways: routes through teleporters are not reversible
+        dist = [
+            [0 if i == j else distance(stops[i], stops[j]) for j in range(n)]
+            for i in range(n)
+        ]
+        dist[0][1] = home
+        to_base = [row[1] for row in dist]
+        memo: Dict[Tuple[int, int, int, int], Tuple[Tuple[int, int], Optional[int]]] = {}
+
+        def best(stop: int, load: int, taken: int, left: int) -> Tuple[int, int]:
+            """(points banked, moves left over) from this state."""
+            key = (stop, load, taken, left)
+            cached = memo.get(key)
+            if cached is not None:
+                return cached[0]
+            budget[0] -= 1
+            if budget[0] < 0 or (budget[0] & 255 == 0 and perf_counter() > deadline):
+                raise _OutOfBudget
+
+            # Standing still banks nothing more
+            value, choice = (0, left), None
+            if load and stop != 1 and to_base[stop] <= left:
+                banked, spare = best(1, 0, taken, left - to_base[stop])
+                option = (banked + load, spare)
+                if option > value:
+                    value, choice = option, 1
+            for i in range(2, n):
+                if taken >> i & 1 or load + points[i] > capacity:
+                    continue
+                cost = dist[stop][i]
+                if cost + to_base[i] > left:
+                    continue
+                option = best(i, load + points[i], taken | 1 << i, left - cost)
+                if option > value:
+                    value, choice = option, i
+            memo[key] = (value, choice)
+            return value
+
+        # Standing on our base means anything carried is banked already
+        first = 1 if start == base else 0
+        load = 0 if first == 1 else carried
+        value, _ = best(first, load, 0, moves_left)
+
+        route: List[Position] = []
+        stop, taken, left = first, 0, moves_left
+        while True:
+            _, choice = memo[(stop, load, taken, left)]
+            if choice is None:
+                break
+            left -= dist[stop][choice]
+            if choice == 1:
+                load = 0
+            else:
+                load += points[choice]
+                taken |= 1 << choice
+            stop = choice
+            route.append(stops[choice])
+        return (route[0] if route else base), value, route
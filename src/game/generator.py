@@ -0,0 +1,175 @@
+import random
+from dataclasses import dataclass, replace
+from typing import Iterator, List, Optional, Set, Tuple
+
+from .models import Base, Board, Config, Feature, GameObject, Position, Properties
+
+
+@dataclass
+class ScenarioConfig:
+    width: int = 15
+    height: int = 15
+    bots: int = 4
+    teleport_pairs: int = 1
+    red_button: bool = True
+    # Same meaning as the server's DiamondsFeature config: the board is
+    # filled up to `generation_ratio * cells` diamonds, each one red with
+    # probability `red_ratio`, whenever fewer than
+    # `min_ratio_for_generation * cells` are left.
+    generation_ratio: float = 0.05
+    min_ratio_for_generation: float = 0.02
+    red_ratio: float = 0.2
+    inventory_size: int = 5
+    can_tackle: bool = True
+    seconds: int = 60
+    minimum_delay_between_moves: int = 1000
+    # Fresh games start with empty inventories, zero scores and a full clock;
+    # otherwise those are randomised to look like a game in progress.
+    fresh: bool = False
+
+    @property
+    def cells(self) -> int:
+        return self.width * self.height
+
+
+SCENARIOS = {
+    "default": ScenarioConfig(),
+    "large": ScenarioConfig(width=50, height=50, bots=8, teleport_pairs=3),
+    "crowded": ScenarioConfig(bots=20, generation_ratio=0.15),
+    "huge": ScenarioConfig(width=100, height=100, bots=50, teleport_pairs=10, generation_ratio=0.1),
+}
+
+
+class BoardGenerator:
+    """Seeded generator of valid `Board` instances."""
+
+    def __init__(self, seed: Optional[int] = None):
+        self.rng = random.Random(seed)
+        self._next_id = 1
+
+    def _id(self) -> int:
+        obj_id = self._next_id
+        self._next_id += 1
+        return obj_id
+
+    def free_cell(self, config: ScenarioConfig, occupied: Set[Tuple[int, int]]) -> Position:
+        if len(occupied) >= config.cells:
+            raise ValueError("Board is full")
+        while True:
+            x = self.rng.randrange(config.width)
+            y = self.rng.randrange(config.height)
+            if (x, y) not in occupied:
+                occupied.add((x, y))
+                return Position(y, x)
+
+    def diamond(self, config: ScenarioConfig, occupied: Set[Tuple[int, int]]) -> GameObject:
+        points = 2 if self.rng.random() < config.red_ratio else 1
+        return GameObject(
+            self._id(), self.free_cell(config, occupied), "DiamondGameObject", Properties(points=points)
+        )
+
+    def fill_diamonds(
+        self, config: ScenarioConfig, objects: List[GameObject], occupied: Set[Tuple[int, int]]
+    ) -> None:
+        """Top the board up to `generation_ratio * cells` diamonds."""
+        present = sum(1 for o in objects if o.type == "DiamondGameObject")
+        for _ in range(int(config.cells * config.generation_ratio) - present):
+            objects.append(self.diamond(config, occupied))
+
+    def bot(self, config: ScenarioConfig, index: int, occupied: Set[Tuple[int, int]]) -> GameObject:
+        base = self.free_cell(config, occupied)
+        total_ms = config.seconds * 1000
+        if config.fresh:
+            position, diamonds, score, ms_left = base, 0, 0, total_ms
+        else:
+            position = self.free_cell(config, occupied)
+            diamonds = self.rng.randint(0, config.inventory_size)
+            score = self.rng.randint(0, 30)
+            ms_left = self.rng.randint(0, total_ms)
+        return GameObject(
+            self._id(),
+            Position(position.y, position.x),
+            "BotGameObject",
+            Properties(
+                name="bot-{}".format(index),
+                diamonds=diamonds,
+                score=score,
+                inventory_size=config.inventory_size,
+                can_tackle=config.can_tackle,
+                milliseconds_left=ms_left,
+                base=Base(base.y, base.x),
+            ),
+        )
+
+    def features(self, config: ScenarioConfig) -> List[Feature]:
+        return [
+            Feature(
+                "DiamondsFeature",
+                Config(
+                    generation_ratio=config.generation_ratio,
+                    min_ratio_for_generation=config.min_ratio_for_generation,
+                    red_ratio=config.red_ratio,
+                ),
+            ),
+            Feature("TeleportFeature", Config(pairs=config.teleport_pairs)),
+            Feature(
+                "BotsFeature",
+                Config(inventory_size=config.inventory_size, can_tackle=config.can_tackle),
+            ),
+        ]
+
+    def generate(self, config: Optional[ScenarioConfig] = None, board_id: int = 1) -> Board:
+        config = config or ScenarioConfig()
+        occupied: Set[Tuple[int, int]] = set()
+        objects: List[GameObject] = [self.bot(config, i, occupied) for i in range(config.bots)]
+        for pair in range(config.teleport_pairs):
+            for _ in range(2):
+                objects.append(
+                    GameObject(
+                        self._id(),
+                        self.free_cell(config, occupied),
+                        "TeleportGameObject",
+                        Properties(pair_id=str(pair)),
+                    )
+                )
+        if config.red_button:
+            objects.append(
+                GameObject(self._id(), self.free_cell(config, occupied), "DiamondButtonGameObject", Properties())
+            )
+        self.fill_diamonds(config, objects, occupied)
+        return Board(
+            id=board_id,
+            width=config.width,
+            height=config.height,
+            features=self.features(config),
+            minimum_delay_between_moves=config.minimum_delay_between_moves,
+            game_objects=objects,
+        )
+
+
+def stream_scenarios(
+    count: Optional[int] = None,
+    seed: int = 0,
+    config: Optional[ScenarioConfig] = None,
+    vary: bool = False,
+) -> Iterator[Board]:
+    """
+    Yield `count` boards (forever when None) one at a time, so arbitrarily
+    many can be fed to benchmarks without keeping them in memory. Board `i`
+    only depends on `(seed, i)`; with `vary` the bot count and diamond
+    density are also drawn per board around `config`.
+    """
+    config = config or ScenarioConfig()
+    i = 0
+    while count is None or i < count:
+        generator = BoardGenerator(seed * 1_000_003 + i)
+        board_config = config
+        if vary:
+            rng = generator.rng
+            board_config = replace(
+                config,
+                bots=rng.randint(1, max(1, config.bots * 2)),
+                generation_ratio=config.generation_ratio * rng.uniform(0.25, 2.0),
+            )
+        yield generator.generate(board_config, board_id=i + 1)
+        i += 1
@@ -0,0 +1,253 @@
+import queue
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from .models import GameObject
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS games (
+    id TEXT PRIMARY KEY,
+    started REAL,
+    bot TEXT,
+    logic TEXT,
+    board_id INTEGER,
+    ticks INTEGER,
+    final_score INTEGER
+);
+CREATE TABLE IF NOT EXISTS ticks (
+    game_id TEXT,
+    tick INTEGER,
+    x INTEGER,
+    y INTEGER,
+    diamonds INTEGER,
+    score INTEGER,
+    ms_left INTEGER,
+    branch TEXT,
+    -- Effects observed on this tick, caused by the move chosen on the
+    -- previous one (`cause_branch`)
+    cause_branch TEXT,
+    gained INTEGER,
+    banked INTEGER,
+    tackled INTEGER,
+    lost_diamonds INTEGER,
+    lost_steps INTEGER
+);
+CREATE INDEX IF NOT EXISTS ticks_game ON ticks (game_id, tick);
+"""
+
+_STOP = object()
+
+
+class MatchHistory:
+    """
+    Local SQLite store of per-tick bot state.
+
+    The game loop only puts plain tuples on a bounded queue; a background
+    thread derives the per-tick deltas and writes them in batches. When the
+    writer falls behind and the queue is full, rows are dropped (and
+    counted) rather than slowing down the game.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        max_pending: int = 50_000,
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.dropped = 0
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_pending)
+        self._last: Dict[str, Tuple] = {}
+        self._thread = threading.Thread(target=self._run, name="match-history", daemon=True)
+        self._thread.start()
+
+    def _put(self, item) -> None:
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def start_game(self, bot: str, logic: str, board_id: Optional[int] = None) -> str:
+        game_id = uuid.uuid4().hex
+        self._put(("game", (game_id, time.time(), bot, logic, board_id)))
+        return game_id
+
+    def record_tick(
+        self, game_id: str, tick: int, bot: GameObject, branch: Optional[str] = None
+    ) -> None:
+        props = bot.properties
+        base = props.base
+        self._put(
+            (
+                "tick",
+                (
+                    game_id,
+                    tick,
+                    bot.position.x,
+                    bot.position.y,
+                    props.diamonds or 0,
+                    props.score or 0,
+                    props.milliseconds_left,
+                    branch,
+                    base.x if base else None,
+                    base.y if base else None,
+                ),
+            )
+        )
+
+    def end_game(self, game_id: str) -> None:
+        self._put(("end", (game_id,)))
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush everything queued so far and stop the writer."""
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        self._thread.join(timeout)
+
+    def _tick_row(self, item: Tuple) -> Tuple:
+        game_id, tick, x, y, diamonds, score, ms_left, branch, base_x, base_y = item
+        previous = self._last.get(game_id)
+        self._last[game_id] = item
+        if previous is None:
+            return (game_id, tick, x, y, diamonds, score, ms_left, branch, None, 0, 0, 0, 0, 0)
+
+        _, _, px, py, p_diamonds, p_score, _, p_branch, _, _ = previous
+        banked = score - p_score
+        # A tackle sends a bot back to its base from further away than one step
+        lost_steps = abs(px - base_x) + abs(py - base_y) if base_x is not None else 0
+        tackled = (x, y) == (base_x, base_y) and lost_steps > 1
+        if tackled:
+            gained, lost_diamonds = 0, p_diamonds
+        else:
+            gained, lost_diamonds, lost_steps = max(0, diamonds + banked - p_diamonds), 0, 0
+        return (
+            game_id, tick, x, y, diamonds, score, ms_left, branch,
+            p_branch, gained, banked, int(tackled), lost_diamonds, lost_steps,
+        )
+
+    def _apply(self, db: sqlite3.Connection, items: List) -> None:
+        ticks = []
+        for kind, item in items:
+            if kind == "tick":
+                ticks.append(self._tick_row(item))
+            elif kind == "game":
+                db.execute(
+                    "INSERT OR REPLACE INTO games (id, started, bot, logic, board_id) VALUES (?, ?, ?, ?, ?)",
+                    item,
+                )
+            elif kind == "end":
+                last = self._last.pop(item[0], None)
+                if last is not None:
+                    db.execute(
+                        "UPDATE games SET ticks = ?, final_score = ? WHERE id = ?",
+                        (last[1], last[5], item[0]),
+                    )
+        if ticks:
+            db.executemany("INSERT INTO ticks VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", ticks)
+        db.commit()
+
+    def _run(self) -> None:
+        db = sqlite3.connect(self.path)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.executescript(SCHEMA)
+        pending: List = []
+        deadline = time.monotonic() + self.flush_interval
+        stopping = False
+        while not stopping:
+            try:
+                item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                if item is _STOP:
+                    stopping = True
+                else:
+                    pending.append(item)
+            except queue.Empty:
+                pass
+            if stopping or len(pending) >= self.batch_size or time.monotonic() >= deadline:
+                if pending:
+                    self._apply(db, pending)
+                    pending = []
+                deadline = time.monotonic() + self.flush_interval
+        db.close()
+
+
+@dataclass
+class BranchStats:
+    branch: str
+    decisions: int
+    diamonds_gained: int
+    points_banked: int
+
+
+@dataclass
+class TackleStats:
+    tackles: int
+    diamonds_lost: int
+    steps_lost: int
+
+
+class HistoryQuery:
+    """Aggregates over a store written by `MatchHistory`."""
+
+    def __init__(self, path: str):
+        self.db = sqlite3.connect(path)
+
+    @staticmethod
+    def _where(game_id: Optional[str]) -> Tuple[str, Tuple]:
+        return ("WHERE game_id = ?", (game_id,)) if game_id else ("", ())
+
+    def games(self) -> List[Tuple]:
+        return self.db.execute(
+            "SELECT id, started, bot, logic, board_id, ticks, final_score FROM games ORDER BY started"
+        ).fetchall()
+
+    def points_per_branch(self, game_id: Optional[str] = None) -> List[BranchStats]:
+        """
+        How often each branch was chosen, and the diamonds picked up and
+        points banked by the moves it chose.
+        """
+        where, params = self._where(game_id)
+        decisions = dict(
+            self.db.execute(
+                "SELECT branch, COUNT(*) FROM ticks {} GROUP BY branch".format(where), params
+            ).fetchall()
+        )
+        effects = {
+            branch: (gained, banked)
+            for branch, gained, banked in self.db.execute(
+                "SELECT cause_branch, SUM(gained), SUM(banked) FROM ticks {} GROUP BY cause_branch".format(where),
+                params,
+            ).fetchall()
+        }
+        branches = [b for b in set(decisions) | set(effects) if b is not None]
+        stats = [
+            BranchStats(b, decisions.get(b, 0), *effects.get(b, (0, 0)))
+            for b in branches
+        ]
+        return sorted(stats, key=lambda s: s.points_banked, reverse=True)
+
+    def tackle_losses(self, game_id: Optional[str] = None) -> TackleStats:
+        """Times we were tackled, diamonds lost and steps lost walking back out of base."""
+        where, params = self._where(game_id)
+        where = "{} {} tackled = 1".format(where, "AND" if where else "WHERE")
+        row = self.db.execute(
+            "SELECT COUNT(*), SUM(lost_diamonds), SUM(lost_steps) FROM ticks {}".format(where), params
+        ).fetchone()
+        return TackleStats(row[0], row[1] or 0, row[2] or 0)
+
+    def score_timeline(self, game_id: str) -> List[Tuple[int, int, int]]:
+        """(tick, score, diamonds carried) per tick of one game."""
+        return self.db.execute(
+            "SELECT tick, score, diamonds FROM ticks WHERE game_id = ? ORDER BY tick", (game_id,)
+        ).fetchall()
+
+    def close(self) -> None:
+        self.db.close()
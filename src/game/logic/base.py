@@ -1,9 +1,60 @@
 from abc import ABC
-from typing import Tuple
+from typing import Hashable, Iterator, Optional, Tuple
 
 from game.models import Board, GameObject
 
 
 class BaseLogic(ABC):
+    # Logics whose `decide` only depends on the board and `decision_state`
+    # can be memoized by `game.logic.cache.CachedLogic`.
+    cacheable = False
+    # Name of the rule that produced the last move, for logics that report it
+    last_branch: Optional[str] = None
+    # Side effects of the last `decide` on the logic's own state, as data
+    # that `replay` repeats (None: there were none)
+    last_effects: Hashable = None
+    # Instance attributes handed over to the new instance when the logic is
+    # hot reloaded or swapped (see `game.reloader`); the rest is rebuilt
+    persistent_state: Tuple[str, ...] = ()
+
     def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
         raise NotImplementedError()
+
+    def next_move_anytime(
+        self, board_bot: GameObject, board: Board, deadline
+    ) -> Iterator[Tuple[int, int]]:
+        """
+        Yield improving moves until `deadline` (a `game.deadline.Deadline`);
+        the runner sends the last one yielded when time is up. Logics that
+        only implement `next_move` answer once.
+        """
+        yield self.next_move(board_bot, board)
+
+    def observe(self, board_bot: GameObject, board: Board) -> None:
+        """Update internal models from a new board (cacheable logics)."""
+
+    def decide(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        """Pick a move after `observe` (cacheable logics)."""
+        raise NotImplementedError()
+
+    def quick_move(
+        self, board_bot: GameObject, board: Board
+    ) -> Optional[Tuple[int, int]]:
+        """
+        A cheap move after `observe`, sent instead of `decide`'s when that
+        misses the deadline (cacheable logics); None when there is none.
+        """
+        return None
+
+    def decision_state(
+        self, board_bot: GameObject, board: Board, radius: Optional[int] = None
+    ) -> Optional[Hashable]:
+        """
+        Internal state and summary of the board that `decide` depends on,
+        besides what `game.logic.cache.canonical_state(radius)` encodes; None
+        when the decision may depend on more than that (not memoized).
+        """
+        return None if radius is not None else ()
+
+    def replay(self, board_bot: GameObject, board: Board, effects: Hashable) -> None:
+        """Apply `effects` (a former `last_effects`) as if `decide` had just run."""
@@ -0,0 +1,172 @@
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Iterator, Optional, Tuple
+
+from game.logic.base import BaseLogic
+from game.models import Board, GameObject, Position
+
+# Few and static: encoded exactly wherever they are, since routes (and the
+# red button rules) depend on them
+LANDMARKS = ("TeleportGameObject", "DiamondButtonGameObject")
+
+
+def canonical_state(
+    board_bot: GameObject, board: Board, radius: Optional[int] = None
+) -> tuple:
+    """
+    Translation invariant encoding of the board around our bot: every game
+    object within `radius` steps (Manhattan) of it, and every landmark, in
+    board order (which decides ties) as its offset from our bot plus its
+    properties; the number of the other objects of each type and worth;
+    and the distance to each wall clipped to `radius`.
+
+    Without a radius every object is encoded. With one, the decision of a
+    logic may only be looked up under this key when `decision_state` shows
+    it does not depend on where the objects left out are.
+    """
+    ox, oy = board_bot.position.x, board_bot.position.y
+    limit = radius if radius is not None else board.width + board.height
+
+    def rel(pos) -> Optional[Tuple[int, int]]:
+        if pos is None:
+            return None
+        return pos.x - ox, pos.y - oy
+
+    objects = []
+    outside: Counter = Counter()
+    for obj in board.game_objects:
+        props = obj.properties
+        pos = obj.position
+        if abs(pos.x - ox) + abs(pos.y - oy) > limit and obj.type not in LANDMARKS:
+            outside[obj.type, props.points if props is not None else None] += 1
+            continue
+        entry = (obj.type, obj.id == board_bot.id, rel(pos))
+        if props is not None:
+            entry += (
+                props.points,
+                props.pair_id,
+                props.diamonds,
+                props.score,
+                props.inventory_size,
+                props.can_tackle,
+                rel(props.base),
+            )
+        objects.append(entry)
+
+    walls = (
+        min(ox, limit),
+        min(oy, limit),
+        min(board.width - 1 - ox, limit),
+        min(board.height - 1 - oy, limit),
+    )
+    return walls, tuple(objects), frozenset(outside.items())
+
+
+@dataclass
+class DecisionCacheStats:
+    hits: int = 0
+    misses: int = 0
+    bypasses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class CachedLogic(BaseLogic):
+    """
+    LRU memoization around a logic's decision.
+
+    Only logics that set `cacheable = True` are memoized; they split
+    `next_move` into `observe` (update internal models from the board,
+    always run) and `decide` (a deterministic function of the board and
+    `decision_state()`). The key is the canonical board encoding within
+    `radius` plus `decision_state()`, so a hit returns exactly what `decide`
+    would have returned; when `decision_state()` is None the decision is
+    not a function of the key and the cache is bypassed. On a hit, the
+    logic's `goal`, `last_branch` and `replay` of `last_effects` stand in
+    for what `decide` would have left behind. Everything else is passed
+    straight through.
+    """
+
+    def __init__(
+        self, logic: BaseLogic, max_size: int = 4096, radius: Optional[int] = None
+    ):
+        self.logic = logic
+        self.max_size = max_size
+        self.radius = radius
+        self.enabled = logic.cacheable and max_size > 0
+        self.stats = DecisionCacheStats()
+        # key -> (move, branch, goal as an offset from our bot, effects) the logic reported
+        self._entries: "OrderedDict[Hashable, Tuple[Tuple[int, int], Optional[str], Optional[Tuple[int, int]], Hashable]]" = OrderedDict()
+
+    def __getattr__(self, name):
+        return getattr(self.logic, name)
+
+    @property
+    def last_branch(self) -> Optional[str]:
+        return self.logic.last_branch
+
+    def next_move(self, board_bot: GameObject, board: Board) -> Tuple[int, int]:
+        if not self.enabled:
+            return self.logic.next_move(board_bot, board)
+        *_, move = self._moves(board_bot, board, quick=False)
+        return move
+
+    def next_move_anytime(
+        self, board_bot: GameObject, board: Board, deadline
+    ) -> Iterator[Tuple[int, int]]:
+        """Hits answer at once; misses yield the logic's `quick_move` before deciding."""
+        if not self.enabled:
+            yield from self.logic.next_move_anytime(board_bot, board, deadline)
+        else:
+            yield from self._moves(board_bot, board, quick=True)
+
+    def _moves(
+        self, board_bot: GameObject, board: Board, quick: bool
+    ) -> Iterator[Tuple[int, int]]:
+        logic = self.logic
+        logic.observe(board_bot, board)
+        extra = logic.decision_state(board_bot, board, self.radius)
+        pos = board_bot.position
+        key = None
+        if extra is None:
+            self.stats.bypasses += 1
+        else:
+            key = (canonical_state(board_bot, board, self.radius), extra)
+            entry = self._entries.get(key)
+            if entry is not None:
+                self.stats.hits += 1
+                self._entries.move_to_end(key)
+                move, logic.last_branch, goal, effects = entry
+                if goal is not None:
+                    logic.goal = Position(pos.y + goal[1], pos.x + goal[0])
+                logic.last_effects = effects
+                if effects is not None:
+                    logic.replay(board_bot, board, effects)
+                yield move
+                return
+            self.stats.misses += 1
+
+        if quick:
+            move = logic.quick_move(board_bot, board)
+            if move is not None:
+                yield move
+        move = logic.decide(board_bot, board)
+        if key is not None:
+            goal = getattr(logic, "goal", None)
+            self._entries[key] = (
+                move,
+                logic.last_branch,
+                (goal.x - pos.x, goal.y - pos.y) if goal is not None else None,
+                logic.last_effects,
+            )
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+        yield move
+
+    def clear(self) -> None:
+        self._entries.clear()
@@ -1,93 +1,106 @@
-from typing import Optional, List, Tuple, Dict
-import random
-from game.logic.base import BaseLogic
+from typing import Iterator, Optional, Tuple, Dict
+from game.logic.greedy import (
+    COMMON_FACTS, base_adjacent, closest_diamonds, direct, escape_threat, inventory_full, last_dash,
+    manhattan, nearest_within, pick_diamond, return_time, safe_when_carrying, to_base,
+)
+from game.logic.params import GachoanParams
+from game.logic.pipeline import Facts, Pipeline, PipelineLogic, Rule
+from game.bitboard import get_bitboards, popcount
+from game.button import ButtonEstimator
+from game.clock import GameClock
+from game.endgame import EndgameSolver
 from game.models import GameObject, Board, Position
-from ..util import get_direction
-
-class GachoanBot(BaseLogic): 
-    def __init__(self):
+from game.opponent import OpponentModel
+from game.plan import PlanCache
+from game.teleport import get_teleporter_graph
+from game.threat import ThreatMap, threat_sources
+from game.util import get_direction
+
+# Fakta turunan yang hanya dihitung jika aturan yang berjalan membutuhkannya
+FACTS = {
+    **COMMON_FACTS,
+    # Diamond di area rawan tackle lebih "mahal" saat kita membawa diamond
+    **closest_diamonds("teleport", penalty=lambda f, pos: f.logic.threat.cost(pos) if f.carried > 0 else 0),
+    "game_status": lambda f: f.logic.get_game_status_info(f.bot, f.board),
+    # Lawan yang cukup kaya untuk di-tackle. Posisi prediksi 1 langkah berjarak <= 1 dari posisi
+    # sekarang, jadi tanpa lawan seperti itu dalam radius 2 (tackle langsung) atau 3 (proaktif)
+    # loop per lawan bisa dilewati
+    "tackle_targets": lambda f: f.bitboards.bots_carrying(f.logic.params.tackle_min_enemy_diamonds, exclude=f.bot.id),
+}
+
+
+class GachoanBot(PipelineLogic): 
+    # Keputusan deterministik dari board + prediksi lawan (lihat decision_state)
+    cacheable = True
+
+    # Horizon prediksi posisi lawan (dalam langkah) untuk disrupsi red button
+    OPPONENT_PREDICTION_HORIZON = 2
+
+    # State yang dibawa ke instance baru saat logic di-reload
+    persistent_state = ("goal", "clock", "time_left", "opponents", "threat", "plans", "button_values")
+
+    def __init__(self, params: Optional[GachoanParams] = None):
         super().__init__()
+        self.params = params or GachoanParams()
         self.goal: Optional[Position] = None
-
-    def distance(self, pos_a: Position, pos_b: Position) -> int:
-        return abs(pos_a.x - pos_b.x) + abs(pos_a.y - pos_b.y)
-
-    def get_teleporters(self, board: Board) -> List[GameObject]:
-        return [obj for obj in board.game_objects if obj.type == "TeleportGameObject"]
+        self.clock = GameClock()
+        self.time_left = 999
+        self.opponents = OpponentModel()
+        self.threat = ThreatMap()
+        # Tujuan diamond dipertahankan antar tick sampai ada kejadian yang membatalkannya
+        self.plans = PlanCache()
+        # Rute eksak untuk langkah-langkah terakhir (anggaran komputasi dibatasi per tick)
+        self.endgame = EndgameSolver()
+        # Nilai reset red button (Monte Carlo), anggaran waktu dibatasi per tick
+        self.button_values = ButtonEstimator()
+        self.pipeline = self.build_pipeline()
+
+    def build_pipeline(self) -> Pipeline:
+        """Aturan berurutan dengan konstanta dari self.params; nama aturan = nama cabang di riwayat."""
+        params = self.params
+        tackle_needs = ("tackle_targets", "bitboards", "game_status", "enemies")
+        return Pipeline(
+            [
+                # 1. Greedy by Escape (lawan bisa mencapai petak kita dalam <= 2 langkah)
+                escape_threat(params.escape_min_diamonds, params.escape_threat_steps),
+                # 1b. Endgame Eksak (menggantikan cabang 2-4 yang berbasis tebakan)
+                Rule("endgame", ("time_left", "diamonds", "teleporters"), self.endgame_goal,
+                     steer=safe_when_carrying, final=True),
+                # 2. V4 Feature: "Mengamankan Poin Kritis", sebelum Greedy by Return standar
+                Rule("secure", ("time_left", "steps_to_base", "game_status", "base_waypoint"), self.secure_goal,
+                     steer=direct, final=True),
+                # 3. Greedy by Return (Waktu Kritis DAN ADA PROFIT)
+                return_time(params.safe_time_buffer_profit_return),
+                # 4. V3 Feature: "Last Dash Diamond Grab"
+                last_dash(params.last_dash_max_time_eval, params.min_buffer_last_dash, params.max_direct_dist_dash_diamond),
+                # 5. Greedy by Tackle (Langsung) - V4 Refined Risk/Reward
+                Rule("tackle", tackle_needs, self.tackle_goal),
+                # 6. Greedy by Inventory Full
+                inventory_full(),
+                # 7. Greedy by Red Button - V4 Smarter Usage
+                Rule("red_button", ("red_button", "bitboards", "teleporter_distance", "game_status"), self.red_button_goal),
+                # 8. Greedy by Tackle (Proaktif/Mendekat) - V4 Refined Risk/Reward
+                Rule("tackle_proactive", tackle_needs, self.tackle_proactive_goal),
+                # 9. Greedy by Diamond Collection: rencana yang masih berlaku, lalu diamond terdekat
+                Rule("plan", (), self.plan_goal),
+                Rule("diamond", ("closest_red", "closest_blue", "teleporters", "teleporter_distance"), self.diamond_goal),
+                # 10. Aksi Default
+                to_base("no_diamond"),
+            ],
+            FACTS,
+            # Saat membawa diamond, pilih sumbu gerak yang lebih aman dari tackle
+            steer=safe_when_carrying,
+            adjustments=[base_adjacent()],
+        )
+
+    def predicted_position(self, enemy_bot: GameObject, steps: int = 1) -> Position:
+        """Posisi lawan `steps` langkah ke depan menurut model lawan (fallback: posisi sekarang)."""
+        predicted = self.opponents.predict(enemy_bot.id, steps)
+        return predicted if predicted is not None else enemy_bot.position
 
     def distance_with_teleporter(self, start: Position, end: Position, board: Board) -> int:
-        teleporters = self.get_teleporters(board)
-        direct_dist = self.distance(start, end)
-
-        if len(teleporters) < 2:
-            return direct_dist
-        
-        tp1 = teleporters[0]
-        tp2 = teleporters[1]
-        dist_via_tp1_entry = self.distance(start, tp1.position) + self.distance(tp2.position, end)
-        dist_via_tp2_entry = self.distance(start, tp2.position) + self.distance(tp1.position, end)
-        min_teleport_dist = min(dist_via_tp1_entry, dist_via_tp2_entry)
-        return min(direct_dist, min_teleport_dist)
-
-    def get_best_teleport_or_target(self, bot_pos: Position, target_dest: Position, board: Board) -> Position:
-        teleporters = self.get_teleporters(board)
-        dist_direct = self.distance(bot_pos, target_dest)
-        best_next_step_target = target_dest
-        min_overall_dist = dist_direct
-
-        if len(teleporters) >= 2:
-            tp1 = teleporters[0]
-            tp2 = teleporters[1]
-            dist_via_tp1_entry = self.distance(bot_pos, tp1.position) + self.distance(tp2.position, target_dest)
-            if dist_via_tp1_entry < min_overall_dist:
-                min_overall_dist = dist_via_tp1_entry
-                best_next_step_target = tp1.position
-            dist_via_tp2_entry = self.distance(bot_pos, tp2.position) + self.distance(tp1.position, target_dest)
-            if dist_via_tp2_entry < min_overall_dist:
-                best_next_step_target = tp2.position
-        return best_next_step_target
-
-    def get_closest_diamond(self, bot: GameObject, board: Board, red_only: bool = False, blue_only: bool = False) -> Optional[GameObject]:
-        diamonds_found: List[GameObject] = []
-        MAX_DIAMOND_CAPACITY = getattr(bot.properties, "diamonds_carried_max", 5)
-        current_diamonds_held = bot.properties.diamonds
-        bot_pos = bot.position
-
-        for d_obj in board.diamonds:
-            diamond_points = d_obj.properties.points
-            target_this_diamond_type = False
-            if red_only:
-                if diamond_points == 2: target_this_diamond_type = True
-            elif blue_only:
-                if diamond_points == 1: target_this_diamond_type = True
-            else:
-                target_this_diamond_type = True
-
-            if target_this_diamond_type:
-                can_hold = False
-                if diamond_points == 2 and (current_diamonds_held + 2 <= MAX_DIAMOND_CAPACITY):
-                    can_hold = True
-                elif diamond_points == 1 and (current_diamonds_held + 1 <= MAX_DIAMOND_CAPACITY):
-                    can_hold = True
-                if can_hold:
-                    diamonds_found.append(d_obj)
-        
-        if not diamonds_found: return None
-        closest_diamond_obj: Optional[GameObject] = None
-        min_effective_dist_to_diamond = float('inf')
-
-        for d_obj in diamonds_found:
-            effective_dist = self.distance_with_teleporter(bot_pos, d_obj.position, board)
-            if effective_dist < min_effective_dist_to_diamond:
-                closest_diamond_obj = d_obj
-                min_effective_dist_to_diamond = effective_dist
-        return closest_diamond_obj
-
-    def get_red_button(self, board: Board) -> Optional[GameObject]:
-        for obj in board.game_objects:
-            if obj.type == "DiamondButtonGameObject":
-                return obj
-        return None
+        # Graf teleporter (semua pasangan berdasarkan pair_id, termasuk teleport berantai) di-cache antar tick
+        return get_teleporter_graph(board).distance(start, end)
 
     def get_game_status_info(self, bot: GameObject, board: Board) -> Dict:
         """
@@ -102,20 +115,25 @@ class GachoanBot(BaseLogic):
         # Cek apakah ada lawan dengan banyak diamond dekat cluster diamond
         opponent_primed_for_big_score = False
         if total_bots > 1:
+            bitboards = get_bitboards(board)
             for obot in board.bots:
                 if obot.id != bot.id:
                     obot_diamonds = getattr(obot.properties, "diamonds", 0)
                     # Jika ada lawan bawa banyak diamond dan dekat dengan >1 diamond lain (indikasi cluster)
                     if obot_diamonds >= 3: # Lawan bawa cukup banyak
-                        close_diamonds_to_opponent = 0
-                        for diamond_on_board in board.diamonds:
-                            if self.distance(obot.position, diamond_on_board.position) <= 3:
-                                close_diamonds_to_opponent +=1
+                        # Gunakan posisi prediksi lawan, bukan posisi saat ini
+                        obot_future_pos = self.predicted_position(obot, self.OPPONENT_PREDICTION_HORIZON)
+                        # Petak berisi diamond dalam radius 3: satu AND + popcount pada bitboard
+                        close_diamonds_to_opponent = bitboards.within(bitboards.diamonds, obot_future_pos, 3)
                         if close_diamonds_to_opponent >= 2: # Lawan dekat dengan setidaknya 2 diamond
                             opponent_primed_for_big_score = True
                             break # Cukup satu kondisi terpenuhi
 
-        if total_bots > 1:
+        analysis = getattr(board, "analysis", None)
+        if analysis is not None:
+            # Ringkasan lawan sudah dihitung sekali oleh TeamEngine untuk seluruh tim
+            highest_opponent_score = analysis.opponent_summary.highest_score
+        elif total_bots > 1:
             for obot in board.bots:
                 if obot.id != bot.id:
                     opponent_score = getattr(obot.properties, "score", 0)
@@ -135,185 +153,244 @@ class GachoanBot(BaseLogic):
             "opponent_primed_for_big_score": opponent_primed_for_big_score,
         }
 
-    def next_move(self, bot: GameObject, board: Board) -> Tuple[int, int]:
-        props = bot.properties
+    def time_horizon(self, board: Board) -> float:
+        """Sisa waktu (langkah) di bawah nilai ini bisa memicu cabang-cabang waktu."""
+        params = self.params
+        return max(
+            params.endgame_moves,
+            (board.width + board.height) * max(1.0, params.secure_points_time_factor) +
+            params.safe_time_buffer_profit_return + params.last_dash_max_time_eval,
+        )
+
+    def observe(self, bot: GameObject, board: Board) -> None:
+        # Sisa waktu (dalam langkah) dari milliseconds_left server, delay, latensi dan drift jam
+        self.clock.observe(bot, board)
+        self.time_left = self.clock.remaining_moves()
+        self.opponents.observe(board, bot)
+        # Peta ancaman dari posisi prediksi lawan yang membawa sedikit diamond
+        sources = threat_sources(board, bot)
+        self.threat.update(board, {
+            enemy_id: self.opponents.predict(enemy_id, 1) or enemy_pos
+            for enemy_id, enemy_pos in sources.items()
+        })
+        # Batalkan rencana lama sebelum memutuskan (target diambil, inventory berubah, ancaman baru, waktu habis)
+        # Rute lewat teleporter: kemajuan diukur dan waypoint diperbarui pada rute yang sama
+        graph = get_teleporter_graph(board)
+        self.plans.validate(
+            bot, board, sources.keys(), graph.distance, self.time_left, graph.next_waypoint,
+        )
+
+    def decision_state(self, bot: GameObject, board: Board, radius: Optional[int] = None) -> Optional[Tuple]:
+        """
+        Selain board, keputusan hanya bergantung pada sisa waktu, posisi
+        prediksi lawan (riwayat gerak), status permainan dan target rencana
+        yang masih berlaku. Peta ancaman diturunkan dari prediksi yang sama.
+        Sisa waktu di atas horizon tidak memicu cabang waktu mana pun, jadi
+        semua nilai tersebut setara. Selama cabang endgame atau estimasi red
+        button bisa berjalan: None.
+
+        Dengan radius, hanya prediksi lawan yang bisa mengubah peta ancaman di
+        dalam radius yang dihitung, dan diamond terdekat (jarak teleporter +
+        penalti ancaman) harus berada dalam radius; jika tidak, None.
+        """
         pos = bot.position
-        base = props.base
-        time_left = getattr(board, "time_left", 999)
-        current_diamonds = props.diamonds
-        MAX_DIAMOND_CAPACITY = getattr(props, "diamonds_carried_max", 5)
-
-        current_turn_goal_pos: Optional[Position] = None
-        game_status = self.get_game_status_info(bot, board)
-
-        # --- STRATEGI PRIORITAS TINGGI ---
-
-        # 1. Greedy by Escape:
-        if current_diamonds >= 3:
-            for enemy_bot in board.bots:
-                if enemy_bot.id != bot.id and self.distance(pos, enemy_bot.position) <= 2:
-                    self.goal = self.get_best_teleport_or_target(pos, base, board)
-                    return get_direction(pos.x, pos.y, self.goal.x, self.goal.y)
-
-        # 2. V4 Feature: "Mengamankan Poin Kritis" (Secure Critical Points)
-        #    Jika unggul tipis, waktu mulai mepet (tapi belum kritis absolut), dan bawa diamond.
-        #    Harus dijalankan sebelum "Time Critical & Profitable Return" standar.
-        secure_points_time_factor = 1.8 # Coba pulang jika sisa waktu < 1.8x perjalanan ke base
-        slim_lead_threshold = MAX_DIAMOND_CAPACITY # Unggul kurang dari satu kali drop penuh
-        effective_steps_to_base = self.distance_with_teleporter(pos, base, board)
-        safe_time_buffer_profit_return = 4 # Buffer untuk pulang profit standar
-
-        # Cek apakah waktu untuk "mengamankan" sudah tiba, tapi belum masuk waktu "kritis profit"
-        is_securing_time_window = (time_left <= effective_steps_to_base * secure_points_time_factor) and \
-                                  (time_left > effective_steps_to_base + safe_time_buffer_profit_return)
-
-        if game_status["am_i_leading"] and \
-           game_status["lead_margin"] < slim_lead_threshold and \
-           current_diamonds >= 1 and \
-           is_securing_time_window:
-            self.goal = self.get_best_teleport_or_target(pos, base, board)
-            # print(f"BOT V4 DEBUG: Securing critical points! Lead: {game_status['lead_margin']}, Time: {time_left}")
-            return get_direction(pos.x, pos.y, self.goal.x, self.goal.y)
-
-        # 3. Greedy by Return (Waktu Kritis DAN ADA PROFIT):
-        if current_diamonds > 0 and (time_left <= effective_steps_to_base + safe_time_buffer_profit_return):
-            self.goal = self.get_best_teleport_or_target(pos, base, board)
-            # print(f"BOT V4 DEBUG: Time critical & profitable return. Diamonds: {current_diamonds}, Time Left: {time_left}")
-            return get_direction(pos.x, pos.y, self.goal.x, self.goal.y)
-
-        # 4. V3 Feature: "Last Dash Diamond Grab"
-        last_dash_max_time_eval = 10 
-        min_buffer_last_dash = 1    
-        max_direct_dist_dash_diamond = 2 
-        if not current_turn_goal_pos and current_diamonds == 0 and (time_left <= last_dash_max_time_eval):
-            # ... (Logika Last Dash dari V3, pastikan sudah benar)
-            best_last_dash_diamond_obj: Optional[GameObject] = None
-            min_total_steps_for_last_dash = float('inf')
-            potential_diamonds_for_dash = [
-                d for d in board.diamonds if self.distance(pos, d.position) <= max_direct_dist_dash_diamond
-            ]
-            for d_obj in potential_diamonds_for_dash:
-                # ... (pengecekan kapasitas dan perhitungan langkah)
-                dist_to_diamond_direct = self.distance(pos, d_obj.position)
-                steps_from_diamond_to_base = self.distance_with_teleporter(d_obj.position, base, board)
-                total_steps_this_dash = dist_to_diamond_direct + steps_from_diamond_to_base 
-                if total_steps_this_dash < min_total_steps_for_last_dash and \
-                   (total_steps_this_dash + min_buffer_last_dash <= time_left):
-                    min_total_steps_for_last_dash = total_steps_this_dash
-                    best_last_dash_diamond_obj = d_obj
-            if best_last_dash_diamond_obj:
-                current_turn_goal_pos = best_last_dash_diamond_obj.position
-
-        # --- PENETAPAN TUJUAN STRATEGIS (Jika tidak ada override/goal dari atas) ---
-
-        # 5. Greedy by Tackle (Langsung) - V4 Refined Risk/Reward
-        if not current_turn_goal_pos:
-            # Kurangi agresivitas jika bawa banyak diamond, kecuali skor sangat tertinggal
-            can_tackle_aggressively = True
-            if current_diamonds >= MAX_DIAMOND_CAPACITY -1 : # Bawa hampir penuh
-                # Hanya tackle jika sangat tertinggal (misal, skor < 50% skor lawan tertinggi)
-                if game_status["my_score"] < game_status["highest_opponent_score"] * 0.5 or game_status["am_i_leading"]:
-                     pass # Boleh tackle jika sangat tertinggal atau sudah unggul (nothing to lose much)
-                else: # Bawa banyak, tidak tertinggal jauh, jangan ambil risiko
-                    can_tackle_aggressively = False
-            
-            if can_tackle_aggressively:
-                for enemy_bot in board.bots:
-                    if enemy_bot.id != bot.id and \
-                       self.distance(pos, enemy_bot.position) == 1 and \
-                       getattr(enemy_bot.properties, "diamonds", 0) >= 2:
-                        if current_diamonds < 2 or getattr(enemy_bot.properties, "diamonds", 0) >= (MAX_DIAMOND_CAPACITY -1) :
-                            current_turn_goal_pos = enemy_bot.position 
-                            break
-        
-        # 6. Greedy by Inventory Full:
-        if not current_turn_goal_pos:
-            if current_diamonds >= MAX_DIAMOND_CAPACITY:
-                current_turn_goal_pos = self.get_best_teleport_or_target(pos, base, board)
-
-        # 7. Greedy by Red Button - V4 Smarter Usage
-        if not current_turn_goal_pos:
-            red_button_obj = self.get_red_button(board)
-            if red_button_obj:
-                press_button_for_scarcity_or_advantage = False
-                # Kondisi dasar dari V3 (diamond langka atau tombol lebih dekat)
-                diamonds_on_board_count = len(board.diamonds)
-                if diamonds_on_board_count == 0 and current_diamonds < MAX_DIAMOND_CAPACITY:
-                     press_button_for_scarcity_or_advantage = True
-                elif diamonds_on_board_count < 4 and current_diamonds < MAX_DIAMOND_CAPACITY -1 :
-                    press_button_for_scarcity_or_advantage = True
-                # ... (bisa tambahkan kondisi V3 lainnya jika relevan)
-
-                press_button_for_disruption = False
-                # Kondisi disrupsi: lawan mau skor besar, kita tidak unggul, dan tombol dekat
-                dist_to_button_eff = self.distance_with_teleporter(pos, red_button_obj.position, board)
-                if game_status["opponent_primed_for_big_score"] and \
-                   (not game_status["am_i_leading"] or game_status["lead_margin"] < MAX_DIAMOND_CAPACITY) and \
-                   dist_to_button_eff <= 4 : # Tombol harus cukup dekat untuk aksi disrupsi cepat
-                    press_button_for_disruption = True
-
-                press_button_when_behind = False
-                # Kondisi reset saat tertinggal: skor rendah, diamond sedikit, tombol dekat
-                if not game_status["am_i_leading"] and game_status["my_score"] < game_status["highest_opponent_score"] * 0.6 and \
-                   diamonds_on_board_count < 6 and \
-                   dist_to_button_eff <= 5:
-                    press_button_when_behind = True
-                
-                if press_button_for_disruption or press_button_when_behind or press_button_for_scarcity_or_advantage:
-                    current_turn_goal_pos = red_button_obj.position
-        
-        # 8. Greedy by Tackle (Proaktif/Mendekat) - V4 Refined Risk/Reward
-        if not current_turn_goal_pos:
-            # Logika agresivitas sama seperti tackle langsung
-            can_tackle_proactively = True
-            if current_diamonds >= MAX_DIAMOND_CAPACITY - 1: # Bawa hampir penuh
-                if game_status["my_score"] < game_status["highest_opponent_score"] * 0.5 or game_status["am_i_leading"]:
-                     pass 
-                else:
-                    can_tackle_proactively = False
-
-            if can_tackle_proactively and current_diamonds < MAX_DIAMOND_CAPACITY - (MAX_DIAMOND_CAPACITY // 2) + 1 : 
-                for enemy_bot in board.bots:
-                    if enemy_bot.id != bot.id and \
-                       self.distance(pos, enemy_bot.position) == 2 and \
-                       getattr(enemy_bot.properties, "diamonds", 0) >= 2:
-                        current_turn_goal_pos = enemy_bot.position
-                        break
-        
-        # 9. Greedy by Diamond Collection:
-        if not current_turn_goal_pos:
-            # ... (Logika dari V3 menggunakan get_closest_diamond yang sudah mempertimbangkan teleporter)
-            red_diamond_obj = self.get_closest_diamond(bot, board, red_only=True)
-            blue_diamond_obj = self.get_closest_diamond(bot, board, blue_only=True)
-            # ... (Pemilihan antara merah dan biru berdasarkan jarak efektif dan kapasitas)
-            target_diamond_pos: Optional[Position] = None
-            if red_diamond_obj and blue_diamond_obj:
-                dist_eff_red = self.distance_with_teleporter(pos, red_diamond_obj.position, board)
-                dist_eff_blue = self.distance_with_teleporter(pos, blue_diamond_obj.position, board)
-                if dist_eff_red <= dist_eff_blue + 2 : 
-                    target_diamond_pos = red_diamond_obj.position
-                else:
-                    target_diamond_pos = blue_diamond_obj.position
-            elif red_diamond_obj:
-                target_diamond_pos = red_diamond_obj.position
-            elif blue_diamond_obj:
-                target_diamond_pos = blue_diamond_obj.position
-            
-            if target_diamond_pos:
-                current_turn_goal_pos = target_diamond_pos
-            else: 
-                if not current_turn_goal_pos:
-                     current_turn_goal_pos = self.get_best_teleport_or_target(pos, base, board)
-
-        # 10. Aksi Default:
-        if not current_turn_goal_pos:
-            current_turn_goal_pos = self.get_best_teleport_or_target(pos, base, board)
-
-        # --- PENYESUAIAN AKHIR & EKSEKUSI ---
-        self.goal = current_turn_goal_pos 
-        if self.goal != base and self.distance(pos, base) == 1 and current_diamonds > 0:
-            self.goal = base
-        if not self.goal: self.goal = base 
-            
-        delta_x, delta_y = get_direction(pos.x, pos.y, self.goal.x, self.goal.y)
-        return delta_x, delta_y
+        params = self.params
+        threat = self.threat
+        # Solver endgame dibatasi waktu (jam dinding): hasilnya bukan fungsi dari kunci cache
+        if self.time_left <= params.endgame_moves:
+            return None
+        # Begitu juga estimasi Monte Carlo red button (sampel digabung antar tick)
+        graph = get_teleporter_graph(board)
+        for obj in board.game_objects:
+            if obj.type == "DiamondButtonGameObject" and \
+               graph.distance(pos, obj.position) <= params.button_estimate_distance:
+                return None
+        if radius is not None:
+            # Ancaman di petak sebelah (arah aman), tackle proaktif (3) dan last dash
+            if radius < max(threat.horizon + 1, 3, params.max_direct_dist_dash_diamond):
+                return None
+            distance = graph.distance
+            carrying = bot.properties.diamonds > 0
+            if not nearest_within(
+                bot, board, radius,
+                lambda p: distance(pos, p) + (threat.cost(p) if carrying else 0),
+            ):
+                return None
+        # Prediksi 2 langkah hanya dipakai status permainan (di bawah)
+        reach = radius + threat.horizon if radius is not None else board.width + board.height
+        predictions = tuple(
+            (p.x - pos.x, p.y - pos.y, (enemy_bot.properties.diamonds or 0) <= 2)
+            for enemy_bot in board.bots if enemy_bot.id != bot.id
+            for p in (self.predicted_position(enemy_bot),)
+            if manhattan(pos, p) <= reach
+        )
+        game_status = tuple(sorted(self.get_game_status_info(bot, board).items()))
+        plan = self.plans.plan
+        plan_target = (plan.target.x - pos.x, plan.target.y - pos.y) if plan is not None else None
+        time_left = self.time_left if self.time_left <= self.time_horizon(board) else None
+        return time_left, predictions, game_status, plan_target
+
+    def replay(self, bot: GameObject, board: Board, effects: Tuple) -> None:
+        """Keputusan dari cache: ulangi efek aturan rencana (lihat last_effects)."""
+        if effects[0] == "reuse":
+            self.plans.reuse()
+            return
+        pos = bot.position
+        target = Position(pos.y + effects[2], pos.x + effects[1])
+        graph = get_teleporter_graph(board)
+        for diamond in board.diamonds:
+            if diamond.position.x == target.x and diamond.position.y == target.y:
+                self.plans.adopt(
+                    diamond, bot, self.threat.sources.keys(),
+                    graph.distance(pos, target), graph.next_waypoint(pos, target),
+                )
+                return
+
+    def quick_move(self, bot: GameObject, board: Board) -> Optional[Tuple[int, int]]:
+        """Setelah observe: langkah ke waypoint rencana yang masih berlaku, tanpa menjalankan aturan."""
+        plan = self.plans.plan
+        if plan is None:
+            return None
+        pos, waypoint = bot.position, plan.waypoint
+        if bot.properties.diamonds > 0:
+            move = self.threat.safer_direction(pos, waypoint)
+        else:
+            move = get_direction(pos.x, pos.y, waypoint.x, waypoint.y)
+        if move == (0, 0):
+            return None
+        self.last_branch = "plan"
+        return move
+
+    def next_move_anytime(self, bot: GameObject, board: Board, deadline) -> Iterator[Tuple[int, int]]:
+        # Jawaban cepat dulu (lanjutkan rencana), lalu keputusan lengkap dari semua aturan
+        self.observe(bot, board)
+        move = self.quick_move(bot, board)
+        if move is not None:
+            yield move
+        yield self.decide(bot, board)
+
+
+    # --- ATURAN (dipanggil oleh pipeline; None = serahkan ke aturan berikutnya) ---
+
+    def endgame_goal(self, f: Facts) -> Optional[Position]:
+        """Sisa langkah sedikit: rute diamond -> base terbaik dihitung dengan DP."""
+        params = self.params
+        if f.time_left > params.endgame_moves:
+            return None
+        solution = self.endgame.solve(
+            f.pos, f.base, f.carried, f.capacity,
+            f.time_left - params.endgame_margin,
+            [(d.position, d.properties.points) for d in f.diamonds],
+            f.teleporters.distance,
+        )
+        if solution is None or solution.value <= 0:
+            return None
+        return f.teleporters.next_waypoint(f.pos, solution.target)
+
+    def secure_goal(self, f: Facts) -> Optional[Position]:
+        """Unggul tipis, waktu mulai mepet (tapi belum kritis absolut), dan bawa diamond: pulang."""
+        params = self.params
+        if f.carried < 1:
+            return None
+        # Coba pulang jika sisa waktu < faktor x perjalanan ke base, tapi belum masuk waktu "kritis profit"
+        steps = f.steps_to_base
+        if not (steps + params.safe_time_buffer_profit_return < f.time_left <= steps * params.secure_points_time_factor):
+            return None
+        game_status = f.game_status
+        # Unggul kurang dari satu kali drop penuh
+        if game_status["am_i_leading"] and game_status["lead_margin"] < f.capacity:
+            return f.base_waypoint
+        return None
+
+    def may_tackle(self, f: Facts) -> bool:
+        """Kurangi agresivitas jika bawa hampir penuh, kecuali sangat tertinggal atau sudah unggul."""
+        if f.carried < f.capacity - 1:
+            return True
+        game_status = f.game_status
+        return game_status["my_score"] < game_status["highest_opponent_score"] * self.params.tackle_behind_score_ratio or \
+            game_status["am_i_leading"]
+
+    def tackle_goal(self, f: Facts) -> Optional[Position]:
+        params = self.params
+        if not f.tackle_targets & f.bitboards.ball(f.pos, 2) or not self.may_tackle(f):
+            return None
+        for enemy_bot in f.enemies:
+            # Tackle ke petak yang akan ditempati lawan; jika lawan menuju petak kita, serang posisinya sekarang
+            enemy_next_pos = self.predicted_position(enemy_bot)
+            if enemy_next_pos == f.pos:
+                enemy_next_pos = enemy_bot.position
+            enemy_diamonds = enemy_bot.properties.diamonds or 0
+            if manhattan(f.pos, enemy_next_pos) == 1 and enemy_diamonds >= params.tackle_min_enemy_diamonds and \
+               (f.carried < params.tackle_max_own_diamonds or enemy_diamonds >= f.capacity - 1):
+                return enemy_next_pos
+        return None
+
+    def red_button_goal(self, f: Facts) -> Optional[Position]:
+        button = f.red_button
+        if button is None:
+            return None
+        params = self.params
+        # Kondisi dasar dari V3 (diamond langka atau tombol lebih dekat)
+        diamonds_on_board_count = popcount(f.bitboards.diamonds)
+        if (diamonds_on_board_count == 0 and f.carried < f.capacity) or \
+           (diamonds_on_board_count < params.button_scarcity_diamonds and f.carried < f.capacity - 1):
+            return button.position
+
+        game_status = f.game_status
+        dist_to_button_eff = f.teleporter_distance(f.pos, button.position)
+        # Kondisi disrupsi: lawan mau skor besar, kita tidak unggul, dan tombol cukup dekat untuk aksi cepat
+        if game_status["opponent_primed_for_big_score"] and \
+           (not game_status["am_i_leading"] or game_status["lead_margin"] < f.capacity) and \
+           dist_to_button_eff <= params.button_disruption_distance:
+            return button.position
+
+        # Kondisi reset saat tertinggal: skor rendah, diamond sedikit, tombol dekat
+        if not game_status["am_i_leading"] and \
+           game_status["my_score"] < game_status["highest_opponent_score"] * params.button_behind_score_ratio and \
+           diamonds_on_board_count < params.button_behind_max_diamonds and \
+           dist_to_button_eff <= params.button_behind_distance:
+            return button.position
+
+        # Kondisi estimasi (paling mahal, jadi terakhir): rata-rata layout diamond setelah reset
+        # lebih menguntungkan kita dibanding lawan
+        if dist_to_button_eff <= params.button_estimate_distance:
+            # Horizon dibatasi time_horizon agar sisa waktu di atasnya tetap setara (cache keputusan)
+            estimate = self.button_values.estimate(
+                f.board, f.bot, button, dist_to_button_eff,
+                min(self.time_left, int(self.time_horizon(f.board))),
+            )
+            if estimate.samples > 0 and estimate.gain >= params.button_min_gain:
+                return button.position
+        return None
+
+    def tackle_proactive_goal(self, f: Facts) -> Optional[Position]:
+        params = self.params
+        if f.carried >= f.capacity - (f.capacity // 2) + 1 or \
+           not f.tackle_targets & f.bitboards.ball(f.pos, 3) or not self.may_tackle(f):
+            return None
+        for enemy_bot in f.enemies:
+            enemy_next_pos = self.predicted_position(enemy_bot)
+            if manhattan(f.pos, enemy_next_pos) == 2 and \
+               (enemy_bot.properties.diamonds or 0) >= params.tackle_min_enemy_diamonds:
+                return enemy_next_pos
+        return None
+
+    def plan_goal(self, f: Facts) -> Optional[Position]:
+        # Rencana dari tick sebelumnya masih valid: tidak perlu mencari ulang (dan tidak berganti-ganti target)
+        if self.plans.plan is None:
+            return None
+        self.last_effects = ("reuse",)
+        return self.plans.reuse()
+
+    def diamond_goal(self, f: Facts) -> Optional[Position]:
+        target_diamond_obj = pick_diamond(f, "teleport", self.params.red_preference_margin)
+        if target_diamond_obj is None:
+            return None
+        target = target_diamond_obj.position
+        # Jalan ke teleporter pertama di rute terpendek (atau langsung ke diamond)
+        plan = self.plans.adopt(
+            target_diamond_obj, f.bot, self.threat.sources.keys(),
+            f.teleporter_distance(f.pos, target), f.teleporters.next_waypoint(f.pos, target),
+        )
+        self.last_effects = ("adopt", target.x - f.pos.x, target.y - f.pos.y)
+        return plan.waypoint
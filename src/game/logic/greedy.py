@@ -0,0 +1,300 @@
+from math import inf
+from typing import Callable, Dict, List, Optional, Tuple
+
+from game.bitboard import get_bitboards
+from game.logic.pipeline import Facts, Move, Provider, Rule
+from game.models import Board, GameObject, Position
+from game.rules import inventory_size
+from game.teleport import TeleporterGraph, get_teleporter_graph
+from game.util import get_direction
+
+# Facts and rules shared by the greedy strategies (GachoanBot, GACHOANLEVEL8,
+# WawanMKS); each strategy is a `Pipeline` of these with its own constants.
+
+
+def manhattan(a: Position, b: Position) -> int:
+    return abs(a.x - b.x) + abs(a.y - b.y)
+
+
+# How a rule measures distances, by name: the distance function of a tick,
+# looked up once per rule or fact, and the facts that lookup reads
+DISTANCES: Dict[str, Tuple[Callable[[Facts], Callable[[Position, Position], int]], Tuple[str, ...]]] = {
+    "manhattan": (lambda f: manhattan, ()),
+    # Shortest path through any chain of teleporters
+    "teleport": (lambda f: f.teleporter_distance, ("teleporter_distance",)),
+}
+
+
+def _red_button(f: Facts) -> Optional[GameObject]:
+    for obj in f.board.game_objects:
+        if obj.type == "DiamondButtonGameObject":
+            return obj
+    return None
+
+
+def _enemies(f: Facts) -> List[GameObject]:
+    analysis = getattr(f.board, "analysis", None)
+    # Views of `game.team.BoardAnalysis` hide our teammates: its opponents are the rest
+    if analysis is not None:
+        return analysis.opponents
+    return [b for b in f.board.bots if b.id != f.bot.id]
+
+
+def _teleporters(f: Facts) -> TeleporterGraph:
+    graph = get_teleporter_graph(f.board)
+    # Built once per board: every distance to our base is a lookup from then on
+    graph.field_for(f.base)
+    return graph
+
+
+def _teleporter_distance(f: Facts) -> Callable[[Position, Position], int]:
+    graph = f.teleporters
+    # Rules measuring from where we stand query it once per diamond
+    graph.field_from(f.pos)
+    return graph.distance
+
+
+COMMON_FACTS: Dict[str, Provider] = {
+    "time_left": lambda f: f.logic.time_left,
+    "teleporters": _teleporters,
+    # `teleporters.distance`, O(1) for every query from our position or to our base
+    "teleporter_distance": _teleporter_distance,
+    "bitboards": lambda f: get_bitboards(f.board),
+    "diamonds": lambda f: f.board.diamonds,
+    "enemies": _enemies,
+    "red_button": _red_button,
+    "steps_to_base": lambda f: f.teleporters.distance(f.pos, f.base),
+    # Teleporter to enter, or the base itself
+    "base_waypoint": lambda f: f.teleporters.next_waypoint(f.pos, f.base),
+}
+
+
+def closest_diamond(
+    points: Optional[int] = None,
+    distance: str = "teleport",
+    penalty: Optional[Callable[[Facts, Position], int]] = None,
+) -> Provider:
+    """
+    Provider of the closest diamond worth `points` (any when None) that
+    still fits in the inventory; the first one found wins ties. `penalty`
+    is added to the distance of each diamond.
+    """
+    lookup = DISTANCES[distance][0]
+
+    def provider(f: Facts) -> Optional[GameObject]:
+        measure = lookup(f)
+        room = f.capacity - f.carried
+        pos = f.pos
+        best, best_distance = None, inf
+        for diamond in f.diamonds:
+            value = diamond.properties.points
+            if value not in (1, 2) or value > room or (points is not None and value != points):
+                continue
+            d = measure(pos, diamond.position)
+            if penalty is not None:
+                d += penalty(f, diamond.position)
+            if d < best_distance:
+                best, best_distance = diamond, d
+        return best
+
+    return provider
+
+
+def closest_diamonds(distance: str = "teleport", penalty=None) -> Dict[str, Provider]:
+    """`closest_red`, `closest_blue` and `closest_any` facts."""
+    return {
+        "closest_red": closest_diamond(2, distance, penalty),
+        "closest_blue": closest_diamond(1, distance, penalty),
+        "closest_any": closest_diamond(None, distance, penalty),
+    }
+
+
+def nearest_within(
+    bot: GameObject, board: Board, radius: int, measure: Callable[[Position], int]
+) -> bool:
+    """
+    Whether, for both worths with a diamond that fits in the inventory, the
+    closest such diamond by `measure` lies within `radius` steps (Manhattan)
+    of our bot and is closer than every one beyond: the `closest_*` facts
+    then only depend on the diamonds within `radius`.
+    """
+    room = inventory_size(bot) - bot.properties.diamonds
+    pos = bot.position
+    inside = {1: inf, 2: inf}
+    outside = {1: inf, 2: inf}
+    for diamond in board.diamonds:
+        value = diamond.properties.points
+        if value not in (1, 2) or value > room:
+            continue
+        d = measure(diamond.position)
+        near = inside if manhattan(pos, diamond.position) <= radius else outside
+        if d < near[value]:
+            near[value] = d
+    return all(inside[value] < outside[value] for value in (1, 2) if outside[value] < inf)
+
+
+def direct(f: Facts, goal: Position) -> Move:
+    return get_direction(f.pos.x, f.pos.y, goal.x, goal.y)
+
+
+def safe(f: Facts, goal: Position) -> Move:
+    """Of the moves towards `goal`, the one further from tacklers (`logic.threat`)."""
+    return f.logic.threat.safer_direction(f.pos, goal)
+
+
+def safe_when_carrying(f: Facts, goal: Position) -> Move:
+    return safe(f, goal) if f.carried > 0 else direct(f, goal)
+
+
+def pick_diamond(f: Facts, distance: str, red_margin: int) -> Optional[GameObject]:
+    """Closest red diamond, unless the closest blue one is more than `red_margin` steps closer."""
+    red, blue = f.closest_red, f.closest_blue
+    if red is not None and blue is not None:
+        measure = DISTANCES[distance][0](f)
+        return red if measure(f.pos, red.position) <= measure(f.pos, blue.position) + red_margin else blue
+    return red or blue
+
+
+def escape_threat(min_diamonds: int, threat_steps: int) -> Rule:
+    """Run home while carrying `min_diamonds` and a tackler (`logic.threat`) is close."""
+
+    def fire(f: Facts) -> Optional[Position]:
+        if f.carried >= min_diamonds and f.logic.threat.steps_to(f.pos) <= threat_steps:
+            return f.base_waypoint
+        return None
+
+    return Rule("escape", ("base_waypoint",), fire, steer=safe, final=True)
+
+
+def escape_nearby(min_diamonds: int, reach: int) -> Rule:
+    """Run home while carrying `min_diamonds` and any bot is within `reach` steps."""
+
+    def fire(f: Facts) -> Optional[Position]:
+        if f.carried >= min_diamonds and any(manhattan(f.pos, b.position) <= reach for b in f.enemies):
+            return f.base_waypoint
+        return None
+
+    return Rule("escape", ("enemies", "base_waypoint"), fire, steer=direct, final=True)
+
+
+def return_time(buffer: int) -> Rule:
+    """Bank what we carry when the time left barely covers the way home."""
+
+    def fire(f: Facts) -> Optional[Position]:
+        if f.carried > 0 and f.time_left <= f.steps_to_base + buffer:
+            return f.base_waypoint
+        return None
+
+    return Rule("return_time", ("time_left", "steps_to_base", "base_waypoint"), fire, steer=direct, final=True)
+
+
+def last_dash(max_time: int, buffer: int, max_distance: int) -> Rule:
+    """With empty pockets and little time, grab one diamond close by that still leaves time to bank it."""
+
+    def fire(f: Facts) -> Optional[Position]:
+        time_left = f.time_left
+        if f.carried != 0 or time_left > max_time:
+            return None
+        distance = f.teleporters.distance
+        best, best_steps = None, inf
+        for diamond in f.diamonds:
+            to_diamond = manhattan(f.pos, diamond.position)
+            if to_diamond > max_distance or diamond.properties.points not in (1, 2) or \
+               diamond.properties.points > f.capacity:
+                continue
+            steps = to_diamond + distance(diamond.position, f.base)
+            if steps < best_steps and steps + buffer <= time_left:
+                best, best_steps = diamond, steps
+        return best.position if best is not None else None
+
+    return Rule("last_dash", ("time_left", "diamonds", "teleporters"), fire)
+
+
+def tackle(min_enemy_diamonds: int = 2, max_own_diamonds: int = 2) -> Rule:
+    """
+    Step onto an adjacent bot carrying `min_enemy_diamonds`, if we carry
+    less than `max_own_diamonds` or it is (almost) full.
+    """
+
+    def fire(f: Facts) -> Optional[Position]:
+        for enemy in f.enemies:
+            diamonds = enemy.properties.diamonds or 0
+            if manhattan(f.pos, enemy.position) == 1 and diamonds >= min_enemy_diamonds and \
+               (f.carried < max_own_diamonds or diamonds >= f.capacity - 1):
+                return enemy.position
+        return None
+
+    return Rule("tackle", ("enemies",), fire)
+
+
+def tackle_proactive(min_enemy_diamonds: int = 2) -> Rule:
+    """Close in on a bot two steps away carrying `min_enemy_diamonds`, unless we carry much ourselves."""
+
+    def fire(f: Facts) -> Optional[Position]:
+        if f.carried >= f.capacity - f.capacity // 2 + 1:
+            return None
+        for enemy in f.enemies:
+            if manhattan(f.pos, enemy.position) == 2 and (enemy.properties.diamonds or 0) >= min_enemy_diamonds:
+                return enemy.position
+        return None
+
+    return Rule("tackle_proactive", ("enemies",), fire)
+
+
+def inventory_full() -> Rule:
+    return Rule("inventory_full", ("base_waypoint",), lambda f: f.base_waypoint if f.carried >= f.capacity else None)
+
+
+def red_button(distance: str, few: int = 4, some: int = 8, margin: int = 2, far: int = 7) -> Rule:
+    """
+    Press the red button when there are no diamonds, fewer than `few`, or
+    fewer than `some` while we carry little and the closest diamond is far
+    away (`far`) or further than the button by more than `margin`.
+    """
+    lookup, needs = DISTANCES[distance]
+
+    def fire(f: Facts) -> Optional[Position]:
+        button = f.red_button
+        if button is None:
+            return None
+        count = len(f.diamonds)
+        if (count == 0 and f.carried < f.capacity) or (count < few and f.carried < f.capacity - 1):
+            return button.position
+        if count < some and f.carried < f.capacity // 2:
+            closest = f.closest_any
+            if closest is None:
+                return button.position
+            measure = lookup(f)
+            to_diamond = measure(f.pos, closest.position)
+            if measure(f.pos, button.position) < to_diamond - margin or to_diamond > far:
+                return button.position
+        return None
+
+    return Rule("red_button", ("red_button", "diamonds", "closest_any") + needs, fire)
+
+
+def diamond(distance: str, red_margin: int) -> Rule:
+    """Go for `pick_diamond`."""
+    needs = DISTANCES[distance][1]
+
+    def fire(f: Facts) -> Optional[Position]:
+        target = pick_diamond(f, distance, red_margin)
+        return target.position if target is not None else None
+
+    return Rule("diamond", ("closest_red", "closest_blue") + needs, fire)
+
+
+def to_base(name: str) -> Rule:
+    """Head home; always fires, so it ends a pipeline."""
+    return Rule(name, ("base_waypoint",), lambda f: f.base_waypoint)
+
+
+def base_adjacent() -> Rule:
+    """Adjustment: next to our base while carrying diamonds, drop them off first."""
+
+    def fire(f: Facts) -> Optional[Position]:
+        if f.goal != f.base and f.carried > 0 and manhattan(f.pos, f.base) == 1:
+            return f.base
+        return None
+
+    return Rule("base_adjacent", (), fire)
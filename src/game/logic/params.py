@@ -0,0 +1,65 @@
+from dataclasses import asdict, dataclass, field, fields
+from typing import Dict, Tuple
+
+
+def _param(default, low, high):
+    """Tunable parameter with its search range for `tune.py`."""
+    return field(default=default, metadata={"range": (low, high)})
+
+
+@dataclass
+class GachoanParams:
+    """
+    Konstanta strategi GachoanBot. Nilai default = perilaku asli bot;
+    `metadata["range"]` adalah ruang pencarian untuk auto-tuner.
+    """
+
+    # Greedy by Escape
+    escape_min_diamonds: int = _param(3, 1, 5)
+    escape_threat_steps: int = _param(2, 1, 4)
+
+    # Secure Critical Points / Greedy by Return
+    secure_points_time_factor: float = _param(1.8, 1.0, 3.0)
+    safe_time_buffer_profit_return: int = _param(4, 0, 10)
+
+    # Last Dash Diamond Grab
+    last_dash_max_time_eval: int = _param(10, 2, 20)
+    min_buffer_last_dash: int = _param(1, 0, 4)
+    max_direct_dist_dash_diamond: int = _param(2, 1, 5)
+
+    # Endgame eksak: aktif jika sisa langkah <= endgame_moves (0 = nonaktif)
+    endgame_moves: int = _param(25, 0, 40)
+    endgame_margin: int = _param(1, 0, 4)
+
+    # Greedy by Tackle (langsung & proaktif)
+    tackle_min_enemy_diamonds: int = _param(2, 1, 5)
+    tackle_max_own_diamonds: int = _param(2, 1, 5)
+    tackle_behind_score_ratio: float = _param(0.5, 0.0, 1.0)
+
+    # Greedy by Red Button
+    button_scarcity_diamonds: int = _param(4, 1, 10)
+    button_disruption_distance: int = _param(4, 1, 10)
+    button_behind_distance: int = _param(5, 1, 10)
+    button_behind_score_ratio: float = _param(0.6, 0.0, 1.0)
+    button_behind_max_diamonds: int = _param(6, 1, 12)
+    # Estimasi Monte Carlo nilai reset: dicoba jika tombol <= jarak ini (0 = nonaktif)
+    button_estimate_distance: int = _param(4, 0, 15)
+    button_min_gain: float = _param(1.0, 0.0, 4.0)
+
+    # Greedy by Diamond Collection: bias jarak untuk diamond merah vs biru
+    red_preference_margin: int = _param(2, 0, 6)
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "GachoanParams":
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    @classmethod
+    def search_space(cls) -> Dict[str, Tuple[type, float, float]]:
+        return {
+            f.name: (f.type, *f.metadata["range"])
+            for f in fields(cls)
+        }
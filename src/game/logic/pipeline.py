@@ -0,0 +1,207 @@
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+from game.logic.base import BaseLogic
+from game.models import Board, GameObject, Position
+from game.rules import inventory_size
+
+Move = Tuple[int, int]
+# Computes one derived fact from the others (and the givens of `Facts`)
+Provider = Callable[["Facts"], Any]
+Steer = Callable[["Facts", Position], Move]
+
+# Plain attributes of every `Facts`, readable by all rules without declaring them
+GIVENS: FrozenSet[str] = frozenset(
+    ("logic", "bot", "board", "pos", "base", "carried", "capacity", "goal")
+)
+
+
+@dataclass
+class RuleStats:
+    # Ticks the rule was asked for a goal
+    evaluated: int = 0
+    # Ticks its goal was used (for adjustments: ticks it replaced the goal)
+    fired: int = 0
+    # Time spent in the rule, including the facts it was first to need
+    seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.fired / self.evaluated if self.evaluated else 0.0
+
+
+@dataclass
+class FactStats:
+    computed: int = 0
+    seconds: float = 0.0
+
+
+class Facts:
+    """
+    What one decision knows about the board. Besides the givens (`bot`,
+    `board`, `pos`, `base`, `carried`, `capacity`, the deciding `logic`
+    and, for adjustments, the chosen `goal`), every attribute is a derived
+    fact computed by its provider on first access and kept for the rest of
+    the tick, so a fact no rule reaches before the move is chosen is never
+    computed. Each `Pipeline` has its own subclass, with one `_Fact` per
+    provider.
+    """
+
+    def __init__(self, logic: BaseLogic, bot: GameObject, board: Board):
+        self._values: Dict[str, Any] = {}
+        # Facts the running rule declared (strict pipelines only)
+        self._allowed: Optional[FrozenSet[str]] = None
+        # Providers may read any fact
+        self._depth = 0
+        self.logic = logic
+        self.bot = bot
+        self.board = board
+        self.pos = bot.position
+        self.base = bot.properties.base
+        self.carried = bot.properties.diamonds
+        self.capacity = inventory_size(bot)
+        self.goal: Optional[Position] = None
+
+
+class _Fact:
+    """
+    Computes a fact on its first read in a tick. Outside strict pipelines the
+    value then lands in the instance dict, which takes precedence over this
+    (non-data) descriptor, so later reads are plain attribute lookups.
+    """
+
+    def __init__(self, name: str, provider: Provider, stats: FactStats, strict: bool):
+        self.name = name
+        self.provider = provider
+        self.stats = stats
+        self.strict = strict
+
+    def __get__(self, facts: Optional[Facts], owner=None) -> Any:
+        if facts is None:
+            return self
+        name = self.name
+        if facts._allowed is not None and not facts._depth and name not in facts._allowed:
+            raise LookupError("rule reads fact {!r} without declaring it".format(name))
+        values = facts._values
+        if name in values:
+            return values[name]
+        started = perf_counter()
+        facts._depth += 1
+        try:
+            value = values[name] = self.provider(facts)
+        finally:
+            facts._depth -= 1
+        self.stats.computed += 1
+        self.stats.seconds += perf_counter() - started
+        if not self.strict:
+            facts.__dict__[name] = value
+        return value
+
+
+@dataclass
+class Rule:
+    name: str
+    # Facts the rule reads: checked against the pipeline's providers when it
+    # is built, and against what the rule actually reads by strict pipelines
+    needs: Tuple[str, ...]
+    # Goal of this tick, or None to leave the decision to the next rule
+    fire: Callable[[Facts], Optional[Position]]
+    # How to step towards the goal (default: the pipeline's)
+    steer: Optional[Steer] = None
+    # The goal is used as is, without the pipeline's adjustments
+    final: bool = False
+
+
+class Pipeline:
+    """
+    An ordered list of rules: the first one to return a goal decides the
+    move. Adjustments then run on that goal (unless the rule is `final`)
+    and may replace it. Rules and adjustments only pay for the facts they
+    read, and each of them counts how often it was evaluated and fired
+    and the time it took (`stats`), next to the cost of each fact
+    (`fact_stats`).
+
+    The last rule must always return a goal.
+    """
+
+    def __init__(
+        self,
+        rules: Sequence[Rule],
+        facts: Dict[str, Provider],
+        steer: Steer,
+        adjustments: Sequence[Rule] = (),
+        strict: bool = False,
+    ):
+        self.rules: List[Rule] = list(rules)
+        self.adjustments: List[Rule] = list(adjustments)
+        self.facts = facts
+        self.steer = steer
+        self.strict = strict
+        for rule in self.rules + self.adjustments:
+            unknown = set(rule.needs) - facts.keys() - GIVENS
+            if unknown:
+                raise ValueError("rule {!r} needs unknown facts {}".format(rule.name, sorted(unknown)))
+        self._allowed = {rule.name: frozenset(rule.needs) | GIVENS for rule in self.rules + self.adjustments}
+        self.stats: Dict[str, RuleStats] = {rule.name: RuleStats() for rule in self.rules + self.adjustments}
+        self.fact_stats: Dict[str, FactStats] = {name: FactStats() for name in facts}
+        self._facts_type = type(
+            "Facts", (Facts,),
+            {name: _Fact(name, provider, self.fact_stats[name], strict) for name, provider in facts.items()},
+        )
+        self._rules = [(rule, self.stats[rule.name]) for rule in self.rules]
+        self._adjustments = [(rule, self.stats[rule.name]) for rule in self.adjustments]
+
+    def _fire(self, rule: Rule, stats: RuleStats, facts: Facts) -> Optional[Position]:
+        if self.strict:
+            facts._allowed = self._allowed[rule.name]
+        started = perf_counter()
+        goal = rule.fire(facts)
+        stats.seconds += perf_counter() - started
+        stats.evaluated += 1
+        if goal is not None:
+            stats.fired += 1
+        return goal
+
+    def run(self, logic: BaseLogic, bot: GameObject, board: Board) -> Tuple[Position, Move, str]:
+        """(goal, move, name of the rule that chose the goal) for this tick."""
+        facts = self._facts_type(logic, bot, board)
+        fire = self._fire
+        for rule, stats in self._rules:
+            goal = fire(rule, stats, facts)
+            if goal is None:
+                continue
+            branch = rule.name
+            if not rule.final:
+                facts.goal = goal
+                for adjustment, adjustment_stats in self._adjustments:
+                    adjusted = fire(adjustment, adjustment_stats, facts)
+                    if adjusted is not None:
+                        facts.goal = goal = adjusted
+                        branch = adjustment.name
+            steer = rule.steer or self.steer
+            facts._allowed = None
+            return goal, steer(facts, goal), branch
+        raise LookupError("no rule chose a goal (the last rule must always fire)")
+
+    def summary(self) -> List[Tuple[str, RuleStats]]:
+        """Rules and adjustments that were evaluated, in pipeline order."""
+        return [(name, stats) for name, stats in self.stats.items() if stats.evaluated]
+
+
+class PipelineLogic(BaseLogic):
+    """
+    Logic whose `decide` runs `self.pipeline`, built per instance by the
+    subclass (usually from its parameters) in `__init__`.
+    """
+
+    pipeline: Pipeline
+
+    def next_move(self, bot: GameObject, board: Board) -> Move:
+        self.observe(bot, board)
+        return self.decide(bot, board)
+
+    def decide(self, bot: GameObject, board: Board) -> Move:
+        self.last_effects = None
+        self.goal, move, self.last_branch = self.pipeline.run(self, bot, board)
+        return move
@@ -1,6 +1,7 @@
 from dataclasses import dataclass
 from typing import List, Optional, Union
-from colorama import Fore, Style
+
+from .moves import get_move_table
 
 
 @dataclass
@@ -85,32 +86,6 @@ class Board:
     def is_valid_move(
         self, current_position: Position, delta_x: int, delta_y: int
     ) -> bool:
-        if not (-1 <= delta_x <= 1) or not (-1 <= delta_y <= 1):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Delta values must be between -1 and 1 inclusive",
-            )
-            return False
-
-        if delta_x == delta_y:
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Delta_x and delta_y cannot be equal",
-            )
-            return False
-
-        if not (0 <= current_position.x + delta_x < self.width):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "X-coordinate out of bounds",
-            )
-            return False
-
-        if not (0 <= current_position.y + delta_y < self.height):
-            print(
-                Fore.RED + Style.BRIGHT + "Invalid move:" + Style.RESET_ALL,
-                "Y-coordinate out of bounds",
-            )
-            return False
-
-        return True
+        return get_move_table(self.width, self.height).is_legal(
+            current_position.x, current_position.y, delta_x, delta_y
+        )
@@ -0,0 +1,95 @@
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+Move = Tuple[int, int]
+
+DIRECTIONS: Tuple[Move, ...] = ((1, 0), (0, 1), (-1, 0), (0, -1))
+DIRECTION_NAMES: Dict[Move, str] = {
+    (1, 0): "EAST",
+    (0, 1): "SOUTH",
+    (-1, 0): "WEST",
+    (0, -1): "NORTH",
+}
+_BITS: Dict[Move, int] = {d: 1 << i for i, d in enumerate(DIRECTIONS)}
+
+
+def _sign(value: int) -> int:
+    return (value > 0) - (value < 0)
+
+
+def _preference(sx: int, sy: int) -> List[Move]:
+    """Directions ordered by how close they come to the intended (sx, sy)."""
+    return sorted(DIRECTIONS, key=lambda d: -(d[0] * sx + d[1] * sy))
+
+
+# _FALLBACK[mask][intent]: best legal direction for a cell whose legal
+# directions are the bits of `mask`, given the intended signs (sx, sy)
+# encoded as (sx + 1) * 3 + (sy + 1). None when nothing is legal, and for
+# the intent (0, 0): every direction is as far from staying put.
+_FALLBACK: List[List[Optional[Move]]] = [
+    [
+        next(
+            (d for d in _preference(sx, sy) if mask & _BITS[d]),
+            None,
+        )
+        if sx or sy
+        else None
+        for sx in (-1, 0, 1)
+        for sy in (-1, 0, 1)
+    ]
+    for mask in range(1 << len(DIRECTIONS))
+]
+_LEGAL: List[Tuple[Move, ...]] = [
+    tuple(d for i, d in enumerate(DIRECTIONS) if mask & (1 << i))
+    for mask in range(1 << len(DIRECTIONS))
+]
+
+
+@dataclass
+class MoveTable:
+    """
+    Legal directions of every cell of a `width` x `height` board, as one
+    bit mask per cell in a flat list (bit i set when `DIRECTIONS[i]` stays
+    on the board).
+    """
+
+    width: int
+    height: int
+
+    def __post_init__(self):
+        self.masks: List[int] = []
+        for y in range(self.height):
+            for x in range(self.width):
+                mask = 0
+                for i, (dx, dy) in enumerate(DIRECTIONS):
+                    if 0 <= x + dx < self.width and 0 <= y + dy < self.height:
+                        mask |= 1 << i
+                self.masks.append(mask)
+
+    def _mask(self, x: int, y: int) -> int:
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return 0
+        return self.masks[y * self.width + x]
+
+    def is_legal(self, x: int, y: int, dx: int, dy: int) -> bool:
+        return bool(self._mask(x, y) & _BITS.get((dx, dy), 0))
+
+    def legal_moves(self, x: int, y: int) -> Tuple[Move, ...]:
+        return _LEGAL[self._mask(x, y)]
+
+    def fallback(self, x: int, y: int, dx: int, dy: int) -> Optional[Move]:
+        """
+        (dx, dy) itself when legal, otherwise the legal direction closest to
+        it. None when no move is possible at all, or when (dx, dy) is (0, 0)
+        (the bot means to stay where it is).
+        """
+        mask = self._mask(x, y)
+        if mask & _BITS.get((dx, dy), 0):
+            return dx, dy
+        return _FALLBACK[mask][(_sign(dx) + 1) * 3 + _sign(dy) + 1]
+
+
+@lru_cache(maxsize=16)
+def get_move_table(width: int, height: int) -> MoveTable:
+    return MoveTable(width, height)
@@ -0,0 +1,144 @@
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .models import Board, GameObject, Position
+from .util import get_direction, position_equals
+
+
+def _distance(a: Position, b: Position) -> int:
+    return abs(a.x - b.x) + abs(a.y - b.y)
+
+
+@dataclass
+class OpponentTrack:
+    bot_id: int
+    history: Deque[Position]
+    diamonds: int = 0
+    inventory_size: int = 5
+    base: Optional[Position] = None
+    last_seen_tick: int = 0
+
+    @property
+    def position(self) -> Position:
+        return self.history[-1]
+
+
+@dataclass
+class OpponentModel:
+    """
+    Tracks opponents across ticks (by bot id) and predicts where they will be.
+
+    Call `observe` once per tick before any query; goal estimates and
+    predictions are cached until the next `observe`.
+    """
+
+    history_size: int = 6
+    tracks: Dict[int, OpponentTrack] = field(default_factory=dict)
+    tick: int = 0
+    _goals: Dict[int, Optional[Position]] = field(default_factory=dict)
+    _predictions: Dict[Tuple[int, int], Position] = field(default_factory=dict)
+    _board: Optional[Board] = None
+
+    def observe(self, board: Board, me: GameObject) -> None:
+        self.tick += 1
+        self._board = board
+        self._goals.clear()
+        self._predictions.clear()
+
+        for bot in board.bots:
+            if bot.id == me.id:
+                continue
+            track = self.tracks.get(bot.id)
+            if track is None:
+                track = OpponentTrack(bot.id, deque(maxlen=self.history_size))
+                self.tracks[bot.id] = track
+            if not track.history or not position_equals(track.position, bot.position):
+                track.history.append(Position(bot.position.y, bot.position.x))
+            props = bot.properties
+            track.diamonds = (props.diamonds or 0) if props else 0
+            track.inventory_size = (props.inventory_size or 5) if props else 5
+            track.base = props.base if props else None
+            track.last_seen_tick = self.tick
+
+        # Bots that left the board (or were never re-seen) are forgotten
+        for bot_id in [i for i, t in self.tracks.items() if t.last_seen_tick != self.tick]:
+            del self.tracks[bot_id]
+
+    def opponents(self) -> List[OpponentTrack]:
+        return list(self.tracks.values())
+
+    def _candidate_goals(self, track: OpponentTrack) -> List[Position]:
+        board = self._board
+        candidates: List[Position] = []
+        if track.base and track.diamonds > 0:
+            candidates.append(track.base)
+        if track.diamonds < track.inventory_size:
+            candidates.extend(d.position for d in board.diamonds)
+        candidates.extend(
+            o.position
+            for o in board.game_objects
+            if o.type == "DiamondButtonGameObject"
+        )
+        return candidates
+
+    def estimate_goal(self, bot_id: int) -> Optional[Position]:
+        """
+        Guess the opponent's current target among the base, the diamonds and
+        the red button. The candidate the opponent made the most progress
+        towards over its recorded history wins; ties (and bots without any
+        history yet) fall back to the nearest candidate.
+        """
+        if bot_id in self._goals:
+            return self._goals[bot_id]
+
+        track = self.tracks.get(bot_id)
+        goal: Optional[Position] = None
+        if track is not None:
+            if track.base and track.diamonds >= track.inventory_size:
+                goal = track.base
+            else:
+                oldest = track.history[0]
+                current = track.position
+                best_key = None
+                for candidate in self._candidate_goals(track):
+                    progress = _distance(oldest, candidate) - _distance(current, candidate)
+                    key = (-progress, _distance(current, candidate))
+                    if best_key is None or key < best_key:
+                        best_key = key
+                        goal = candidate
+
+        self._goals[bot_id] = goal
+        return goal
+
+    def predict(self, bot_id: int, steps: int) -> Optional[Position]:
+        """
+        Position of the opponent `steps` moves from now, assuming it walks
+        straight to its estimated goal the same way our bots do.
+        """
+        track = self.tracks.get(bot_id)
+        if track is None:
+            return None
+        if steps <= 0:
+            return track.position
+
+        key = (bot_id, steps)
+        if key in self._predictions:
+            return self._predictions[key]
+
+        previous = self.predict(bot_id, steps - 1)
+        goal = self.estimate_goal(bot_id)
+        if goal is None or position_equals(previous, goal):
+            predicted = previous
+        else:
+            dx, dy = get_direction(previous.x, previous.y, goal.x, goal.y)
+            predicted = Position(previous.y + dy, previous.x + dx)
+
+        self._predictions[key] = predicted
+        return predicted
+
+    def closest_approach(self, pos: Position, bot_id: int, steps: int) -> int:
+        """Smallest distance between `pos` and the opponent within `steps` moves."""
+        return min(
+            _distance(pos, self.predict(bot_id, k)) for k in range(steps + 1)
+        )
@@ -0,0 +1,127 @@
+from dataclasses import dataclass, field
+from typing import Callable, Dict, FrozenSet, Iterable, Optional
+
+from .models import Board, GameObject, Position
+
+
+@dataclass
+class Plan:
+    target: Position
+    # Where to walk now to follow the route: the next teleporter to step on,
+    # or the target itself
+    waypoint: Position
+    target_id: Optional[int]
+    diamonds: int
+    threats: FrozenSet[int]
+    distance: int
+    created: int
+
+
+@dataclass
+class PlanCache:
+    """
+    Keeps the current goal across ticks until something invalidates it, so
+    the bot does not flip between two similarly distant targets and does
+    not search the whole board again every tick.
+
+    A plan is dropped when the target is reached or taken, our inventory
+    changes, a new threatening opponent appears, there is no longer time
+    to reach it and get back to base, we stop getting closer, or it is
+    older than `max_age` ticks.
+
+    Progress is measured with the same `distance` the route is planned
+    with, so a bot steering to `plan.waypoint` (which `reuse` returns)
+    gets one step closer every tick it moves.
+    """
+
+    max_age: int = 30
+    plan: Optional[Plan] = None
+    tick: int = 0
+    replans: int = 0
+    reuses: int = 0
+    invalidations: Dict[str, int] = field(default_factory=dict)
+
+    def invalidate(self, reason: str) -> None:
+        if self.plan is not None:
+            self.invalidations[reason] = self.invalidations.get(reason, 0) + 1
+            self.plan = None
+
+    def validate(
+        self,
+        bot: GameObject,
+        board: Board,
+        threats: Iterable[int],
+        distance: Callable[[Position, Position], int],
+        time_left: int,
+        waypoint: Optional[Callable[[Position, Position], Position]] = None,
+    ) -> Optional[Plan]:
+        """
+        Called once per tick, before deciding. Returns the plan if it still
+        holds, with its waypoint moved on (by `waypoint(pos, target)`; the
+        target itself without it).
+        """
+        self.tick += 1
+        plan = self.plan
+        if plan is None:
+            return None
+
+        pos = bot.position
+        if pos.x == plan.target.x and pos.y == plan.target.y:
+            self.invalidate("reached")
+        elif plan.target_id is not None and not any(
+            o.id == plan.target_id
+            and o.position.x == plan.target.x
+            and o.position.y == plan.target.y
+            for o in board.game_objects
+        ):
+            self.invalidate("taken")
+        elif bot.properties.diamonds != plan.diamonds:
+            self.invalidate("inventory")
+        elif not plan.threats.issuperset(threats):
+            self.invalidate("threat")
+        elif self.tick - plan.created > self.max_age:
+            self.invalidate("expired")
+        else:
+            remaining = distance(pos, plan.target)
+            if remaining >= plan.distance:
+                self.invalidate("stalled")
+            elif remaining + distance(plan.target, bot.properties.base) > time_left:
+                self.invalidate("time")
+            else:
+                plan.distance = remaining
+                plan.waypoint = waypoint(pos, plan.target) if waypoint is not None else plan.target
+        return self.plan
+
+    def adopt(
+        self,
+        target: GameObject,
+        bot: GameObject,
+        threats: Iterable[int],
+        distance: int,
+        waypoint: Optional[Position] = None,
+    ) -> Plan:
+        """Plan to reach `target`, `distance` steps away along a route through `waypoint`."""
+        self.replans += 1
+        position = Position(target.position.y, target.position.x)
+        self.plan = Plan(
+            target=position,
+            waypoint=waypoint if waypoint is not None else position,
+            target_id=target.id,
+            diamonds=bot.properties.diamonds,
+            threats=frozenset(threats),
+            distance=distance,
+            created=self.tick,
+        )
+        return self.plan
+
+    def reuse(self) -> Position:
+        """Where to head this tick: the waypoint of the plan."""
+        self.reuses += 1
+        return self.plan.waypoint
+
+    def reset(self) -> None:
+        self.plan = None
+        self.tick = 0
+        self.replans = 0
+        self.reuses = 0
+        self.invalidations = {}
@@ -0,0 +1,147 @@
+import importlib
+import os
+import sys
+from dataclasses import dataclass
+from time import monotonic, perf_counter
+from typing import Dict, List, Optional, Type
+
+from .controllers import get_controller
+from .logic.base import BaseLogic
+
+LOGIC_PACKAGE = "game.logic"
+LOGIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logic")
+# Framework modules: reloading them would create a second BaseLogic class
+# and break every isinstance check against the first one
+FIXED_MODULES = {"game.logic.base", "game.logic.cache"}
+
+
+@dataclass
+class Swap:
+    old: str
+    new: str
+    # Reload + construction + state handover
+    seconds: float
+    # Persistent attributes handed over to the new instance
+    kept: List[str]
+
+
+def transfer_state(old: BaseLogic, new: BaseLogic) -> List[str]:
+    """
+    Move the persistent state both logics declare from `old` to `new`. The
+    objects are shared, not copied: `old` must not be running anymore (see
+    `DeadlineRunner.busy`).
+    """
+    kept = []
+    for name in old.persistent_state:
+        if name in new.persistent_state and name in vars(old):
+            setattr(new, name, getattr(old, name))
+            kept.append(name)
+    return kept
+
+
+def _logic_modules() -> Dict[str, float]:
+    """Loaded strategy modules and the mtime of their source."""
+    modules = {}
+    for name, module in list(sys.modules.items()):
+        path = getattr(module, "__file__", None)
+        if name.startswith(LOGIC_PACKAGE + ".") and name not in FIXED_MODULES and path:
+            try:
+                modules[name] = os.stat(path).st_mtime
+            except OSError:
+                pass
+    return modules
+
+
+def _reload_order(names: List[str]) -> List[str]:
+    """Modules whose objects others imported (e.g. params) come first."""
+
+    def imports(name: str) -> set:
+        return {
+            getattr(value, "__module__", None)
+            for value in vars(sys.modules[name]).values()
+        } & set(names) - {name}
+
+    deps = {name: imports(name) for name in names}
+    ordered: List[str] = []
+    while len(ordered) < len(names):
+        ready = [n for n in names if n not in ordered and deps[n] <= set(ordered)]
+        # Import cycle: reload the rest in any order
+        ordered += ready or [n for n in names if n not in ordered]
+    return ordered
+
+
+class LogicReloader:
+    """
+    Swaps the logic controller between ticks without leaving the board.
+
+    `poll()` is called by the game loop before every move. At most every
+    `interval` seconds it checks the mtimes of the loaded `game/logic`
+    modules and, if `control_file` is given, the controller name written in
+    it. When a module changed, every strategy module is reloaded (so
+    `from ... import` bindings between them are refreshed), the controller
+    is resolved again and a new instance receives the old one's
+    `persistent_state`. A module that fails to import leaves the running
+    logic in place until the next change.
+    """
+
+    def __init__(self, name: str, logic: BaseLogic, control_file: Optional[str] = None, interval: float = 1.0):
+        self.name = name
+        self.logic = logic
+        self.control_file = control_file
+        self.interval = interval
+        self.swaps: List[Swap] = []
+        self.errors = 0
+        self._mtimes = _logic_modules()
+        self._control = self._read_control()
+        self._checked_at = monotonic()
+
+    def _read_control(self) -> Optional[str]:
+        if not self.control_file:
+            return None
+        try:
+            with open(self.control_file) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def _resolve(self, name: str) -> Optional[Type[BaseLogic]]:
+        logic_class = get_controller(name)
+        if logic_class is None:
+            return None
+        # The registry keeps the classes of the first import
+        module = sys.modules.get(logic_class.__module__)
+        return getattr(module, logic_class.__name__, logic_class)
+
+    def poll(self) -> Optional[BaseLogic]:
+        """The new logic instance if it was swapped, None otherwise."""
+        if monotonic() - self._checked_at < self.interval:
+            return None
+        self._checked_at = monotonic()
+
+        mtimes = _logic_modules()
+        changed = [name for name, mtime in mtimes.items() if self._mtimes.get(name) != mtime]
+        control = self._read_control()
+        target = control if control and control != self._control else self.name
+        self._mtimes, self._control = mtimes, control
+        if not changed and target == self.name:
+            return None
+
+        start = perf_counter()
+        try:
+            if changed:
+                importlib.invalidate_caches()
+                for name in _reload_order(list(mtimes)):
+                    importlib.reload(sys.modules[name])
+            logic_class = self._resolve(target)
+            if logic_class is None:
+                raise ImportError("unknown logic {}".format(target))
+            logic = logic_class()
+        except Exception as e:
+            self.errors += 1
+            print("Reload failed, keeping {}: {}: {}".format(self.name, type(e).__name__, e))
+            return None
+        kept = transfer_state(self.logic, logic)
+        swap = Swap(self.name, target, perf_counter() - start, kept)
+        self.swaps.append(swap)
+        self.name, self.logic = target, logic
+        return logic
@@ -0,0 +1,206 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from .models import Board, GameObject
+from .moves import get_move_table
+from .teleport import get_teleporters, pair_teleporters
+
+RED_POINTS = 2
+BLUE_POINTS = 1
+DEFAULT_INVENTORY_SIZE = 5
+
+
+def inventory_size(bot: GameObject) -> int:
+    """How many diamond points `bot` can carry (the server's `inventory_size`)."""
+    props = bot.properties
+    return (props.inventory_size if props else None) or DEFAULT_INVENTORY_SIZE
+
+
+class BotState(NamedTuple):
+    id: int
+    position: int
+    base: int
+    diamonds: int
+    score: int
+
+
+# Diamonds are stored per cell as (object id, points)
+Diamond = Tuple[int, int]
+
+
+@dataclass
+class Rules:
+    """
+    Everything about a game that does not change from one tick to the next.
+    Cells are flat indices `y * width + x`.
+    """
+
+    width: int
+    height: int
+    inventory_size: int = DEFAULT_INVENTORY_SIZE
+    can_tackle: bool = True
+    # Teleporter cell -> cell of its partner
+    teleports: Dict[int, int] = field(default_factory=dict)
+
+    def index(self, x: int, y: int) -> int:
+        return y * self.width + x
+
+    def xy(self, cell: int) -> Tuple[int, int]:
+        return cell % self.width, cell // self.width
+
+    @staticmethod
+    def from_board(board: Board) -> "Rules":
+        bots = board.bots
+        props = bots[0].properties if bots else None
+        rules = Rules(
+            board.width,
+            board.height,
+            (props.inventory_size if props else None) or DEFAULT_INVENTORY_SIZE,
+            props.can_tackle if props and props.can_tackle is not None else True,
+        )
+        teleporters = get_teleporters(board)
+        for a, b in pair_teleporters(teleporters):
+            cell_a = rules.index(teleporters[a].position.x, teleporters[a].position.y)
+            cell_b = rules.index(teleporters[b].position.x, teleporters[b].position.y)
+            rules.teleports[cell_a] = cell_b
+            rules.teleports[cell_b] = cell_a
+        return rules
+
+
+class GameState:
+    """
+    Compact, dacite-free game state for simulation and lookahead.
+
+    `clone` is O(1): the clone shares the bots tuple and the diamond dict
+    with its parent and only copies the dict the first time it is about to
+    change it, so stepping a state never affects the one it came from.
+    """
+
+    __slots__ = ("rules", "bots", "diamonds", "button", "button_pressed", "_owns_diamonds")
+
+    def __init__(
+        self,
+        rules: Rules,
+        bots: Tuple[BotState, ...],
+        diamonds: Dict[int, Diamond],
+        button: Optional[int] = None,
+        button_pressed: bool = False,
+        owns_diamonds: bool = True,
+    ):
+        self.rules = rules
+        self.bots = bots
+        self.diamonds = diamonds
+        self.button = button
+        # Set when a move pressed the button. The diamonds are already gone;
+        # regenerating them and moving the button is left to the caller.
+        self.button_pressed = button_pressed
+        self._owns_diamonds = owns_diamonds
+
+    def clone(self) -> "GameState":
+        self._owns_diamonds = False
+        return GameState(self.rules, self.bots, self.diamonds, self.button, False, False)
+
+    def writable_diamonds(self) -> Dict[int, Diamond]:
+        if not self._owns_diamonds:
+            self.diamonds = dict(self.diamonds)
+            self._owns_diamonds = True
+        return self.diamonds
+
+    def bot_index(self, bot_id: int) -> Optional[int]:
+        for i, bot in enumerate(self.bots):
+            if bot.id == bot_id:
+                return i
+        return None
+
+    @staticmethod
+    def from_board(board: Board, rules: Optional[Rules] = None) -> "GameState":
+        rules = rules or Rules.from_board(board)
+        bots = []
+        diamonds: Dict[int, Diamond] = {}
+        button = None
+        for o in board.game_objects:
+            cell = rules.index(o.position.x, o.position.y)
+            if o.type == "BotGameObject":
+                props = o.properties
+                base = props.base or o.position
+                bots.append(
+                    BotState(
+                        o.id,
+                        cell,
+                        rules.index(base.x, base.y),
+                        props.diamonds or 0,
+                        props.score or 0,
+                    )
+                )
+            elif o.type == "DiamondGameObject":
+                diamonds[cell] = (o.id, o.properties.points or BLUE_POINTS)
+            elif o.type == "DiamondButtonGameObject":
+                button = cell
+        return GameState(rules, tuple(bots), diamonds, button)
+
+
+def legal_moves(state: GameState, bot_index: int) -> Tuple[Tuple[int, int], ...]:
+    rules = state.rules
+    x, y = rules.xy(state.bots[bot_index].position)
+    moves = get_move_table(rules.width, rules.height).legal_moves(x, y)
+    if rules.can_tackle:
+        return moves
+    occupied = {b.position for i, b in enumerate(state.bots) if i != bot_index}
+    return tuple(
+        (dx, dy) for dx, dy in moves if rules.index(x + dx, y + dy) not in occupied
+    )
+
+
+def apply(state: GameState, bot_index: int, move: Tuple[int, int]) -> GameState:
+    """
+    State after bot `bot_index` makes `move`. Illegal moves return `state`
+    itself. The input state is never modified.
+    """
+    rules = state.rules
+    bot = state.bots[bot_index]
+    x, y = rules.xy(bot.position)
+    dx, dy = move
+    if not get_move_table(rules.width, rules.height).is_legal(x, y, dx, dy):
+        return state
+    cell = rules.index(x + dx, y + dy)
+
+    bots: List[BotState] = list(state.bots)
+    diamonds = bot.diamonds
+    for i, other in enumerate(bots):
+        if i != bot_index and other.position == cell:
+            if not rules.can_tackle:
+                return state
+            # Tackle: the victim is sent home and loses its diamonds to us
+            diamonds = min(rules.inventory_size, diamonds + other.diamonds)
+            bots[i] = other._replace(position=other.base, diamonds=0)
+            break
+
+    cell = rules.teleports.get(cell, cell)
+    new = state.clone()
+    diamond = state.diamonds.get(cell)
+    if diamond is not None and diamonds + diamond[1] <= rules.inventory_size:
+        diamonds += diamond[1]
+        del new.writable_diamonds()[cell]
+    if cell == state.button:
+        new.diamonds = {}
+        new._owns_diamonds = True
+        new.button_pressed = True
+
+    score = bot.score
+    if cell == bot.base:
+        score += diamonds
+        diamonds = 0
+    bots[bot_index] = BotState(bot.id, cell, bot.base, diamonds, score)
+    new.bots = tuple(bots)
+    return new
+
+
+def score(state: GameState, bot_index: int, carried_weight: float = 0.0) -> float:
+    """Banked score of a bot, plus `carried_weight` per diamond point it carries."""
+    bot = state.bots[bot_index]
+    return bot.score + carried_weight * bot.diamonds
+
+
+def scores(state: GameState) -> Dict[int, int]:
+    return {bot.id: bot.score for bot in state.bots}
+
@@ -0,0 +1,175 @@
+from dataclasses import replace
+from typing import Dict, List, Optional, Set, Tuple
+
+from . import rules
+from .clock import GameClock
+from .generator import BoardGenerator, ScenarioConfig
+from .logic.base import BaseLogic
+from .models import Base, Board, GameObject, Position, Properties
+from .rules import GameState, Rules
+
+
+class Simulator:
+    """
+    Local, single-process approximation of the game server: the rules live in
+    `game.rules` and this class adds the random parts (where diamonds and the
+    red button respawn) and the logics. Every bot moves once per tick, in a
+    shuffled order (board order with `shuffle=False`), and sees a fresh snapshot of the board taken at the start
+    of the tick. Logics' `GameClock`s run on game time (`time`), which
+    stands still during a tick, so they read exactly the time the board
+    reports however fast the machine is.
+    """
+
+    def __init__(
+        self,
+        players: List[Tuple[str, BaseLogic]],
+        config: Optional[ScenarioConfig] = None,
+        seed: Optional[int] = None,
+        shuffle: bool = True,
+    ):
+        self.config = replace(config or ScenarioConfig(), bots=len(players), fresh=True)
+        # Bots move in a random order every tick, or always in board order
+        self.shuffle = shuffle
+        self.generator = BoardGenerator(seed)
+        self.rng = self.generator.rng
+        self.tick = 0
+
+        board = self.generator.generate(self.config)
+        self.features = board.features
+        self.rules = Rules.from_board(board)
+        self.state = GameState.from_board(board, self.rules)
+        self.teleporters = [o for o in board.game_objects if o.type == "TeleportGameObject"]
+        self.button_id = next(
+            (o.id for o in board.game_objects if o.type == "DiamondButtonGameObject"), None
+        )
+        self.logics: Dict[int, BaseLogic] = {}
+        self.names: Dict[int, str] = {}
+        for bot, (name, logic) in zip(board.bots, players):
+            self.logics[bot.id] = logic
+            self.names[bot.id] = name
+            clock = getattr(logic, "clock", None)
+            if isinstance(clock, GameClock):
+                clock.time_source = self.time
+
+    @property
+    def total_ticks(self) -> int:
+        return self.config.seconds * 1000 // self.config.minimum_delay_between_moves
+
+    def time(self) -> float:
+        """Seconds of game time since the start."""
+        return self.tick * self.config.minimum_delay_between_moves / 1000
+
+    @property
+    def milliseconds_left(self) -> int:
+        return (self.total_ticks - self.tick) * self.config.minimum_delay_between_moves
+
+    def _occupied(self) -> Set[Tuple[int, int]]:
+        cells = set(self.state.diamonds)
+        cells.update(self.rules.teleports)
+        for bot in self.state.bots:
+            cells.add(bot.position)
+            cells.add(bot.base)
+        if self.state.button is not None:
+            cells.add(self.state.button)
+        return {self.rules.xy(cell) for cell in cells}
+
+    def _generate_diamonds(self) -> None:
+        occupied = self._occupied()
+        diamonds = self.state.writable_diamonds()
+        for _ in range(int(self.config.cells * self.config.generation_ratio) - len(diamonds)):
+            d = self.generator.diamond(self.config, occupied)
+            diamonds[self.rules.index(d.position.x, d.position.y)] = (d.id, d.properties.points)
+
+    def snapshot(self) -> Board:
+        state, cfg = self.state, self.config
+        ms_left = self.milliseconds_left
+        objects: List[GameObject] = []
+        for bot in state.bots:
+            x, y = self.rules.xy(bot.position)
+            base_x, base_y = self.rules.xy(bot.base)
+            objects.append(
+                GameObject(
+                    bot.id,
+                    Position(y, x),
+                    "BotGameObject",
+                    Properties(
+                        name=self.names[bot.id],
+                        diamonds=bot.diamonds,
+                        score=bot.score,
+                        inventory_size=self.rules.inventory_size,
+                        can_tackle=self.rules.can_tackle,
+                        milliseconds_left=ms_left,
+                        base=Base(base_y, base_x),
+                    ),
+                )
+            )
+        for t in self.teleporters:
+            objects.append(
+                GameObject(
+                    t.id,
+                    Position(t.position.y, t.position.x),
+                    t.type,
+                    Properties(pair_id=t.properties.pair_id),
+                )
+            )
+        if state.button is not None:
+            x, y = self.rules.xy(state.button)
+            objects.append(GameObject(self.button_id, Position(y, x), "DiamondButtonGameObject", Properties()))
+        for cell, (diamond_id, points) in state.diamonds.items():
+            x, y = self.rules.xy(cell)
+            objects.append(GameObject(diamond_id, Position(y, x), "DiamondGameObject", Properties(points=points)))
+        return Board(
+            id=1,
+            width=cfg.width,
+            height=cfg.height,
+            features=self.features,
+            minimum_delay_between_moves=cfg.minimum_delay_between_moves,
+            game_objects=objects,
+        )
+
+    def apply_move(self, bot_index: int, delta_x: int, delta_y: int) -> bool:
+        state = rules.apply(self.state, bot_index, (delta_x, delta_y))
+        if state is self.state:
+            return False
+        self.state = state
+
+        if state.button_pressed:
+            state.button_pressed = False
+            position = self.generator.free_cell(self.config, self._occupied())
+            state.button = self.rules.index(position.x, position.y)
+            self._generate_diamonds()
+        elif len(state.diamonds) < self.config.cells * self.config.min_ratio_for_generation:
+            self._generate_diamonds()
+        return True
+
+    def step(self) -> bool:
+        """Play one tick. Returns False once the game is over."""
+        if self.tick >= self.total_ticks:
+            return False
+
+        board = self.snapshot()
+        order = list(self.logics.keys())
+        if self.shuffle:
+            self.rng.shuffle(order)
+        for bot_id in order:
+            board_bot = board_bot_for(board, bot_id)
+            delta_x, delta_y = self.logics[bot_id].next_move(board_bot, board)
+            self.apply_move(self.state.bot_index(bot_id), delta_x, delta_y)
+
+        self.tick += 1
+        return self.tick < self.total_ticks
+
+    def run(self) -> Dict[str, int]:
+        while self.step():
+            pass
+        return self.scores()
+
+    def scores(self) -> Dict[str, int]:
+        return {self.names[bot_id]: score for bot_id, score in rules.scores(self.state).items()}
+
+
+def board_bot_for(board: Board, bot_id: int) -> Optional[GameObject]:
+    for b in board.bots:
+        if b.id == bot_id:
+            return b
+    return None
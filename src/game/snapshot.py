@@ -0,0 +1,150 @@
+import json
+import struct
+from dataclasses import asdict
+from typing import Dict, List, Optional, Tuple
+
+from .models import Base, Board, Config, Feature, GameObject, Position, Properties
+
+# Compact binary board layout, written into shared memory once per tick and
+# read by worker processes without pickling:
+#
+#   header   magic, seq, board id, width, height, move delay, object count,
+#            string block size
+#   objects  one fixed size record per game object
+#   strings  UTF-8, NUL separated; index 0 is the features as JSON
+#
+# Strings (types, names, pair ids, ...) are stored as indices into the
+# string block, absent values as the NONE_* sentinels.
+MAGIC = 0x44494D31
+HEADER = struct.Struct("<IIiiiiII")
+OBJECT = struct.Struct("<ihhhBihiihibihhh")
+NONE_INT = -(2 ** 31)
+NONE_SHORT = -(2 ** 15)
+NO_STRING = -1
+NO_PROPERTIES = (NONE_INT, NO_STRING, NONE_INT, NONE_INT, NO_STRING, NONE_INT, -1, NONE_INT, NO_STRING, NONE_SHORT, NONE_SHORT)
+
+
+def _int(value: Optional[int]) -> int:
+    return NONE_INT if value is None else value
+
+
+def _from_int(value: int) -> Optional[int]:
+    return None if value == NONE_INT else value
+
+
+def packed_size(board: Board) -> int:
+    """Bytes `pack_board` writes for `board`."""
+    return pack_board(None, 0, 0, board)
+
+
+def pack_board(buf, offset: int, seq: int, board: Board) -> int:
+    """
+    Write `board` at `offset` of `buf`, returns the number of bytes. With
+    `buf` None only the size is computed. `seq` is written last, so a reader
+    that sees the expected seq before and after decoding got a whole board.
+    """
+    strings: Dict[str, int] = {}
+
+    def string(value: Optional[str]) -> int:
+        if value is None:
+            return NO_STRING
+        index = strings.get(value)
+        if index is None:
+            index = strings[value] = len(strings)
+        return index
+
+    string(json.dumps([asdict(f) for f in board.features or []]))
+    records = []
+    for obj in board.game_objects or []:
+        props = obj.properties
+        if props is None:
+            records.append((obj.id, string(obj.type), obj.position.x, obj.position.y, 0) + NO_PROPERTIES)
+            continue
+        base = props.base
+        records.append(
+            (
+                obj.id,
+                string(obj.type),
+                obj.position.x,
+                obj.position.y,
+                1,
+                _int(props.points),
+                string(props.pair_id),
+                _int(props.diamonds),
+                _int(props.score),
+                string(props.name),
+                _int(props.inventory_size),
+                -1 if props.can_tackle is None else int(props.can_tackle),
+                _int(props.milliseconds_left),
+                string(props.time_joined),
+                base.x if base else NONE_SHORT,
+                base.y if base else NONE_SHORT,
+            )
+        )
+    block = "\0".join(strings).encode()
+    size = HEADER.size + OBJECT.size * len(records) + len(block)
+    if buf is None:
+        return size
+    if offset + size > len(buf):
+        raise ValueError("board snapshot needs {} bytes, {} available".format(size, len(buf) - offset))
+
+    # Mark the slot as being written before touching the body
+    struct.pack_into("<II", buf, offset, MAGIC, 0)
+    position = offset + HEADER.size
+    for record in records:
+        OBJECT.pack_into(buf, position, *record)
+        position += OBJECT.size
+    buf[position : position + len(block)] = block
+    HEADER.pack_into(
+        buf, offset, MAGIC, seq, board.id, board.width, board.height,
+        board.minimum_delay_between_moves, len(records), len(block),
+    )
+    return size
+
+
+def read_seq(buf, offset: int) -> int:
+    magic, seq = struct.unpack_from("<II", buf, offset)
+    return seq if magic == MAGIC else 0
+
+
+def unpack_board(buf, offset: int) -> Tuple[int, Board]:
+    """(seq, board) as written by `pack_board`; seq 0 means no whole board."""
+    magic, seq, board_id, width, height, delay, count, block_size = HEADER.unpack_from(buf, offset)
+    if magic != MAGIC or not seq:
+        return 0, None
+    position = offset + HEADER.size
+    block_start = position + OBJECT.size * count
+    strings: List[str] = bytes(buf[block_start : block_start + block_size]).decode().split("\0")
+
+    def string(index: int) -> Optional[str]:
+        return None if index == NO_STRING else strings[index]
+
+    objects = []
+    for record in OBJECT.iter_unpack(buf[position:block_start]):
+        (obj_id, obj_type, x, y, has_props, points, pair_id, diamonds, score, name,
+         inventory, can_tackle, ms_left, time_joined, base_x, base_y) = record
+        props = None
+        if has_props:
+            props = Properties(
+                points=_from_int(points),
+                pair_id=string(pair_id),
+                diamonds=_from_int(diamonds),
+                score=_from_int(score),
+                name=string(name),
+                inventory_size=_from_int(inventory),
+                can_tackle=None if can_tackle < 0 else bool(can_tackle),
+                milliseconds_left=_from_int(ms_left),
+                time_joined=string(time_joined),
+                base=Base(base_y, base_x) if base_x != NONE_SHORT else None,
+            )
+        objects.append(GameObject(obj_id, Position(y, x), strings[obj_type], props))
+
+    features = [
+        Feature(f["name"], Config(**f["config"]) if f.get("config") else None)
+        for f in json.loads(strings[0])
+    ]
+    board = Board(board_id, width, height, features, delay, objects)
+    # Torn read: the writer reused this slot while we were decoding
+    if read_seq(buf, offset) != seq:
+        return 0, None
+    return seq, board
@@ -0,0 +1,162 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from .bitboard import Bitboards, get_bitboards
+from .logic.base import BaseLogic
+from .models import Board, GameObject, Position
+from .teleport import TeleporterGraph, get_teleporter_graph
+from .workers import WorkerPool
+
+
+@dataclass
+class OpponentSummary:
+    count: int = 0
+    highest_score: int = 0
+    total_diamonds_carried: int = 0
+    richest: Optional[GameObject] = None
+
+
+class BoardAnalysis:
+    """
+    Everything our bots need to know about one board, computed once per
+    tick and shared by all of them: objects indexed by type, the bitboards,
+    the teleporter graph with distance fields from our bots and to their
+    bases, and the opponents with a summary of them.
+
+    Logics find it on the board they are given (see `view_for`):
+    `get_teleporter_graph` and `get_bitboards` answer from it, and the
+    greedy facts take the opponents and their top score from it. What
+    logics keep across ticks (opponent tracks, threat maps) is still their
+    own, so that part of the cost grows with the number of bots.
+    """
+
+    def __init__(self, board: Board, team: Set[int]):
+        self.board = board
+        self.team = team
+        self.by_type: Dict[str, List[GameObject]] = {}
+        for obj in board.game_objects:
+            self.by_type.setdefault(obj.type, []).append(obj)
+
+        bots = self.by_type.get("BotGameObject", [])
+        self.our_bots = [b for b in bots if b.id in team]
+        self.opponents = [b for b in bots if b.id not in team]
+        self.diamonds = self.by_type.get("DiamondGameObject", [])
+        self.graph: TeleporterGraph = get_teleporter_graph(board)
+        # Built on first use (see `bitboards_for`)
+        self._bitboards: Optional[Bitboards] = None
+
+        # Warm the distance fields from our bots and bases once; later
+        # distance queries from any of our bots are O(1) lookups.
+        for bot in self.our_bots:
+            self.graph.field_from(bot.position)
+            if bot.properties.base:
+                self.graph.field_for(bot.properties.base)
+
+        summary = OpponentSummary(count=len(self.opponents))
+        for bot in self.opponents:
+            props = bot.properties
+            summary.highest_score = max(summary.highest_score, props.score or 0)
+            summary.total_diamonds_carried += props.diamonds or 0
+            if summary.richest is None or (props.diamonds or 0) > (summary.richest.properties.diamonds or 0):
+                summary.richest = bot
+        self.opponent_summary = summary
+
+    def distance(self, a: Position, b: Position) -> int:
+        return self.graph.distance(a, b)
+
+    def assign_diamonds(self) -> Dict[int, int]:
+        """
+        Give each of our bots a different diamond (bot id -> diamond id):
+        cheapest (distance per point) pairs first, respecting inventory space.
+        """
+        candidates: List[Tuple[float, int, int]] = []
+        for bot in self.our_bots:
+            props = bot.properties
+            space = (props.inventory_size or 5) - (props.diamonds or 0)
+            for d in self.diamonds:
+                if d.properties.points <= space:
+                    cost = self.distance(bot.position, d.position) / d.properties.points
+                    candidates.append((cost, bot.id, d.id))
+        candidates.sort()
+
+        assigned: Dict[int, int] = {}
+        taken: Set[int] = set()
+        for _, bot_id, diamond_id in candidates:
+            if bot_id not in assigned and diamond_id not in taken:
+                assigned[bot_id] = diamond_id
+                taken.add(diamond_id)
+        return assigned
+
+    def hidden_for(self, bot_id: int, assignment: Dict[int, int]) -> Set[int]:
+        """Ids of the teammates and of the diamonds assigned to them."""
+        hidden = {d for b, d in assignment.items() if b != bot_id}
+        hidden.update(b for b in self.team if b != bot_id)
+        return hidden
+
+    def view_for(self, bot_id: int, assignment: Dict[int, int]) -> Board:
+        """
+        The board as one of our bots should see it: teammates and the
+        diamonds assigned to them are left out, so logics neither chase a
+        teammate's target nor treat teammates as opponents. The shared
+        analysis is attached as `view.analysis`.
+        """
+        hidden = self.hidden_for(bot_id, assignment)
+        board = self.board
+        view = Board(
+            id=board.id,
+            width=board.width,
+            height=board.height,
+            features=board.features,
+            minimum_delay_between_moves=board.minimum_delay_between_moves,
+            game_objects=[o for o in board.game_objects if o.id not in hidden],
+        )
+        view.analysis = self
+        view.hidden = hidden
+        return view
+
+    def bitboards_for(self, view: Board) -> Bitboards:
+        """
+        Bitboards of a view from `view_for`: those of the board without the
+        objects the view hides (built on first use, then kept on the view).
+        """
+        bitboards = getattr(view, "bitboards", None)
+        if bitboards is None:
+            if self._bitboards is None:
+                self._bitboards = get_bitboards(self.board)
+            view.bitboards = bitboards = self._bitboards.without(view.hidden)
+        return bitboards
+
+
+@dataclass
+class TeamEngine:
+    """
+    Computes moves for all of our bots on a board. The board is analysed
+    once (`BoardAnalysis`) and the diamonds are assigned jointly; each
+    logic then still decides on its own view of it, one call per bot, so
+    the per-bot cost is the logic's decision minus the shared work. There
+    is no batched decision over all bots: the assignment, through what each
+    view hides, is the only choice made for the team as a whole.
+    Logics are keyed by bot name, like `Board.get_bot`.
+    """
+
+    logics: Dict[str, BaseLogic]
+    last_assignment: Dict[int, int] = field(default_factory=dict)
+    # When set, the logics run in its worker processes instead
+    pool: Optional[WorkerPool] = None
+    timeout: Optional[float] = None
+
+    def next_moves(self, board: Board) -> Dict[str, Tuple[int, int]]:
+        team = {b.id for b in board.bots if b.properties.name in self.logics}
+        analysis = BoardAnalysis(board, team)
+        self.last_assignment = analysis.assign_diamonds()
+        if self.pool is not None:
+            hidden = {
+                bot.properties.name: analysis.hidden_for(bot.id, self.last_assignment)
+                for bot in analysis.our_bots
+            }
+            return self.pool.next_moves(board, hidden, self.timeout)
+        moves = {}
+        for bot in analysis.our_bots:
+            view = analysis.view_for(bot.id, self.last_assignment)
+            moves[bot.properties.name] = self.logics[bot.properties.name].next_move(bot, view)
+        return moves
@@ -0,0 +1,295 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from .models import Board, GameObject, Position
+
+INF = float("inf")
+
+
+def get_teleporters(board: Board) -> List[GameObject]:
+    return [obj for obj in board.game_objects if obj.type == "TeleportGameObject"]
+
+
+def pair_teleporters(teleporters: List[GameObject]) -> List[Tuple[int, int]]:
+    """
+    Link teleporters into pairs using `properties.pair_id`. The id is either
+    shared by both ends of a pair or refers to the other end's object id.
+    Teleporters without usable pairing info are paired in board order.
+    """
+    by_id = {str(t.id): i for i, t in enumerate(teleporters)}
+    groups: Dict[str, List[int]] = {}
+    for i, t in enumerate(teleporters):
+        pair_id = t.properties.pair_id if t.properties else None
+        if pair_id is None:
+            continue
+        if pair_id in by_id and by_id[pair_id] != i:
+            key = "-".join(sorted((str(t.id), pair_id)))
+        else:
+            key = pair_id
+        groups.setdefault(key, [])
+        if i not in groups[key]:
+            groups[key].append(i)
+
+    pairs: List[Tuple[int, int]] = []
+    paired = set()
+    for members in groups.values():
+        if len(members) == 2:
+            pairs.append((members[0], members[1]))
+            paired.update(members)
+
+    leftover = [i for i in range(len(teleporters)) if i not in paired]
+    for a, b in zip(leftover[::2], leftover[1::2]):
+        pairs.append((a, b))
+    return pairs
+
+
+class TeleporterGraph:
+    """
+    Shortest walking distance on a board with any number of teleporter pairs,
+    including chained teleports.
+
+    Stepping onto teleporter `k` puts the bot on its partner. The closure
+    `hop[k][m]` is the cheapest way to go from "just used k" to "just used m",
+    so a route is: walk to some k, chain to some m, walk to the target.
+
+    Costs, for T teleporters on a W x H board:
+
+    - `field_for(target)` / `field_from(source)`: a flat per-cell distance
+      field to `target` / from `source`, built by an L1 distance transform
+      in O(W * H + T^2); each kind is kept in an LRU of at most `max_cells`
+      cells in total.
+    - `distance(a, b)`: O(1) when `b` has a field to it or `a` a field from
+      it. Otherwise O(T), plus O(T^2) the first time `b` is seen as a target.
+
+    Routes are not reversible (entering the teleporter we stand on costs 2
+    steps, walking onto it from elsewhere does not), hence the two kinds.
+    Callers that measure many distances to the same cell (our base) or from
+    it (our position) should build the matching field first.
+    """
+
+    def __init__(
+        self,
+        width: int,
+        height: int,
+        positions: List[Position],
+        pairs: List[Tuple[int, int]],
+        max_cells: int = 1 << 20,
+    ):
+        self.width = width
+        self.height = height
+        # At least a handful of fields, whatever the board size
+        self.max_fields = max(8, max_cells // max(1, width * height))
+        self.nodes: List[Position] = []
+        self.partner: List[int] = []
+        for a, b in pairs:
+            self.nodes.extend((positions[a], positions[b]))
+            n = len(self.nodes)
+            self.partner.extend((n - 1, n - 2))
+
+        n = len(self.nodes)
+        hop = [[INF] * n for _ in range(n)]
+        for k in range(n):
+            exit_pos = self.nodes[self.partner[k]]
+            for m in range(n):
+                hop[k][m] = 0 if k == m else self._entry_cost(exit_pos, m)
+        for via in range(n):
+            for k in range(n):
+                for m in range(n):
+                    if hop[k][via] + hop[via][m] < hop[k][m]:
+                        hop[k][m] = hop[k][via] + hop[via][m]
+        self.hop = hop
+        self._fields: "OrderedDict[int, Tuple[List[int], List[float]]]" = OrderedDict()
+        self._vias: "OrderedDict[int, List[float]]" = OrderedDict()
+        self._sources: "OrderedDict[int, List[float]]" = OrderedDict()
+
+    def _entry_cost(self, pos: Position, k: int) -> int:
+        node = self.nodes[k]
+        dist = abs(pos.x - node.x) + abs(pos.y - node.y)
+        # Standing on a teleporter already: step off and back on
+        return dist if dist > 0 else 2
+
+    def _index(self, pos: Position) -> int:
+        return pos.y * self.width + pos.x
+
+    def _in_bounds(self, pos: Position) -> bool:
+        return 0 <= pos.x < self.width and 0 <= pos.y < self.height
+
+    def _via(self, target: Position) -> List[float]:
+        """via[k]: cost from "about to enter k" to the target."""
+        idx = self._index(target)
+        cached = self._vias.get(idx)
+        if cached is not None:
+            self._vias.move_to_end(idx)
+            return cached
+
+        n = len(self.nodes)
+        via = [
+            min(
+                self.hop[k][m]
+                + abs(self.nodes[self.partner[m]].x - target.x)
+                + abs(self.nodes[self.partner[m]].y - target.y)
+                for m in range(n)
+            )
+            for k in range(n)
+        ]
+        self._vias[idx] = via
+        if len(self._vias) > self.max_fields * 16:
+            self._vias.popitem(last=False)
+        return via
+
+    def _field(self, target: Position) -> Tuple[List[int], List[float]]:
+        idx = self._index(target)
+        cached = self._fields.get(idx)
+        if cached is not None:
+            self._fields.move_to_end(idx)
+            return cached
+
+        via = self._via(target)
+        # Seeds: the target itself at 0 and every teleporter at its cost from
+        # "about to enter"
+        cells = [INF] * (self.width * self.height)
+        cells[idx] = 0
+        for k, node in enumerate(self.nodes):
+            i = self._index(node)
+            if via[k] < cells[i]:
+                cells[i] = via[k]
+        self._transform(cells)
+        # Standing on a teleporter, entering it again costs 2 steps, not 0
+        for node in self.nodes:
+            cells[self._index(node)] = self._query(node, target, via)
+
+        self._fields[idx] = (cells, via)
+        if len(self._fields) > self.max_fields:
+            self._fields.popitem(last=False)
+        return cells, via
+
+    def _transform(self, cells: List[float]) -> None:
+        """
+        In place, every cell becomes the min over cells of their value plus
+        the Manhattan distance between them. That is separable: sweep every
+        row both ways, then every column.
+        """
+        width, height = self.width, self.height
+        for start, stop, step in (
+            *((y * width, (y + 1) * width, 1) for y in range(height)),
+            *((x, x + width * height, width) for x in range(width)),
+        ):
+            for i in range(start + step, stop, step):
+                if cells[i - step] + 1 < cells[i]:
+                    cells[i] = cells[i - step] + 1
+            for i in range(stop - 2 * step, start - step, -step):
+                if cells[i + step] + 1 < cells[i]:
+                    cells[i] = cells[i + step] + 1
+
+    def field_for(self, target: Position) -> List[int]:
+        """Flat per-cell distance field to `target` (built on first use, then cached)."""
+        return self._field(target)[0]
+
+    def field_from(self, source: Position) -> List[int]:
+        """Flat per-cell distance field from `source` (built on first use, then cached)."""
+        idx = self._index(source)
+        cached = self._sources.get(idx)
+        if cached is not None:
+            self._sources.move_to_end(idx)
+            return cached
+
+        n = len(self.nodes)
+        # Seeds: the source itself at 0 and the exit of every teleporter m at
+        # the cost of "just used m"
+        cells = [INF] * (self.width * self.height)
+        cells[idx] = 0
+        enter = [self._entry_cost(source, k) for k in range(n)]
+        for m in range(n):
+            used = min(enter[k] + self.hop[k][m] for k in range(n))
+            i = self._index(self.nodes[self.partner[m]])
+            if used < cells[i]:
+                cells[i] = used
+        self._transform(cells)
+
+        self._sources[idx] = cells
+        if len(self._sources) > self.max_fields:
+            self._sources.popitem(last=False)
+        return cells
+
+    def distance(self, start: Position, end: Position) -> int:
+        direct = abs(start.x - end.x) + abs(start.y - end.y)
+        if not self.nodes or not (self._in_bounds(start) and self._in_bounds(end)):
+            return direct
+        if self._index(end) in self._fields:
+            cells, _ = self._field(end)
+            return cells[self._index(start)]
+        if self._index(start) in self._sources:
+            return self.field_from(start)[self._index(end)]
+        # No field yet: a single query only needs the teleporters, not every cell
+        return self._query(start, end, self._via(end))
+
+    def _query(self, start: Position, end: Position, via: List[float]) -> int:
+        best = abs(start.x - end.x) + abs(start.y - end.y)
+        for k in range(len(self.nodes)):
+            node = self.nodes[k]
+            enter = abs(start.x - node.x) + abs(start.y - node.y) or 2
+            if enter + via[k] < best:
+                best = enter + via[k]
+        return best
+
+    def next_waypoint(self, start: Position, end: Position) -> Position:
+        """
+        Where to walk next to reach `end` fastest: `end` itself, or the first
+        teleporter to step on.
+        """
+        best_target = end
+        if not self.nodes or not (self._in_bounds(start) and self._in_bounds(end)):
+            return best_target
+        best = abs(start.x - end.x) + abs(start.y - end.y)
+        via = self._via(end)
+        for k, node in enumerate(self.nodes):
+            cost = self._entry_cost(start, k) + via[k]
+            if cost < best and (node.x != start.x or node.y != start.y):
+                best = cost
+                best_target = node
+        return best_target
+
+
+_graphs: "OrderedDict[tuple, TeleporterGraph]" = OrderedDict()
+_MAX_GRAPHS = 8
+# Several helpers ask for the graph of the same board within one tick
+_last_lookup: Tuple[Optional[Board], Optional[TeleporterGraph]] = (None, None)
+
+
+def get_teleporter_graph(board: Board) -> TeleporterGraph:
+    """
+    Teleporter graph for `board`, reused across ticks for as long as the
+    teleporters stay where they are.
+    """
+    global _last_lookup
+    if _last_lookup[0] is board:
+        return _last_lookup[1]
+    # Views of `game.team.BoardAnalysis` share the graph of the whole board
+    analysis = getattr(board, "analysis", None)
+    if analysis is not None:
+        return analysis.graph
+
+    teleporters = get_teleporters(board)
+    key = (
+        board.width,
+        board.height,
+        tuple(
+            (t.id, t.position.x, t.position.y, t.properties.pair_id if t.properties else None)
+            for t in teleporters
+        ),
+    )
+    graph: Optional[TeleporterGraph] = _graphs.get(key)
+    if graph is None:
+        graph = TeleporterGraph(
+            board.width,
+            board.height,
+            [Position(t.position.y, t.position.x) for t in teleporters],
+            pair_teleporters(teleporters),
+        )
+        _graphs[key] = graph
+        if len(_graphs) > _MAX_GRAPHS:
+            _graphs.popitem(last=False)
+    else:
+        _graphs.move_to_end(key)
+    _last_lookup = (board, graph)
+    return graph
@@ -0,0 +1,127 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+from .models import Board, GameObject, Position
+from .util import get_direction
+
+
+def threat_sources(
+    board: Board, me: GameObject, max_diamonds: int = 2
+) -> Dict[int, Position]:
+    """
+    Opponents that are worth running from: bots carrying few diamonds have
+    little to lose and everything to gain from a tackle.
+    """
+    return {
+        b.id: b.position
+        for b in board.bots
+        if b.id != me.id and (b.properties.diamonds or 0) <= max_diamonds
+    }
+
+
+@dataclass
+class ThreatMap:
+    """
+    Per-cell number of steps the closest threatening opponent needs to reach
+    that cell, capped at `horizon + 1` (= safe).
+
+    The field (`cells`) is a flat list indexed by `y * width + x`. Only the
+    Manhattan ball of radius `horizon` around a source is affected by it, so
+    moving, adding or removing a source touches O(horizon^2) cells instead
+    of rebuilding the whole board.
+    """
+
+    width: int = 0
+    height: int = 0
+    horizon: int = 4
+    cells: List[int] = field(default_factory=list)
+    sources: Dict[int, Position] = field(default_factory=dict)
+    _offsets: List[Tuple[int, int, int]] = field(default_factory=list)
+
+    def __post_init__(self):
+        self._offsets = [
+            (dx, dy, abs(dx) + abs(dy))
+            for dy in range(-self.horizon, self.horizon + 1)
+            for dx in range(-self.horizon, self.horizon + 1)
+            if abs(dx) + abs(dy) <= self.horizon
+        ]
+        self.reset(self.width, self.height)
+
+    @property
+    def safe(self) -> int:
+        return self.horizon + 1
+
+    def reset(self, width: int, height: int) -> None:
+        self.width = width
+        self.height = height
+        self.cells = [self.safe] * (width * height)
+        self.sources = {}
+
+    def _ball(self, center: Position):
+        for dx, dy, dist in self._offsets:
+            x = center.x + dx
+            y = center.y + dy
+            if 0 <= x < self.width and 0 <= y < self.height:
+                yield y * self.width + x, x, y, dist
+
+    def _add(self, center: Position) -> None:
+        cells = self.cells
+        for idx, _, _, dist in self._ball(center):
+            if dist < cells[idx]:
+                cells[idx] = dist
+
+    def _remove(self, center: Position) -> None:
+        # Only cells whose value came from this source need recomputing,
+        # and only from the sources that are left.
+        cells = self.cells
+        for idx, x, y, dist in self._ball(center):
+            if cells[idx] != dist:
+                continue
+            best = self.safe
+            for other in self.sources.values():
+                d = abs(other.x - x) + abs(other.y - y)
+                if d < best:
+                    best = d
+            cells[idx] = best
+
+    def update(self, board: Board, sources: Dict[int, Position]) -> None:
+        """Move the field to the new set of sources, touching only what changed."""
+        if board.width != self.width or board.height != self.height:
+            self.reset(board.width, board.height)
+
+        for bot_id, old in list(self.sources.items()):
+            new = sources.get(bot_id)
+            if new is None or new.x != old.x or new.y != old.y:
+                del self.sources[bot_id]
+                self._remove(old)
+
+        for bot_id, new in sources.items():
+            if bot_id not in self.sources:
+                self.sources[bot_id] = Position(new.y, new.x)
+                self._add(new)
+
+    def steps_to(self, pos: Position) -> int:
+        if not (0 <= pos.x < self.width and 0 <= pos.y < self.height):
+            return self.safe
+        return self.cells[pos.y * self.width + pos.x]
+
+    def cost(self, pos: Position) -> int:
+        """Cost layer value: 0 when safe, growing as threats get closer."""
+        return self.safe - self.steps_to(pos)
+
+    def safer_direction(
+        self, pos: Position, goal: Position
+    ) -> Tuple[int, int]:
+        """
+        Same as `get_direction`, but when both axes bring us closer to the
+        goal, step onto the cell with the lower threat cost.
+        """
+        delta_x, delta_y = get_direction(pos.x, pos.y, goal.x, goal.y)
+        if goal.x == pos.x or goal.y == pos.y:
+            return delta_x, delta_y
+        alt_y = 1 if goal.y > pos.y else -1
+        via_x = self.cost(Position(pos.y, pos.x + delta_x))
+        via_y = self.cost(Position(pos.y + alt_y, pos.x))
+        if via_y < via_x:
+            return 0, alt_y
+        return delta_x, delta_y
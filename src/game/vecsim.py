@@ -0,0 +1,236 @@
+from dataclasses import replace
+from typing import List, Optional, Tuple
+
+from .generator import BoardGenerator, ScenarioConfig
+from .models import Board
+from .rules import BLUE_POINTS, RED_POINTS, inventory_size
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Capped like `ThreatMap` (horizon 4): farther threats all count as safe
+THREAT_SAFE = 5
+_FAR = 1 << 20
+
+
+def simplified(config: ScenarioConfig) -> ScenarioConfig:
+    """
+    The game `VectorSimulator` plays: no teleporters, no red button and no
+    diamond respawns, so every game is a pure function of its first board.
+    """
+    return replace(config, teleport_pairs=0, red_button=False, min_ratio_for_generation=0.0)
+
+
+def _direction(px, py, gx, gy):
+    """`get_direction` on arrays: x first, then y."""
+    dx = np.clip(gx - px, -1, 1)
+    dy = np.where(dx != 0, 0, np.clip(gy - py, -1, 1))
+    return dx, dy
+
+
+def _first(mask):
+    """Index of the first True along the last axis, and whether there is one."""
+    return mask.argmax(axis=-1), mask.any(axis=-1)
+
+
+class VectorSimulator:
+    """
+    K games of the simplified rules stepped in lockstep, as NumPy
+    struct-of-arrays: bot positions, bases, inventories and scores are
+    (K, B) arrays, diamonds (K, D) arrays kept in board order.
+
+    Every tick all K * B decisions are taken at once from the tick's
+    snapshot by `decide` (a vectorized port of `WawanMKS`), then the bots
+    move one after the other, as in `game.rules.apply`, each move applied to
+    all K games at once. With `Simulator(shuffle=False)` on the same
+    simplified boards, scalar `WawanMKS` bots end with the same scores.
+    """
+
+    def __init__(self, boards: List[Board], total_ticks: int):
+        if np is None:
+            raise ImportError("VectorSimulator needs numpy")
+        first = boards[0]
+        self.width, self.height = first.width, first.height
+        self.total_ticks = total_ticks
+        self.tick = 0
+        bots = [b.bots for b in boards]
+        self.capacity = inventory_size(bots[0][0])
+        self.can_tackle = all(
+            bot.properties.can_tackle is not False for game in bots for bot in game
+        )
+
+        def bot_array(value):
+            return np.array([[value(bot) for bot in game] for game in bots], dtype=np.int32)
+
+        self.px = bot_array(lambda b: b.position.x)
+        self.py = bot_array(lambda b: b.position.y)
+        self.bx = bot_array(lambda b: b.properties.base.x)
+        self.by = bot_array(lambda b: b.properties.base.y)
+        self.carried = bot_array(lambda b: b.properties.diamonds or 0)
+        self.score = bot_array(lambda b: b.properties.score or 0)
+
+        diamonds = [b.diamonds for b in boards]
+        shape = (len(boards), max(1, max(len(d) for d in diamonds)))
+        self.dx = np.zeros(shape, dtype=np.int32)
+        self.dy = np.zeros(shape, dtype=np.int32)
+        self.points = np.zeros(shape, dtype=np.int32)
+        self.alive = np.zeros(shape, dtype=bool)
+        for k, game in enumerate(diamonds):
+            for i, d in enumerate(game):
+                self.dx[k, i], self.dy[k, i] = d.position.x, d.position.y
+                self.points[k, i] = d.properties.points or BLUE_POINTS
+                self.alive[k, i] = True
+
+    @classmethod
+    def generate(cls, games: int, config: ScenarioConfig, seed: int = 0, seconds: Optional[int] = None):
+        """Game k starts from the board `Simulator(config, seed=seed + k)` would use."""
+        config = replace(simplified(config), fresh=True)
+        boards = [BoardGenerator(seed + k).generate(config) for k in range(games)]
+        seconds = seconds if seconds is not None else config.seconds
+        return cls(boards, seconds * 1000 // config.minimum_delay_between_moves)
+
+    @property
+    def games(self) -> int:
+        return self.px.shape[0]
+
+    def _threat(self, cx, cy):
+        """Steps the closest threat (other bot with <= 2 diamonds) needs to reach (cx, cy) of each bot."""
+        dist = np.abs(self.px[:, None, :] - cx[:, :, None]) + np.abs(self.py[:, None, :] - cy[:, :, None])
+        bots = self.px.shape[1]
+        source = (self.carried <= 2)[:, None, :] & ~np.eye(bots, dtype=bool)[None]
+        steps = np.minimum(np.where(source, dist, _FAR).min(axis=2), THREAT_SAFE)
+        inside = (cx >= 0) & (cx < self.width) & (cy >= 0) & (cy < self.height)
+        return np.where(inside, steps, THREAT_SAFE)
+
+    def decide(self) -> Tuple["np.ndarray", "np.ndarray"]:
+        """Moves of every bot in every game, from the current state."""
+        px, py, bx, by, carried, cap = self.px, self.py, self.bx, self.by, self.carried, self.capacity
+        # `GameClock.remaining_moves` on the scalar simulator's game time
+        time_left = self.total_ticks - self.tick
+        to_base = np.abs(px - bx) + np.abs(py - by)
+        gx, gy = bx.copy(), by.copy()
+
+        # 1. Escape towards base, on the safer axis
+        escape = (carried >= 3) & (self._threat(px, py) <= 2)
+        # 2. Time critical return
+        returning = ~escape & (carried > 0) & (time_left <= to_base + 4)
+        decided = escape | returning
+
+        bot_dist = np.abs(px[:, :, None] - px[:, None, :]) + np.abs(py[:, :, None] - py[:, None, :])
+        enemy_carried = carried[:, None, :]
+
+        def set_goal(mask, x, y):
+            nonlocal decided
+            mask = mask & ~decided
+            gx[mask], gy[mask] = x[mask], y[mask]
+            decided = decided | mask
+
+        def enemy(mask):
+            index, found = _first(mask)
+            return found, np.take_along_axis(px, index, 1), np.take_along_axis(py, index, 1)
+
+        # 3. Tackle an adjacent rich enemy
+        tackle = (bot_dist == 1) & (enemy_carried >= 2) & (
+            (carried < 2)[:, :, None] | (enemy_carried >= cap - 1)
+        )
+        found, ex, ey = enemy(tackle)
+        set_goal(found, ex, ey)
+        # 4. Inventory full
+        set_goal(carried >= cap, bx, by)
+        # 6. Close in on a rich enemy two steps away
+        found, ex, ey = enemy((bot_dist == 2) & (enemy_carried >= 2))
+        set_goal(found & (carried < cap - cap // 2 + 1), ex, ey)
+
+        # 7. Diamonds
+        dist = np.abs(self.dx[:, None, :] - px[:, :, None]) + np.abs(self.dy[:, None, :] - py[:, :, None])
+        alive = self.alive[:, None, :]
+
+        def closest(points):
+            fits = alive & (self.points[:, None, :] == points) & (carried + points <= cap)[:, :, None]
+            masked = np.where(fits, dist, _FAR)
+            index = masked.argmin(axis=2)[:, :, None]
+            best = np.take_along_axis(masked, index, 2)[..., 0]
+            x = np.take_along_axis(np.broadcast_to(self.dx[:, None, :], dist.shape), index, 2)[..., 0]
+            y = np.take_along_axis(np.broadcast_to(self.dy[:, None, :], dist.shape), index, 2)[..., 0]
+            return best < _FAR, best, x, y
+
+        has_red, red_dist, rx, ry = closest(RED_POINTS)
+        has_blue, blue_dist, ux, uy = closest(BLUE_POINTS)
+        nearly_full = carried >= cap - 2
+        take_red = np.where(
+            nearly_full,
+            has_red & (red_dist <= 5),
+            has_red & (~has_blue | (red_dist <= blue_dist + 2)),
+        )
+        take_blue = ~take_red & has_blue & np.where(nearly_full, blue_dist <= 4, True)
+        set_goal(take_red, rx, ry)
+        set_goal(take_blue, ux, uy)
+        set_goal(np.ones_like(decided), bx, by)
+
+        # 9. Next to base with diamonds: drop them off first
+        late = ~(escape | returning)
+        to_base_now = late & ((gx != bx) | (gy != by)) & (to_base == 1) & (carried > 0)
+        gx[to_base_now], gy[to_base_now] = bx[to_base_now], by[to_base_now]
+
+        mx, my = _direction(px, py, gx, gy)
+        # `ThreatMap.safer_direction` for escaping bots moving diagonally
+        diagonal = escape & (gx != px) & (gy != py)
+        if diagonal.any():
+            alt_y = np.sign(gy - py)
+            via_x = THREAT_SAFE - self._threat(px + mx, py)
+            via_y = THREAT_SAFE - self._threat(px, py + alt_y)
+            switch = diagonal & (via_y < via_x)
+            mx = np.where(switch, 0, mx)
+            my = np.where(switch, alt_y, my)
+        return mx, my
+
+    def apply(self, bot: int, mx, my) -> None:
+        """Move bot `bot` of every game, as `game.rules.apply` does."""
+        px, py, carried = self.px, self.py, self.carried
+        games = np.arange(self.games)
+        nx, ny = px[:, bot] + mx, py[:, bot] + my
+        legal = ((mx != 0) | (my != 0)) & (nx >= 0) & (nx < self.width) & (ny >= 0) & (ny < self.height)
+
+        others = (px == nx[:, None]) & (py == ny[:, None])
+        others[:, bot] = False
+        victim, occupied = _first(others)
+        tackled = legal & occupied
+        if not self.can_tackle:
+            legal &= ~occupied
+        elif tackled.any():
+            k, v = games[tackled], victim[tackled]
+            carried[k, bot] = np.minimum(self.capacity, carried[k, bot] + carried[k, v])
+            carried[k, v] = 0
+            px[k, v], py[k, v] = self.bx[k, v], self.by[k, v]
+
+        px[:, bot] = np.where(legal, nx, px[:, bot])
+        py[:, bot] = np.where(legal, ny, py[:, bot])
+
+        here = self.alive & (self.dx == nx[:, None]) & (self.dy == ny[:, None])
+        index, found = _first(here)
+        points = self.points[games, index]
+        take = legal & found & (carried[:, bot] + points <= self.capacity)
+        carried[:, bot] += np.where(take, points, 0)
+        self.alive[games[take], index[take]] = False
+
+        home = legal & (nx == self.bx[:, bot]) & (ny == self.by[:, bot])
+        self.score[:, bot] += np.where(home, carried[:, bot], 0)
+        carried[:, bot] = np.where(home, 0, carried[:, bot])
+
+    def step(self) -> bool:
+        """Play one tick of every game. Returns False once they are over."""
+        if self.tick >= self.total_ticks:
+            return False
+        mx, my = self.decide()
+        for bot in range(self.px.shape[1]):
+            self.apply(bot, mx[:, bot], my[:, bot])
+        self.tick += 1
+        return self.tick < self.total_ticks
+
+    def run(self) -> "np.ndarray":
+        """Final scores, (K, B) in board bot order."""
+        while self.step():
+            pass
+        return self.score
@@ -0,0 +1,251 @@
+import multiprocessing as mp
+import queue
+import zlib
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from time import monotonic, perf_counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .controllers import get_controller
+from .logic.base import BaseLogic
+from .models import Board
+from .snapshot import pack_board, unpack_board
+
+# Snapshots kept in shared memory at once: a late worker can still read the
+# board of a previous tick while the next one is written
+SLOTS = 4
+# Share of the board's move delay workers get when no timeout is given
+DEFAULT_TIMEOUT_SHARE = 0.8
+
+
+def default_timeout(board: Board) -> float:
+    return board.minimum_delay_between_moves / 1000 * DEFAULT_TIMEOUT_SHARE
+
+
+def _worker(logic_name: str, shm_name: str, slot_size: int, tasks: "mp.Queue", results: "mp.Queue") -> None:
+    # Workers share our resource tracker: attaching does not take ownership
+    shm = shared_memory.SharedMemory(shm_name)
+    logic_class = get_controller(logic_name)
+    logics: Dict[str, BaseLogic] = {}
+    try:
+        pending: Dict[str, Tuple] = {}
+        while True:
+            if not pending:
+                task = tasks.get()
+                if task is None:
+                    break
+                pending[task[1]] = task
+            # Catch up: only the latest tick of every bot is worth computing
+            stop = False
+            while True:
+                try:
+                    task = tasks.get_nowait()
+                except queue.Empty:
+                    break
+                if task is None:
+                    stop = True
+                    break
+                pending[task[1]] = task
+            if stop:
+                break
+            seq, name, hidden = pending.pop(next(iter(pending)))
+            start = perf_counter()
+            try:
+                read_seq, board = unpack_board(shm.buf, (seq % SLOTS) * slot_size)
+                if read_seq != seq:
+                    # Overwritten already: the main process has moved on
+                    continue
+                if hidden:
+                    board.game_objects = [o for o in board.game_objects if o.id not in hidden]
+                board_bot = next((b for b in board.bots if b.properties.name == name), None)
+                if board_bot is None:
+                    # Let the main process fall back without waiting
+                    results.put((seq, name, None, None, 0.0, None))
+                    continue
+                logic = logics.get(name)
+                if logic is None:
+                    logic = logics[name] = logic_class()
+                move = logic.next_move(board_bot, board)
+                results.put((seq, name, tuple(move), logic.last_branch, perf_counter() - start, None))
+            except Exception as e:
+                # This bot falls back for this tick; the worker and the other bots carry on
+                error = "{}: {}".format(type(e).__name__, e)
+                results.put((seq, name, None, None, perf_counter() - start, error))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        shm.close()
+
+
+@dataclass
+class WorkerStats:
+    ticks: int = 0
+    moves: int = 0
+    # Moves a worker did not deliver before the deadline
+    late: int = 0
+    # Ticks the board did not fit in a snapshot slot
+    oversize: int = 0
+    # Moves the logic raised on (the fallback answered instead)
+    errors: int = 0
+    # Workers found dead and started again
+    restarts: int = 0
+    worker_seconds: float = 0.0
+
+    @property
+    def mean_ms(self) -> float:
+        delivered = self.moves - self.late - self.errors
+        return self.worker_seconds * 1000 / delivered if delivered else 0.0
+
+
+class WorkerPool:
+    """
+    Runs a logic's `next_move` in worker processes.
+
+    Each tick the board is packed once into a shared memory slot
+    (`game.snapshot`) and every bot gets a small task (seq, bot name,
+    object ids to hide) on the queue of its worker; a bot always goes to the
+    same worker, which keeps that bot's logic instance and its state. Moves
+    not back by the deadline, or on which the logic raised, come from
+    `fallback`, a cheap logic run in this process, and answers to older
+    ticks are dropped. A worker that died is started again on the next
+    tick (its bots' logics start from scratch).
+    """
+
+    def __init__(
+        self,
+        logic_name: str,
+        workers: int = 2,
+        fallback: str = "WawanMKS",
+        slot_size: int = 1 << 20,
+    ):
+        if get_controller(logic_name) is None or get_controller(fallback) is None:
+            raise ValueError("unknown logic {} or {}".format(logic_name, fallback))
+        self.fallback_class = get_controller(fallback)
+        self.logic_name = logic_name
+        self.slot_size = slot_size
+        self.stats = WorkerStats()
+        self.last_branches: Dict[str, Optional[str]] = {}
+        self._fallbacks: Dict[str, BaseLogic] = {}
+        self._seq = 0
+        self._shm = shared_memory.SharedMemory(create=True, size=slot_size * SLOTS)
+        self._results: "mp.Queue" = mp.Queue()
+        self.last_errors: Dict[str, str] = {}
+        self._tasks: List["mp.Queue"] = []
+        self._processes: List[mp.Process] = []
+        for i in range(workers):
+            tasks, process = self._start(i)
+            self._tasks.append(tasks)
+            self._processes.append(process)
+
+    def _start(self, i: int) -> Tuple["mp.Queue", mp.Process]:
+        tasks: "mp.Queue" = mp.Queue()
+        process = mp.Process(
+            target=_worker,
+            args=(self.logic_name, self._shm.name, self.slot_size, tasks, self._results),
+            name="logic-worker-{}".format(i),
+            daemon=True,
+        )
+        process.start()
+        return tasks, process
+
+    def _restart_dead(self) -> None:
+        """Start a worker again in place of one that died, with fresh logics for its bots."""
+        for i, process in enumerate(self._processes):
+            if not process.is_alive():
+                self.stats.restarts += 1
+                self._tasks[i], self._processes[i] = self._start(i)
+
+    def _fallback(self, name: str) -> BaseLogic:
+        logic = self._fallbacks.get(name)
+        if logic is None:
+            logic = self._fallbacks[name] = self.fallback_class()
+        return logic
+
+    def next_moves(
+        self, board: Board, bots: Dict[str, Iterable[int]], timeout: Optional[float] = None
+    ) -> Dict[str, Tuple[int, int]]:
+        """
+        Moves for the bots named in `bots` (name -> ids of objects that bot
+        should not see), within `timeout` seconds (default: most of the
+        board's move delay).
+        """
+        deadline = monotonic() + (timeout if timeout is not None else default_timeout(board))
+        self._seq += 1
+        seq = self._seq
+        self.stats.ticks += 1
+        moves: Dict[str, Tuple[int, int]] = {}
+        answered = set()
+        failed = set()
+        try:
+            pack_board(self._shm.buf, (seq % SLOTS) * self.slot_size, seq, board)
+        except ValueError:
+            self.stats.oversize += 1
+        else:
+            self._restart_dead()
+            for name, hidden in bots.items():
+                worker = zlib.crc32(name.encode()) % len(self._tasks)
+                self._tasks[worker].put((seq, name, frozenset(hidden)))
+            while len(answered) < len(bots):
+                try:
+                    answer = self._results.get(timeout=max(0.0, deadline - monotonic()))
+                except queue.Empty:
+                    break
+                answer_seq, name, move, branch, seconds, error = answer
+                if answer_seq != seq or name not in bots:
+                    continue
+                answered.add(name)
+                if error is not None:
+                    self.stats.errors += 1
+                    self.last_errors[name] = error
+                    failed.add(name)
+                if move is not None:
+                    moves[name] = move
+                    self.last_branches[name] = branch
+                    self.stats.worker_seconds += seconds
+
+        self.stats.moves += len(bots)
+        for name, hidden in bots.items():
+            if name in moves:
+                continue
+            if name not in failed:
+                self.stats.late += 1
+            board_bot = next((b for b in board.bots if b.properties.name == name), None)
+            if board_bot is None:
+                continue
+            view = board
+            if hidden:
+                hidden = set(hidden)
+                view = Board(
+                    board.id, board.width, board.height, board.features,
+                    board.minimum_delay_between_moves,
+                    [o for o in board.game_objects if o.id not in hidden],
+                )
+            logic = self._fallback(name)
+            moves[name] = logic.next_move(board_bot, view)
+            self.last_branches[name] = "fallback"
+        return moves
+
+    def close(self) -> None:
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(1.0)
+            if process.is_alive():
+                process.terminate()
+        self._shm.close()
+        self._shm.unlink()
+
+
+class PooledLogic(BaseLogic):
+    """One bot's `next_move` through a `WorkerPool`, for the single bot loop."""
+
+    def __init__(self, pool: WorkerPool, timeout: Optional[float] = None):
+        self.pool = pool
+        self.timeout = timeout
+
+    def next_move(self, board_bot, board):
+        name = board_bot.properties.name
+        timeout = self.timeout if self.timeout is not None else default_timeout(board)
+        move = self.pool.next_moves(board, {name: ()}, timeout)[name]
+        self.last_branch = self.pool.last_branches.get(name)
+        return move
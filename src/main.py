@@ -1,22 +1,26 @@
 import argparse
-from time import sleep
+from time import monotonic, sleep, time
 
 from colorama import Back, Fore, Style, init
 from game.api import Api
 from game.board_handler import BoardHandler
+from game.board_selector import BoardSelector
+from game.broadcast import BoardBroadcast, fcntl
 from game.bot_handler import BotHandler
-from game.logic.random import RandomLogic
+from game.controllers import CONTROLLERS, get_controller
+from game.corpus import write_board
+from game.deadline import Deadline, DeadlineRunner
+from game.history import MatchHistory
+from game.moves import get_move_table
+from game.reloader import LogicReloader
+from game.workers import PooledLogic, WorkerPool
 from game.util import *
 from game.logic.base import BaseLogic
-from game.logic.gachoan import GachoanBot
+from game.logic.cache import CachedLogic
 
 init()
 BASE_URL = "http://localhost:3000/api"
 DEFAULT_BOARD_ID = 1
-CONTROLLERS = {
-    "Random": RandomLogic,
-    "GachoanBot" : GachoanBot
-}
 
 ###############################################################################
 #
@@ -39,6 +43,12 @@ parser.add_argument("--team", help="The team of the bot to register", action="st
 parser.add_argument(
     "--board", help="Id of the board to join", default=DEFAULT_BOARD_ID, action="store"
 )
+parser.add_argument(
+    "--max-bots",
+    help="Bots a board holds, used to skip full boards when --board is 0.",
+    type=int,
+    action="store",
+)
 parser.add_argument(
     "--time-factor",
     help="A factor to multiply each move command with. If you want to run the bot in a slower mode e.g. use --time-factor=5 to multiply each delay with 5.",
@@ -47,16 +57,108 @@ parser.add_argument(
 )
 parser.add_argument(
     "--logic",
-    help="The logic controller to use. Valid options are: {}".format(
+    help="The logic controller to use. Valid options are: {}, or module:Class".format(
         ", ".join(list(CONTROLLERS.keys()))
     ),
     action="store",
 )
+parser.add_argument(
+    "--decision-cache",
+    help="Max number of memoized decisions for cacheable logic controllers, 0 disables the cache.",
+    default=4096,
+    type=int,
+    action="store",
+)
+parser.add_argument(
+    "--decision-cache-radius",
+    help="Only key memoized decisions on the objects this many steps around the bot (default: the whole board).",
+    default=None,
+    type=int,
+    action="store",
+)
+parser.add_argument(
+    "--history",
+    help="SQLite file to record every tick of the game in, for later analysis (see matches.py).",
+    action="store",
+)
+parser.add_argument(
+    "--record-boards",
+    help="Append every board seen to this JSON-lines file, e.g. as a corpus for profile_logic.py.",
+    action="store",
+)
+parser.add_argument(
+    "--reload",
+    help="Reload the logic between ticks when a module in game/logic changes, keeping the board and the logic's state.",
+    action="store_true",
+)
+parser.add_argument(
+    "--logic-file",
+    help="Switch to the logic controller named in this file whenever it changes (implies --reload).",
+    action="store",
+)
+parser.add_argument(
+    "--move-budget",
+    help="Seconds the logic may think per move. Default: the board's move delay minus request latency",
+    type=float,
+    action="store",
+)
+parser.add_argument(
+    "--no-deadline",
+    help="Wait for the logic however long it takes instead of sending a fallback move at the deadline.",
+    action="store_true",
+)
+group = parser.add_argument_group("Worker processes")
+group.add_argument(
+    "--workers",
+    help="Run the logic in this many worker processes; late moves come from --fallback. Default: in process",
+    default=0,
+    type=int,
+    action="store",
+)
+group.add_argument(
+    "--fallback",
+    help="Cheap in-process logic used when the workers are late. Default: WawanMKS",
+    default="WawanMKS",
+    action="store",
+)
+group.add_argument(
+    "--worker-timeout",
+    help="Seconds to wait for the workers each tick. Default: 80%% of the board's move delay",
+    type=float,
+    action="store",
+)
+group.add_argument(
+    "--button-workers",
+    help="Sample red button resets in this many processes (logics with a button estimator). Default: in process",
+    default=0,
+    type=int,
+    action="store",
+)
+group.add_argument(
+    "--button-budget",
+    help="Seconds per tick the red button estimator may spend sampling. Default: 0.005",
+    type=float,
+    action="store",
+)
 group = parser.add_argument_group("API connection")
+group.add_argument(
+    "--give-up",
+    help="Seconds without any answer from the server before the bot stops. Default: 30",
+    default=30,
+    type=float,
+    action="store",
+)
 group.add_argument(
     "--host", action="store", default=BASE_URL, help="Default: {}".format(BASE_URL)
 )
+group.add_argument(
+    "--broadcast",
+    help="Share the board with the other bots of this host that use --broadcast: one of them downloads it, the others only send moves",
+    action="store_true",
+)
 args = parser.parse_args()
+if args.broadcast and fcntl is None:
+    parser.error("--broadcast needs a POSIX system")
 
 time_factor = int(args.time_factor)
 api = Api(args.host)
@@ -98,7 +200,8 @@ if not args.token:
 ###############################################################################
 bot = bot_handler.get_my_info(args.token)
 logic_controller = args.logic
-if logic_controller not in CONTROLLERS:
+logic_class = get_controller(logic_controller)
+if logic_class is None:
     print(
         Fore.RED
         + Style.BRIGHT
@@ -114,8 +217,31 @@ if not bot.name:
 print(Fore.BLUE + Style.BRIGHT + "Welcome back, " + Style.RESET_ALL + bot.name)
 
 # Setup variables
-logic_class = CONTROLLERS[logic_controller]
-bot_logic: BaseLogic = logic_class()
+def wrap_logic(logic: BaseLogic) -> BaseLogic:
+    if logic.cacheable and args.decision_cache > 0:
+        return CachedLogic(logic, max_size=args.decision_cache, radius=args.decision_cache_radius)
+    return logic
+
+
+pool = None
+reloader = None
+if args.workers:
+    if args.reload or args.logic_file:
+        parser.error("--reload and --logic-file need the logic in process, not --workers")
+    pool = WorkerPool(logic_controller, args.workers, args.fallback)
+    bot_logic = PooledLogic(pool, args.worker_timeout)
+else:
+    logic = logic_class()
+    bot_logic = wrap_logic(logic)
+    button_values = getattr(logic, "button_values", None)
+    if button_values is not None:
+        button_values.workers = args.button_workers
+        if args.button_budget is not None:
+            button_values.budget = args.button_budget
+    if args.reload or args.logic_file:
+        reloader = LogicReloader(logic_controller, logic, args.logic_file)
+# The worker pool enforces its own deadline
+runner = None if args.no_deadline or pool else DeadlineRunner(bot_logic)
 
 ###############################################################################
 #
@@ -125,19 +251,8 @@ bot_logic: BaseLogic = logic_class()
 current_board_id = int(args.board)
 
 if not current_board_id:
-    # List active boards to find one we can join if we haven't specified one
-    boards = board_handler.list_boards()
-    for board in boards:
-        # Try to join board
-        board_joined = False
-        current_board_id = board.id
-        success = bot_handler.join(bot.id, current_board_id)
-        if success:
-            board_joined = True
-            break
-
-    if not board_joined:
-        exit()
+    # Join the most promising of the active boards
+    current_board_id = BoardSelector(api, max_bots=args.max_bots).join(bot.id)
 else:
     # Try to join the one we specified
     success = bot_handler.join(bot.id, current_board_id)
@@ -160,8 +275,20 @@ if not current_board_id:
 # Prepare state from current board
 #
 ###############################################################################
-board = board_handler.get_board(current_board_id)
+broadcast = BoardBroadcast(board_handler, current_board_id) if args.broadcast else None
+# Where boards come from: the server, or the host's broadcast ring
+board_source = broadcast or board_handler
+board = board_source.get_board(current_board_id)
 move_delay = board.minimum_delay_between_moves / 1000
+last_contact = monotonic()
+history = MatchHistory(args.history) if args.history else None
+board_log = open(args.record_boards, "a") if args.record_boards else None
+if history:
+    game_id = history.start_game(bot.name, logic_controller, current_board_id)
+tick = 0
+# With --broadcast: when our last move was acknowledged, and our bot before it
+moved_at = None
+moved_bot = None
 
 ###############################################################################
 #
@@ -169,33 +296,100 @@ move_delay = board.minimum_delay_between_moves / 1000
 #
 ###############################################################################
 while True:
+    if broadcast:
+        # Latest board another process (or our own poller) published, once
+        # it shows our last move; the server's otherwise
+        if moved_at is None:
+            board = broadcast.get_board(current_board_id) or board
+        else:
+            board = broadcast.board_after(current_board_id, moved_at, moved_bot) or board
+
     # Find our info among the bots on the board
     board_bot = board.get_bot(bot)
     if not board_bot:
         # Managed to get game over
         break
 
+    if board_log:
+        write_board(board_log, board, bot.name)
+
+    # Not while a late search still works on the current logic's state
+    if reloader and not (runner and runner.busy):
+        logic = reloader.poll()
+        if logic:
+            # Fresh decision cache: the old one holds the old code's moves
+            bot_logic = wrap_logic(logic)
+            if runner:
+                runner.logic = bot_logic
+            swap = reloader.swaps[-1]
+            print(
+                Fore.BLUE + Style.BRIGHT + "Reloaded: " + Style.RESET_ALL
+                + "{} -> {} in {:.1f} ms, kept {}".format(
+                    swap.old, swap.new, swap.seconds * 1000, ", ".join(swap.kept) or "nothing"
+                )
+            )
+
     # Calculate next move
-    delta_x, delta_y = bot_logic.next_move(board_bot, board)
+    if runner:
+        deadline = Deadline(args.move_budget or runner.budget(board))
+        delta_x, delta_y = runner.next_move(board_bot, board, deadline)
+        branch = runner.last_branch
+    else:
+        delta_x, delta_y = bot_logic.next_move(board_bot, board)
+        branch = bot_logic.last_branch
+    if history:
+        history.record_tick(game_id, tick, board_bot, branch)
+    tick += 1
     # delta_x, delta_y = (1, 0)
     if not board.is_valid_move(board_bot.position, delta_x, delta_y):
+        fallback = get_move_table(board.width, board.height).fallback(
+            board_bot.position.x, board_bot.position.y, delta_x, delta_y
+        )
         print(
             Fore.YELLOW + Style.BRIGHT + "Warn:" + Style.RESET_ALL,
-            "Invalid move will be ignored."
-            + f" Your move: ({delta_x}, {delta_y}). Your position: ({board_bot.position.x}, {board_bot.position.y})",
+            f"Invalid move ({delta_x}, {delta_y}) at ({board_bot.position.x}, {board_bot.position.y})"
+            + (f" replaced by {fallback}." if fallback else ", no move sent (staying)."),
         )
-        sleep(1)
-        continue
+        # Staying: no move to send, but the board is read again below
+        move = fallback
+    else:
+        move = (delta_x, delta_y)
 
-    try:
-        # Try to perform move
-        board = bot_handler.move(bot.id, current_board_id, delta_x, delta_y)
-    except Exception as e:
-        break
+    # Try to perform move
+    new_board = None
+    if move is not None:
+        delta_x, delta_y = move
+        request_started = monotonic()
+        if broadcast:
+            # The board in the answer is not needed: the next one comes from the
+            # ring, once it shows this move
+            new_board = board if bot_handler.move_ack(bot.id, delta_x, delta_y) else None
+            if new_board:
+                moved_at, moved_bot = time(), board_bot
+        else:
+            new_board = bot_handler.move(bot.id, current_board_id, delta_x, delta_y)
+        clock = getattr(bot_logic, "clock", None)
+        if new_board:
+            latency = monotonic() - request_started
+            if clock is not None:
+                # Lets the logic's game clock account for request latency
+                clock.record_latency(latency)
+            if runner:
+                runner.record_latency(latency)
 
-    if not board:
+    if not new_board:
         # Read new board state
-        board = board_handler.get_board(current_board_id)
+        new_board = board_source.get_board(current_board_id)
+    if not new_board:
+        # Server unreachable: keep the last board and try again, unless it
+        # has been down for longer than we are willing to wait
+        if last_contact is not None and monotonic() - last_contact > args.give_up:
+            print(Fore.RED + Style.BRIGHT + "Error: " + Style.RESET_ALL + "Lost connection to the server")
+            break
+        sleep(move_delay)
+        continue
+    board = new_board
+    last_contact = monotonic()
 
     # Get new state
     board_bot = board.get_bot(bot)
@@ -214,3 +408,82 @@ while True:
 #
 ###############################################################################
 print(Fore.BLUE + Style.BRIGHT + "Game over!" + Style.RESET_ALL)
+api_stats = api.stats
+if api_stats.retries or api_stats.stalls or api_stats.failures:
+    print(
+        "API: {} requests, {} retries, {} stalls, {} failures, circuit opened {} times, {} resyncs".format(
+            api_stats.requests, api_stats.retries, api_stats.stalls, api_stats.failures, api_stats.circuit_opens, api_stats.resyncs
+        )
+    )
+if board_log:
+    board_log.close()
+if history:
+    history.end_game(game_id)
+    history.close()
+    print("History: {} ticks recorded in {}, {} dropped".format(tick, args.history, history.dropped))
+if runner and runner.stats.ticks:
+    deadline_stats = runner.stats
+    print(
+        "Deadlines: {} moves, {} partial, {} missed, {} overrun ({:.1%}), {:.1f} ms mean, {:.1f} ms worst".format(
+            deadline_stats.ticks, deadline_stats.partial, deadline_stats.misses, deadline_stats.overruns,
+            deadline_stats.miss_rate, deadline_stats.mean_ms, deadline_stats.worst_ms,
+        )
+    )
+if pool:
+    pool.close()
+    print(
+        "Workers: {} moves, {} late and {} failed (fallback), {} restarts, {:.1f} ms per move".format(
+            pool.stats.moves, pool.stats.late, pool.stats.errors, pool.stats.restarts, pool.stats.mean_ms
+        )
+    )
+if reloader and (reloader.swaps or reloader.errors):
+    print(
+        "Reloads: {} swaps (slowest {:.1f} ms), {} failed".format(
+            len(reloader.swaps), max((s.seconds for s in reloader.swaps), default=0) * 1000, reloader.errors
+        )
+    )
+if broadcast:
+    broadcast.close()
+    broadcast_stats = broadcast.stats
+    print(
+        "Broadcast: {} boards published, {} read from the ring ({} reused), {} waits for a fresh board, {} fetched directly, {} takeovers".format(
+            broadcast_stats.published, broadcast_stats.reads, broadcast_stats.reuses, broadcast_stats.waits,
+            broadcast_stats.fallbacks, broadcast_stats.takeovers,
+        )
+    )
+button_values = getattr(bot_logic, "button_values", None)
+if button_values is not None:
+    button_values.close()
+    if button_values.stats.estimates:
+        button_stats = button_values.stats
+        print(
+            "Red button: {} estimates, {} cached, {} short of samples, {:.1f} ms per estimate".format(
+                button_stats.estimates, button_stats.cache_hits, button_stats.partial,
+                button_stats.seconds * 1000 / button_stats.estimates,
+            )
+        )
+plans = getattr(bot_logic, "plans", None)
+if plans is not None:
+    print(
+        "Plans: {} replans, {} reused, invalidated {}".format(
+            plans.replans, plans.reuses, plans.invalidations or "never"
+        )
+    )
+pipeline = getattr(bot_logic, "pipeline", None)
+rule_summary = pipeline.summary() if pipeline is not None else []
+if rule_summary:
+    print(
+        "Rules (fired/evaluated, ms per evaluation): {}".format(
+            ", ".join(
+                "{} {}/{} {:.2f}".format(name, rule_stats.fired, rule_stats.evaluated, rule_stats.seconds * 1000 / rule_stats.evaluated)
+                for name, rule_stats in rule_summary
+            )
+        )
+    )
+if isinstance(bot_logic, CachedLogic):
+    stats = bot_logic.stats
+    print(
+        "Decision cache: {} hits, {} misses, {} bypassed ({:.1%} hit rate)".format(
+            stats.hits, stats.misses, stats.bypasses, stats.hit_rate
+        )
+    )
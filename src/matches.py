@@ -0,0 +1,32 @@
+import argparse
+
+from colorama import Style, init
+from game.history import HistoryQuery
+
+init()
+parser = argparse.ArgumentParser(description="Aggregates over games recorded with main.py --history")
+parser.add_argument("db", help="SQLite file written by main.py --history")
+parser.add_argument("--game", help="Only this game id (default: all games)")
+parser.add_argument("--games", action="store_true", help="List the recorded games")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    query = HistoryQuery(args.db)
+
+    if args.games:
+        for game_id, started, bot, logic, board_id, ticks, score in query.games():
+            print("{}  {:<16} {:<14} board {}  {} ticks  score {}".format(game_id, bot, logic, board_id, ticks, score))
+        print()
+
+    print(Style.BRIGHT + "{:<18} {:>9} {:>9} {:>7}".format("Branch", "Decisions", "Collected", "Banked") + Style.RESET_ALL)
+    for stats in query.points_per_branch(args.game):
+        print("{:<18} {:>9} {:>9} {:>7}".format(stats.branch, stats.decisions, stats.diamonds_gained, stats.points_banked))
+
+    tackles = query.tackle_losses(args.game)
+    print()
+    print(
+        "Tackled {} times: {} diamonds lost, {} steps back from base".format(
+            tackles.tackles, tackles.diamonds_lost, tackles.steps_lost
+        )
+    )
+    query.close()
@@ -0,0 +1,170 @@
+import argparse
+import cProfile
+import os
+import pstats
+import sys
+import tracemalloc
+from collections import Counter
+from itertools import islice
+from time import perf_counter_ns
+from typing import List, Optional, Tuple
+
+from colorama import Style, init
+from game.controllers import CONTROLLERS, get_controller
+from game.corpus import read_corpus
+from game.generator import SCENARIOS, stream_scenarios
+from game.models import Board
+
+init()
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_boards(args) -> List[Tuple[Optional[str], Board]]:
+    if args.corpus:
+        return list(islice(read_corpus(args.corpus), args.boards))
+    return [(None, board) for board in stream_scenarios(args.boards, args.seed, SCENARIOS[args.scenario])]
+
+
+def play(logic, boards) -> int:
+    """Run `next_move` for every recorded bot (all bots of synthetic boards)."""
+    decisions = 0
+    for name, board in boards:
+        for bot in board.bots:
+            if name is None or bot.properties.name == name:
+                logic.next_move(bot, board)
+                decisions += 1
+    return decisions
+
+
+def _label(code) -> str:
+    path = os.path.relpath(code.co_filename, SOURCE_DIR) if code.co_filename.startswith(SOURCE_DIR) else os.path.basename(code.co_filename)
+    return "{}:{}".format(path, getattr(code, "co_qualname", code.co_name))
+
+
+class StackCollector:
+    """`sys.setprofile` hook that adds up self time per call stack."""
+
+    def __init__(self):
+        self.stack: List[str] = []
+        self.times: Counter = Counter()
+        self.last = perf_counter_ns()
+
+    def __call__(self, frame, event, arg):
+        now = perf_counter_ns()
+        if self.stack:
+            self.times[";".join(self.stack)] += now - self.last
+        if event == "call":
+            self.stack.append(_label(frame.f_code))
+        elif event == "c_call":
+            self.stack.append("<builtin>:{}".format(getattr(arg, "__qualname__", repr(arg))))
+        elif self.stack:
+            self.stack.pop()
+        self.last = perf_counter_ns()
+
+
+def profile_calls(logic_class, boards, args) -> None:
+    profiler = cProfile.Profile()
+    profiler.enable()
+    decisions = play(logic_class(), boards)
+    profiler.disable()
+    profiler.dump_stats(args.output + ".prof")
+
+    stats = pstats.Stats(profiler)
+    print(Style.BRIGHT + "{} decisions, {:.2f} ms each".format(decisions, stats.total_tt * 1000 / max(1, decisions)) + Style.RESET_ALL)
+    print()
+    print(Style.BRIGHT + "{:<60} {:>12} {:>10} {:>10}".format("Helper", "calls/move", "own ms", "cum ms") + Style.RESET_ALL)
+    helpers = [
+        (key, value)
+        for key, value in stats.stats.items()
+        if key[0].startswith(SOURCE_DIR) and not key[0].endswith(os.path.basename(__file__))
+    ]
+    helpers.sort(key=lambda item: item[1][1], reverse=True)
+    for (filename, lineno, name), (_, calls, own, cumulative, _) in helpers[: args.top]:
+        where = "{}:{} {}".format(os.path.relpath(filename, SOURCE_DIR), lineno, name)
+        print(
+            "{:<60} {:>12.1f} {:>10.1f} {:>10.1f}".format(
+                where[-60:], calls / max(1, decisions), own * 1000, cumulative * 1000
+            )
+        )
+
+
+def profile_stacks(logic_class, boards, args) -> None:
+    collector = StackCollector()
+    sys.setprofile(collector)
+    try:
+        play(logic_class(), boards)
+    finally:
+        sys.setprofile(None)
+    with open(args.output + ".collapsed", "w") as f:
+        for stack, ns in collector.times.items():
+            if ns // 1000:
+                f.write("{} {}\n".format(stack, ns // 1000))
+
+
+def profile_rules(logic_class, boards, args) -> None:
+    """Hit rate and cost of each rule and fact, for logics built on `game.logic.pipeline`."""
+    logic = logic_class()
+    pipeline = getattr(logic, "pipeline", None)
+    if pipeline is None:
+        return
+    decisions = play(logic, boards)
+    print()
+    print(Style.BRIGHT + "{:<20} {:>12} {:>10} {:>14} {:>10}".format("Rule", "evals/move", "hit rate", "us per eval", "ms") + Style.RESET_ALL)
+    for name, stats in pipeline.summary():
+        print(
+            "{:<20} {:>12.2f} {:>10.1%} {:>14.1f} {:>10.1f}".format(
+                name, stats.evaluated / max(1, decisions), stats.hit_rate,
+                stats.seconds * 1e6 / stats.evaluated, stats.seconds * 1000,
+            )
+        )
+    print()
+    print(Style.BRIGHT + "{:<20} {:>12} {:>14} {:>10}".format("Fact", "computed/move", "us each", "ms") + Style.RESET_ALL)
+    for name, stats in pipeline.fact_stats.items():
+        if stats.computed:
+            print(
+                "{:<20} {:>12.2f} {:>14.1f} {:>10.1f}".format(
+                    name, stats.computed / max(1, decisions), stats.seconds * 1e6 / stats.computed, stats.seconds * 1000
+                )
+            )
+
+
+def profile_memory(logic_class, boards, args) -> None:
+    tracemalloc.start(10)
+    play(logic_class(), boards)
+    snapshot = tracemalloc.take_snapshot()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    snapshot = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)])
+    print()
+    print(Style.BRIGHT + "Memory: {:.1f} KiB still allocated, {:.1f} KiB peak".format(current / 1024, peak / 1024) + Style.RESET_ALL)
+    for stat in snapshot.statistics("lineno")[: args.top]:
+        frame = stat.traceback[0]
+        print("{:>10.1f} KiB {:>8} blocks  {}:{}".format(stat.size / 1024, stat.count, frame.filename, frame.lineno))
+
+
+parser = argparse.ArgumentParser(description="Profile a logic controller's next_move")
+parser.add_argument("logic", help="One of {}, or module:Class".format(", ".join(CONTROLLERS)))
+parser.add_argument("--corpus", help="Boards recorded with main.py --record-boards (default: synthetic boards)")
+parser.add_argument("--scenario", choices=list(SCENARIOS), default="default", help="Synthetic boards to use without --corpus")
+parser.add_argument("--boards", type=int, default=500, help="Max number of boards to play")
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--top", type=int, default=20, help="Rows per table")
+parser.add_argument("--output", default="profile", help="Prefix of the .prof and .collapsed files")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    logic_class = get_controller(args.logic)
+    if logic_class is None:
+        parser.error("unknown logic {}".format(args.logic))
+    boards = load_boards(args)
+
+    # Separate runs: each instrument distorts the timings of the others
+    profile_calls(logic_class, boards, args)
+    profile_rules(logic_class, boards, args)
+    profile_stacks(logic_class, boards, args)
+    profile_memory(logic_class, boards, args)
+    print()
+    print(
+        "Wrote {0}.prof (pstats, e.g. snakeviz) and {0}.collapsed (flamegraph.pl / speedscope)".format(args.output)
+    )
@@ -0,0 +1,107 @@
+import argparse
+from time import sleep
+
+from colorama import Fore, Style, init
+from game.api import Api
+from game.board_handler import BoardHandler
+from game.bot_handler import BotHandler
+from game.controllers import CONTROLLERS, get_controller
+from game.moves import get_move_table
+from game.team import TeamEngine
+from game.workers import WorkerPool
+
+init()
+BASE_URL = "http://localhost:3000/api"
+DEFAULT_BOARD_ID = 1
+
+###############################################################################
+#
+# Parse command line arguments
+#
+###############################################################################
+parser = argparse.ArgumentParser(
+    description="Run several registered bots on one board from a single process"
+)
+parser.add_argument(
+    "--tokens", help="Comma separated tokens of already registered bots", required=True
+)
+parser.add_argument(
+    "--logic",
+    help="The logic controller for every bot. Valid options are: {}, or module:Class".format(
+        ", ".join(CONTROLLERS)
+    ),
+    default="GachoanBot",
+)
+parser.add_argument("--board", help="Id of the board to join", default=DEFAULT_BOARD_ID)
+parser.add_argument("--time-factor", default=1, help="Multiply each move delay with this")
+parser.add_argument("--host", default=BASE_URL, help="Default: {}".format(BASE_URL))
+parser.add_argument("--workers", type=int, default=0, help="Run the logics in this many worker processes")
+parser.add_argument("--fallback", default="WawanMKS", help="In-process logic for moves the workers deliver late")
+parser.add_argument("--worker-timeout", type=float, help="Seconds to wait for the workers (default: 80%% of the move delay)")
+args = parser.parse_args()
+
+logic_class = get_controller(args.logic)
+if logic_class is None:
+    print(Fore.RED + Style.BRIGHT + "Error: " + Style.RESET_ALL + "Invalid logic controller")
+    exit(1)
+
+api = Api(args.host)
+bot_handler = BotHandler(api)
+board_handler = BoardHandler(api)
+board_id = int(args.board)
+
+###############################################################################
+#
+# Setup bots and join the board
+#
+###############################################################################
+bots = {}
+for token in [t for t in args.tokens.split(",") if t]:
+    bot = bot_handler.get_my_info(token)
+    if not bot or not bot.name:
+        print(Fore.RED + Style.BRIGHT + "Error: " + Style.RESET_ALL + "Bot {} does not exist".format(token))
+        exit(1)
+    if not bot_handler.join(bot.id, board_id):
+        print(Fore.YELLOW + Style.BRIGHT + "Warn: " + Style.RESET_ALL + "{} could not join board {}".format(bot.name, board_id))
+    bots[bot.name] = bot
+
+pool = WorkerPool(args.logic, args.workers, args.fallback) if args.workers else None
+engine = TeamEngine({name: logic_class() for name in bots}, pool=pool, timeout=args.worker_timeout)
+board = board_handler.get_board(board_id)
+move_delay = board.minimum_delay_between_moves / 1000
+move_table = get_move_table(board.width, board.height)
+
+###############################################################################
+#
+# Game play loop: one board analysis, one batch of moves per round
+#
+###############################################################################
+while True:
+    moves = engine.next_moves(board)
+    if not moves:
+        break
+
+    for name, (delta_x, delta_y) in moves.items():
+        board_bot = board.get_bot(bots[name])
+        if not board_bot:
+            continue
+        move = move_table.fallback(board_bot.position.x, board_bot.position.y, delta_x, delta_y)
+        if move is None:
+            continue
+        delta_x, delta_y = move
+        new_board = bot_handler.move(bots[name].id, board_id, delta_x, delta_y)
+        if new_board:
+            board = new_board
+
+    sleep(move_delay * int(args.time_factor))
+    board = board_handler.get_board(board_id) or board
+
+print(Fore.BLUE + Style.BRIGHT + "Game over!" + Style.RESET_ALL)
+if pool:
+    pool.close()
+    stats = pool.stats
+    print(
+        "Workers: {} moves, {} late (fallback), {:.1f} ms per move, {} boards too large".format(
+            stats.moves, stats.late, stats.mean_ms, stats.oversize
+        )
+    )
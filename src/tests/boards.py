@@ -0,0 +1,57 @@
+from typing import List, Optional, Tuple
+
+from game.models import Base, Board, GameObject, Position, Properties
+
+# Small builders for hand-made boards; positions are (x, y) like the moves
+
+
+def bot(
+    id: int,
+    x: int,
+    y: int,
+    base: Optional[Tuple[int, int]] = None,
+    diamonds: int = 0,
+    score: int = 0,
+    name: Optional[str] = None,
+    inventory_size: int = 5,
+    milliseconds_left: Optional[int] = None,
+    can_tackle: Optional[bool] = None,
+) -> GameObject:
+    bx, by = base if base is not None else (x, y)
+    return GameObject(
+        id,
+        Position(y, x),
+        "BotGameObject",
+        Properties(
+            diamonds=diamonds,
+            score=score,
+            name=name or "bot{}".format(id),
+            inventory_size=inventory_size,
+            can_tackle=can_tackle,
+            milliseconds_left=milliseconds_left,
+            base=Base(by, bx),
+        ),
+    )
+
+
+def diamond(id: int, x: int, y: int, points: int = 1) -> GameObject:
+    return GameObject(id, Position(y, x), "DiamondGameObject", Properties(points=points))
+
+
+def teleporter(id: int, x: int, y: int, pair_id: Optional[str] = None) -> GameObject:
+    return GameObject(id, Position(y, x), "TeleportGameObject", Properties(pair_id=pair_id))
+
+
+def button(id: int, x: int, y: int) -> GameObject:
+    return GameObject(id, Position(y, x), "DiamondButtonGameObject", Properties())
+
+
+def board(objects: List[GameObject], width: int = 10, height: int = 10, delay: int = 1000, id: int = 1) -> Board:
+    return Board(
+        id=id,
+        width=width,
+        height=height,
+        features=[],
+        minimum_delay_between_moves=delay,
+        game_objects=list(objects),
+    )
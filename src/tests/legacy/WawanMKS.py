@@ -0,0 +1,264 @@
+# WawanMKS as it was before its rules moved onto game.logic.pipeline, kept
+# as the reference for tests/test_pipeline.py
+from typing import Optional, List
+import random
+from game.logic.base import BaseLogic
+from game.clock import GameClock
+from game.models import GameObject, Board, Position
+from game.teleport import get_teleporter_graph
+from game.threat import ThreatMap, threat_sources
+from game.rules import inventory_size
+from game.util import get_direction # Pastikan path import ..util sudah benar
+
+class WawanMKS(BaseLogic):
+    # Keputusan murni fungsi dari board, aman untuk di-cache
+    cacheable = True
+    # State yang dibawa ke instance baru saat logic di-reload
+    persistent_state = ("goal", "clock", "time_left", "threat")
+
+    def __init__(self):
+        self.goal: Optional[Position] = None
+        self.threat = ThreatMap()
+        self.clock = GameClock()
+        self.time_left = 999
+        # Anda bisa menambahkan variabel untuk persistensi goal jika diperlukan
+        # self.goal_persistence_counter = 0
+        # self.MAX_GOAL_PERSISTENCE = 2 
+
+    def distance(self, A: Position, B: Position) -> int:
+        """Menghitung jarak Manhattan antara dua posisi."""
+        return abs(A.x - B.x) + abs(A.y - B.y)
+
+    def get_teleporters(self, board: Board) -> List[GameObject]:
+        """Mendapatkan semua objek teleporter di board."""
+        return [obj for obj in board.game_objects if obj.type == "TeleportGameObject"]
+
+    def distance_with_teleporter(self, start: Position, end: Position, board: Board) -> int:
+        """
+        Menghitung jarak terpendek antara start dan end, mempertimbangkan penggunaan teleporter.
+        Teleporter masuk hanya keluar di pasangannya (pair_id); teleport berantai juga diperhitungkan.
+        Graf teleporter dibangun sekali per board dan di-cache antar tick, sehingga query O(1).
+        """
+        return get_teleporter_graph(board).distance(start, end)
+
+    def get_best_teleport_or_base(self, bot_pos: Position, base_pos: Position, board: Board) -> Position:
+        """
+        Menentukan posisi target langkah berikutnya untuk mencapai base_pos,
+        mempertimbangkan perjalanan langsung atau menggunakan pasangan teleporter.
+        Mengembalikan base_pos itu sendiri, atau posisi teleporter masuk yang optimal.
+        """
+        return get_teleporter_graph(board).next_waypoint(bot_pos, base_pos)
+
+    def get_closest_diamond(self, bot: GameObject, board: Board, red_only=False, blue_only=False) -> Optional[GameObject]:
+        """
+        Mencari diamond terdekat yang bisa diambil bot sesuai dengan kapasitas dan filter warna.
+        """
+        diamonds_found = []
+        MAX_DIAMOND_CAPACITY = inventory_size(bot) # inventory_size dari server, fallback ke 5
+        current_diamonds_held = bot.properties.diamonds
+
+        for d_obj in board.diamonds:
+            diamond_points = d_obj.properties.points
+            
+            target_this_diamond_type = False
+            if red_only:
+                if diamond_points == 2: target_this_diamond_type = True
+            elif blue_only:
+                if diamond_points == 1: target_this_diamond_type = True
+            else: # Cari semua jenis jika tidak ada filter spesifik
+                target_this_diamond_type = True
+
+            if target_this_diamond_type:
+                can_hold = False
+                if diamond_points == 2 and (current_diamonds_held + 2 <= MAX_DIAMOND_CAPACITY):
+                    can_hold = True
+                elif diamond_points == 1 and (current_diamonds_held + 1 <= MAX_DIAMOND_CAPACITY):
+                    can_hold = True
+                
+                if can_hold:
+                    diamonds_found.append(d_obj)
+        
+        if not diamonds_found:
+            return None
+
+        closest_diamond_obj = diamonds_found[0]
+        min_dist_to_diamond = self.distance(bot.position, closest_diamond_obj.position)
+
+        for d_obj in diamonds_found[1:]:
+            dist = self.distance(bot.position, d_obj.position)
+            if dist < min_dist_to_diamond:
+                closest_diamond_obj = d_obj
+                min_dist_to_diamond = dist
+        return closest_diamond_obj
+
+    def find_enemy_to_tackle(self, bot: GameObject, board: Board) -> Optional[Position]:
+        """Mencari musuh pada jarak 2 yang membawa >= 2 diamond untuk didekati."""
+        for enemy in board.bots:
+            if enemy.id != bot.id and self.distance(bot.position, enemy.position) == 2:
+                if getattr(enemy.properties, "diamonds", 0) >= 2: # Musuh membawa setidaknya 2 diamond
+                    return enemy.position # Target adalah posisi musuh saat ini untuk bergerak ke arahnya
+        return None
+
+    def get_red_button(self, board: Board) -> Optional[GameObject]:
+        """Mendapatkan objek Tombol Merah (Diamond Button) di board."""
+        for obj in board.game_objects:
+            if obj.type == "DiamondButtonGameObject":
+                return obj
+        return None
+
+    def observe(self, bot: GameObject, board: Board) -> None:
+        self.threat.update(board, threat_sources(board, bot))
+        # Sisa waktu dalam langkah, dihitung dari milliseconds_left milik bot
+        self.clock.observe(bot, board)
+        self.time_left = self.clock.remaining_moves()
+
+    def decision_state(self, bot: GameObject, board: Board):
+        """Sisa waktu hanya berpengaruh jika cukup kecil untuk memicu Greedy by Return."""
+        time_horizon = board.width + board.height + 4
+        return self.time_left if self.time_left <= time_horizon else None
+
+    def next_move(self, bot: GameObject, board: Board) -> tuple[int, int]:
+        self.observe(bot, board)
+        return self.decide(bot, board)
+
+    def decide(self, bot: GameObject, board: Board) -> tuple[int, int]:
+        props = bot.properties
+        pos = bot.position
+        base = props.base
+        time_left = self.time_left # Waktu tersisa dalam game (langkah)
+        current_diamonds = props.diamonds
+        MAX_DIAMOND_CAPACITY = inventory_size(bot)
+
+        current_turn_goal_pos: Optional[Position] = None
+
+        # --- STRATEGI PRIORITAS TINGGI (Bisa langsung return) ---
+
+        # 1. Greedy by Escape: Jika membawa diamond cukup banyak (>=3) dan musuh yang berbahaya
+        #    (membawa sedikit diamond) bisa mencapai petak kita dalam <=2 langkah,
+        #    lari ke base menggunakan rute tercepat (termasuk teleporter).
+        if current_diamonds >= 3 and self.threat.steps_to(pos) <= 2:
+            self.goal = self.get_best_teleport_or_base(pos, base, board)
+            return self.threat.safer_direction(pos, self.goal)
+
+        # 2. Greedy by Return (Waktu Kritis): Jika waktu hampir habis, kembali ke base.
+        #    Buffer waktu memastikan bot tidak terjebak.
+        safe_time_buffer_steps = 4 # Buffer langkah aman untuk kembali ke base
+        effective_steps_to_base = self.distance_with_teleporter(pos, base, board) # Jarak minimum ke base (bisa via TP)
+        
+        if current_diamonds > 0 and (time_left <= effective_steps_to_base + safe_time_buffer_steps):
+            # Bot membawa diamond dan waktu mepet, jadi pulang adalah prioritas untuk skor.
+            self.goal = self.get_best_teleport_or_base(pos, base, board)
+            # print(f"BOT DEBUG: Time critical & profitable return. Diamonds: {current_diamonds}, Time Left: {time_left}, Steps to Base: {effective_steps_to_base}")
+            return get_direction(pos.x, pos.y, self.goal.x, self.goal.y)
+
+        # --- PENETAPAN TUJUAN STRATEGIS (Jika tidak ada override darurat) ---
+
+        # 3. Greedy by Tackle (Langsung):
+        #    Jika musuh dengan >= 2 diamond berada di petak sebelah (jarak 1).
+        #    Lakukan tackle jika bot membawa sedikit diamond ATAU musuh kaya, agar risiko sepadan.
+        if not current_turn_goal_pos:
+            for enemy_bot in board.bots:
+                if enemy_bot.id != bot.id and \
+                   self.distance(pos, enemy_bot.position) == 1 and \
+                   getattr(enemy_bot.properties, "diamonds", 0) >= 2:
+                    # Tackle jika bot miskin (kurang dari 2 diamond) ATAU musuh sangat kaya
+                    if current_diamonds < 2 or getattr(enemy_bot.properties, "diamonds", 0) >= (MAX_DIAMOND_CAPACITY -1) :
+                        current_turn_goal_pos = enemy_bot.position # Bergerak ke petak musuh untuk tackle
+                        break
+        
+        # 4. Greedy by Inventory Full: Jika inventory penuh, kembali ke base.
+        if not current_turn_goal_pos:
+            if current_diamonds >= MAX_DIAMOND_CAPACITY:
+                current_turn_goal_pos = self.get_best_teleport_or_base(pos, base, board)
+
+        # 5. Greedy by Red Button:
+        #    Pertimbangkan menekan tombol jika diamond langka atau tombol adalah opsi yang jauh lebih baik.
+        if not current_turn_goal_pos:
+            red_button_obj = self.get_red_button(board)
+            if red_button_obj:
+                press_button = False
+                diamonds_on_board_count = len(board.diamonds)
+                # Kondisi untuk menekan tombol:
+                if diamonds_on_board_count == 0 and current_diamonds < MAX_DIAMOND_CAPACITY: # Tidak ada diamond, bot tidak penuh
+                     press_button = True
+                elif diamonds_on_board_count < 4 and current_diamonds < MAX_DIAMOND_CAPACITY -1 : # Diamond sedikit, bot punya ruang
+                    press_button = True
+                elif diamonds_on_board_count < 8 and current_diamonds < (MAX_DIAMOND_CAPACITY // 2): # Diamond sedang, bot masih kosong
+                    closest_any_diamond = self.get_closest_diamond(bot, board) # Cek diamond terdekat (semua jenis)
+                    if closest_any_diamond:
+                        # Tekan jika tombol jauh lebih dekat daripada diamond atau diamond jauh
+                        if self.distance(pos, red_button_obj.position) < self.distance(pos, closest_any_diamond.position) - 2 or \
+                           self.distance(pos, closest_any_diamond.position) > 7:
+                            press_button = True
+                    else: # Tidak ada diamond yang bisa diambil, tombol jadi pilihan
+                        press_button = True
+                
+                if press_button:
+                    current_turn_goal_pos = red_button_obj.position
+        
+        # 6. Greedy by Tackle (Proaktif):
+        #    Jika tidak membawa terlalu banyak diamond, dan ada musuh yang rentan (>=2 diamond) pada jarak 2.
+        if not current_turn_goal_pos:
+            # Jangan terlalu agresif jika membawa banyak diamond (misalnya, kurang dari separuh kapasitas)
+            if current_diamonds < MAX_DIAMOND_CAPACITY - (MAX_DIAMOND_CAPACITY // 2) +1 : 
+                proactive_tackle_target_pos = self.find_enemy_to_tackle(bot, board) # Sudah cek diamond musuh >= 2
+                if proactive_tackle_target_pos:
+                    current_turn_goal_pos = proactive_tackle_target_pos # Bergerak menuju musuh
+        
+        # 7. Greedy by Diamond Collection:
+        if not current_turn_goal_pos:
+            red_diamond_obj = self.get_closest_diamond(bot, board, red_only=True) # Cek kapasitas untuk merah
+            blue_diamond_obj = self.get_closest_diamond(bot, board, blue_only=True) # Cek kapasitas untuk biru
+
+            # Skenario A: Bot hampir penuh (misalnya, butuh 1-2 poin untuk maks)
+            if current_diamonds >= MAX_DIAMOND_CAPACITY - 2: # Jika kapasitas 5, berarti punya 3 atau 4 diamond
+                # Prioritaskan merah jika muat dan cukup dekat (misal, jarak <= 5)
+                if red_diamond_obj and self.distance(pos, red_diamond_obj.position) <= 5: # Kapasitas sudah dicek di get_closest_diamond
+                    current_turn_goal_pos = red_diamond_obj.position
+                # Atau, jika biru muat (berarti bot punya 4, butuh 1) dan dekat
+                elif blue_diamond_obj and self.distance(pos, blue_diamond_obj.position) <= 4:
+                    current_turn_goal_pos = blue_diamond_obj.position
+                # Jika tidak bisa top-up dengan diamond terdekat, kembali ke base
+                else:
+                    current_turn_goal_pos = self.get_best_teleport_or_base(pos, base, board)
+            
+            # Skenario B: Bot punya lebih banyak kapasitas
+            else:
+                can_take_red = red_diamond_obj is not None
+                can_take_blue = blue_diamond_obj is not None
+
+                if can_take_red and can_take_blue:
+                    dist_red = self.distance(pos, red_diamond_obj.position)
+                    dist_blue = self.distance(pos, blue_diamond_obj.position)
+                    # Prioritaskan merah jika tidak terlalu jauh lebih dari biru (misal, selisih jarak <= 2)
+                    # atau jika merah secara signifikan lebih berharga (2 vs 1).
+                    if dist_red <= dist_blue + 2: 
+                        current_turn_goal_pos = red_diamond_obj.position
+                    else:
+                        current_turn_goal_pos = blue_diamond_obj.position
+                elif can_take_red:
+                    current_turn_goal_pos = red_diamond_obj.position
+                elif can_take_blue:
+                    current_turn_goal_pos = blue_diamond_obj.position
+                # Jika tidak ada diamond yang bisa diambil (kosong atau tidak muat)
+                else:
+                    current_turn_goal_pos = self.get_best_teleport_or_base(pos, base, board)
+
+        # 8. Aksi Default: Jika tidak ada tujuan spesifik dari strategi di atas, bergerak menuju base.
+        if not current_turn_goal_pos:
+            current_turn_goal_pos = self.get_best_teleport_or_base(pos, base, board)
+
+        # --- PENYESUAIAN AKHIR ---
+        self.goal = current_turn_goal_pos # Tetapkan goal yang dipilih untuk giliran ini
+
+        # 9. Kembali ke Base Opportunistik: Jika bot berada di sebelah base-nya dan membawa diamond,
+        #    prioritaskan untuk menaruh diamond tersebut.
+        if self.goal != base and self.distance(pos, base) == 1 and current_diamonds > 0:
+            self.goal = base
+
+        # Failsafe: Pastikan goal selalu ada (seharusnya sudah dicakup oleh aksi default)
+        if not self.goal:
+            self.goal = base # Jika karena suatu hal goal belum ter-set, default ke base.
+            
+        delta_x, delta_y = get_direction(pos.x, pos.y, self.goal.x, self.goal.y)
+        return delta_x, delta_y
\ No newline at end of file
@@ -0,0 +1,456 @@
+# GachoanBot as it was before its rules moved onto game.logic.pipeline, with
+# the later route-following fix to its plan rule, kept as the reference for
+# tests/test_pipeline.py
+from typing import Optional, List, Tuple, Dict
+import random
+from game.logic.base import BaseLogic
+from game.logic.params import GachoanParams
+from game.bitboard import get_bitboards, popcount
+from game.button import ButtonEstimator
+from game.clock import GameClock
+from game.endgame import EndgameSolver
+from game.models import GameObject, Board, Position
+from game.opponent import OpponentModel
+from game.plan import PlanCache
+from game.teleport import get_teleporter_graph
+from game.threat import ThreatMap, threat_sources
+from game.rules import inventory_size
+from game.util import get_direction
+
+class GachoanBot(BaseLogic): 
+    # Keputusan deterministik dari board + prediksi lawan (lihat decision_state)
+    cacheable = True
+
+    # Horizon prediksi posisi lawan (dalam langkah) untuk disrupsi red button
+    OPPONENT_PREDICTION_HORIZON = 2
+
+    # State yang dibawa ke instance baru saat logic di-reload
+    persistent_state = ("goal", "clock", "time_left", "opponents", "threat", "plans", "button_values")
+
+    def __init__(self, params: Optional[GachoanParams] = None):
+        super().__init__()
+        self.params = params or GachoanParams()
+        self.goal: Optional[Position] = None
+        self.clock = GameClock()
+        self.time_left = 999
+        self.opponents = OpponentModel()
+        self.threat = ThreatMap()
+        # Tujuan diamond dipertahankan antar tick sampai ada kejadian yang membatalkannya
+        self.plans = PlanCache()
+        # Rute eksak untuk langkah-langkah terakhir (anggaran komputasi dibatasi per tick)
+        self.endgame = EndgameSolver()
+        # Nilai reset red button (Monte Carlo), anggaran waktu dibatasi per tick
+        self.button_values = ButtonEstimator()
+
+    def predicted_position(self, enemy_bot: GameObject, steps: int = 1) -> Position:
+        """Posisi lawan `steps` langkah ke depan menurut model lawan (fallback: posisi sekarang)."""
+        predicted = self.opponents.predict(enemy_bot.id, steps)
+        return predicted if predicted is not None else enemy_bot.position
+
+    def distance(self, pos_a: Position, pos_b: Position) -> int:
+        return abs(pos_a.x - pos_b.x) + abs(pos_a.y - pos_b.y)
+
+    def get_teleporters(self, board: Board) -> List[GameObject]:
+        return [obj for obj in board.game_objects if obj.type == "TeleportGameObject"]
+
+    def distance_with_teleporter(self, start: Position, end: Position, board: Board) -> int:
+        # Graf teleporter (semua pasangan berdasarkan pair_id, termasuk teleport berantai) di-cache antar tick
+        return get_teleporter_graph(board).distance(start, end)
+
+    def get_best_teleport_or_target(self, bot_pos: Position, target_dest: Position, board: Board) -> Position:
+        return get_teleporter_graph(board).next_waypoint(bot_pos, target_dest)
+
+    def get_closest_diamond(self, bot: GameObject, board: Board, red_only: bool = False, blue_only: bool = False) -> Optional[GameObject]:
+        diamonds_found: List[GameObject] = []
+        MAX_DIAMOND_CAPACITY = inventory_size(bot)
+        current_diamonds_held = bot.properties.diamonds
+        bot_pos = bot.position
+
+        for d_obj in board.diamonds:
+            diamond_points = d_obj.properties.points
+            target_this_diamond_type = False
+            if red_only:
+                if diamond_points == 2: target_this_diamond_type = True
+            elif blue_only:
+                if diamond_points == 1: target_this_diamond_type = True
+            else:
+                target_this_diamond_type = True
+
+            if target_this_diamond_type:
+                can_hold = False
+                if diamond_points == 2 and (current_diamonds_held + 2 <= MAX_DIAMOND_CAPACITY):
+                    can_hold = True
+                elif diamond_points == 1 and (current_diamonds_held + 1 <= MAX_DIAMOND_CAPACITY):
+                    can_hold = True
+                if can_hold:
+                    diamonds_found.append(d_obj)
+        
+        if not diamonds_found: return None
+        closest_diamond_obj: Optional[GameObject] = None
+        min_effective_dist_to_diamond = float('inf')
+
+        for d_obj in diamonds_found:
+            effective_dist = self.distance_with_teleporter(bot_pos, d_obj.position, board)
+            if current_diamonds_held > 0:
+                # Diamond di area rawan tackle lebih "mahal" saat kita membawa diamond
+                effective_dist += self.threat.cost(d_obj.position)
+            if effective_dist < min_effective_dist_to_diamond:
+                closest_diamond_obj = d_obj
+                min_effective_dist_to_diamond = effective_dist
+        return closest_diamond_obj
+
+    def get_red_button(self, board: Board) -> Optional[GameObject]:
+        for obj in board.game_objects:
+            if obj.type == "DiamondButtonGameObject":
+                return obj
+        return None
+
+    def get_game_status_info(self, bot: GameObject, board: Board) -> Dict:
+        """
+        Menganalisis status permainan relatif terhadap lawan.
+        Membutuhkan `bot.properties.score` untuk berfungsi optimal.
+        """
+        my_score = getattr(bot.properties, "score", 0)
+        highest_opponent_score = 0
+        total_bots = len(board.bots)
+        
+        # Informasi untuk disrupsi red button (sederhana)
+        # Cek apakah ada lawan dengan banyak diamond dekat cluster diamond
+        opponent_primed_for_big_score = False
+        if total_bots > 1:
+            bitboards = get_bitboards(board)
+            for obot in board.bots:
+                if obot.id != bot.id:
+                    obot_diamonds = getattr(obot.properties, "diamonds", 0)
+                    # Jika ada lawan bawa banyak diamond dan dekat dengan >1 diamond lain (indikasi cluster)
+                    if obot_diamonds >= 3: # Lawan bawa cukup banyak
+                        # Gunakan posisi prediksi lawan, bukan posisi saat ini
+                        obot_future_pos = self.predicted_position(obot, self.OPPONENT_PREDICTION_HORIZON)
+                        # Petak berisi diamond dalam radius 3: satu AND + popcount pada bitboard
+                        close_diamonds_to_opponent = bitboards.within(bitboards.diamonds, obot_future_pos, 3)
+                        if close_diamonds_to_opponent >= 2: # Lawan dekat dengan setidaknya 2 diamond
+                            opponent_primed_for_big_score = True
+                            break # Cukup satu kondisi terpenuhi
+
+        analysis = getattr(board, "analysis", None)
+        if analysis is not None:
+            # Ringkasan lawan sudah dihitung sekali oleh TeamEngine untuk seluruh tim
+            highest_opponent_score = analysis.opponent_summary.highest_score
+        elif total_bots > 1:
+            for obot in board.bots:
+                if obot.id != bot.id:
+                    opponent_score = getattr(obot.properties, "score", 0)
+                    if opponent_score > highest_opponent_score:
+                        highest_opponent_score = opponent_score
+        
+        am_i_leading = my_score > highest_opponent_score if total_bots > 1 else True
+        # Jika tidak ada lawan, atau skor sama, anggap tidak ada lead margin spesifik yang perlu dikejar/diamankan
+        lead_margin = my_score - highest_opponent_score if total_bots > 1 and my_score != highest_opponent_score else float('inf')
+
+
+        return {
+            "my_score": my_score,
+            "highest_opponent_score": highest_opponent_score,
+            "am_i_leading": am_i_leading,
+            "lead_margin": lead_margin, # Positif jika unggul, negatif jika tertinggal
+            "opponent_primed_for_big_score": opponent_primed_for_big_score,
+        }
+
+    def time_horizon(self, board: Board) -> float:
+        """Sisa waktu (langkah) di bawah nilai ini bisa memicu cabang-cabang waktu."""
+        params = self.params
+        return max(
+            params.endgame_moves,
+            (board.width + board.height) * max(1.0, params.secure_points_time_factor) +
+            params.safe_time_buffer_profit_return + params.last_dash_max_time_eval,
+        )
+
+    def observe(self, bot: GameObject, board: Board) -> None:
+        # Sisa waktu (dalam langkah) dari milliseconds_left server, delay, latensi dan drift jam
+        self.clock.observe(bot, board)
+        self.time_left = self.clock.remaining_moves()
+        self.opponents.observe(board, bot)
+        # Peta ancaman dari posisi prediksi lawan yang membawa sedikit diamond
+        sources = threat_sources(board, bot)
+        self.threat.update(board, {
+            enemy_id: self.opponents.predict(enemy_id, 1) or enemy_pos
+            for enemy_id, enemy_pos in sources.items()
+        })
+        # Batalkan rencana lama sebelum memutuskan (target diambil, inventory berubah, ancaman baru, waktu habis)
+        graph = get_teleporter_graph(board)
+        self.plans.validate(
+            bot, board, sources.keys(), graph.distance, self.time_left, graph.next_waypoint,
+        )
+
+    def decision_state(self, bot: GameObject, board: Board) -> Tuple:
+        """
+        Selain board, keputusan hanya bergantung pada sisa waktu, posisi
+        prediksi lawan (riwayat gerak) dan target rencana yang masih berlaku.
+        Peta ancaman diturunkan dari prediksi yang sama. Sisa waktu di atas
+        horizon tidak memicu cabang waktu mana pun, jadi semua nilai tersebut setara.
+        """
+        pos = bot.position
+        predictions = tuple(
+            (p.x - pos.x, p.y - pos.y)
+            for enemy_bot in board.bots if enemy_bot.id != bot.id
+            for p in (self.predicted_position(enemy_bot, k) for k in range(1, self.OPPONENT_PREDICTION_HORIZON + 1))
+        )
+        plan = self.plans.plan
+        plan_target = (plan.target.x - pos.x, plan.target.y - pos.y) if plan is not None else None
+        return (self.time_left if self.time_left <= self.time_horizon(board) else None), predictions, plan_target
+
+    def next_move(self, bot: GameObject, board: Board) -> Tuple[int, int]:
+        self.observe(bot, board)
+        return self.decide(bot, board)
+
+    def decide(self, bot: GameObject, board: Board) -> Tuple[int, int]:
+        props = bot.properties
+        pos = bot.position
+        base = props.base
+        time_left = self.time_left
+        current_diamonds = props.diamonds
+        MAX_DIAMOND_CAPACITY = inventory_size(bot)
+
+        current_turn_goal_pos: Optional[Position] = None
+        branch: Optional[str] = None # Nama aturan yang menentukan goal (untuk riwayat pertandingan)
+        game_status = self.get_game_status_info(bot, board)
+
+        # --- STRATEGI PRIORITAS TINGGI ---
+
+        params = self.params
+        bitboards = get_bitboards(board)
+        # Lawan yang cukup kaya untuk di-tackle. Posisi prediksi 1 langkah berjarak <= 1 dari posisi
+        # sekarang, jadi tanpa lawan seperti itu dalam radius 2 (tackle langsung) atau 3 (proaktif)
+        # loop per lawan bisa dilewati
+        tackle_targets = bitboards.bots_carrying(params.tackle_min_enemy_diamonds, exclude=bot.id)
+
+        # 1. Greedy by Escape (lawan bisa mencapai petak kita dalam <= 2 langkah):
+        if current_diamonds >= params.escape_min_diamonds and \
+           self.threat.steps_to(pos) <= params.escape_threat_steps:
+            self.goal = self.get_best_teleport_or_target(pos, base, board)
+            self.last_branch = "escape"
+            return self.threat.safer_direction(pos, self.goal)
+
+        # 1b. Endgame Eksak: jika sisa langkah sedikit, rute diamond -> base terbaik dihitung
+        #     dengan DP (menggantikan cabang 2-4 yang berbasis tebakan)
+        if time_left <= params.endgame_moves:
+            solution = self.endgame.solve(
+                pos, base, current_diamonds, MAX_DIAMOND_CAPACITY,
+                time_left - params.endgame_margin,
+                [(d.position, d.properties.points) for d in board.diamonds],
+                lambda a, b: self.distance_with_teleporter(a, b, board),
+            )
+            if solution is not None and solution.value > 0:
+                self.goal = self.get_best_teleport_or_target(pos, solution.target, board)
+                self.last_branch = "endgame"
+                if current_diamonds > 0:
+                    return self.threat.safer_direction(pos, self.goal)
+                return get_direction(pos.x, pos.y, self.goal.x, self.goal.y)
+
+        # 2. V4 Feature: "Mengamankan Poin Kritis" (Secure Critical Points)
+        #    Jika unggul tipis, waktu mulai mepet (tapi belum kritis absolut), dan bawa diamond.
+        #    Harus dijalankan sebelum "Time Critical & Profitable Return" standar.
+        secure_points_time_factor = params.secure_points_time_factor # Coba pulang jika sisa waktu < faktor x perjalanan ke base
+        slim_lead_threshold = MAX_DIAMOND_CAPACITY # Unggul kurang dari satu kali drop penuh
+        effective_steps_to_base = self.distance_with_teleporter(pos, base, board)
+        safe_time_buffer_profit_return = params.safe_time_buffer_profit_return # Buffer untuk pulang profit standar
+
+        # Cek apakah waktu untuk "mengamankan" sudah tiba, tapi belum masuk waktu "kritis profit"
+        is_securing_time_window = (time_left <= effective_steps_to_base * secure_points_time_factor) and \
+                                  (time_left > effective_steps_to_base + safe_time_buffer_profit_return)
+
+        if game_status["am_i_leading"] and \
+           game_status["lead_margin"] < slim_lead_threshold and \
+           current_diamonds >= 1 and \
+           is_securing_time_window:
+            self.goal = self.get_best_teleport_or_target(pos, base, board)
+            # print(f"BOT V4 DEBUG: Securing critical points! Lead: {game_status['lead_margin']}, Time: {time_left}")
+            self.last_branch = "secure"
+            return get_direction(pos.x, pos.y, self.goal.x, self.goal.y)
+
+        # 3. Greedy by Return (Waktu Kritis DAN ADA PROFIT):
+        if current_diamonds > 0 and (time_left <= effective_steps_to_base + safe_time_buffer_profit_return):
+            self.goal = self.get_best_teleport_or_target(pos, base, board)
+            # print(f"BOT V4 DEBUG: Time critical & profitable return. Diamonds: {current_diamonds}, Time Left: {time_left}")
+            self.last_branch = "return_time"
+            return get_direction(pos.x, pos.y, self.goal.x, self.goal.y)
+
+        # 4. V3 Feature: "Last Dash Diamond Grab"
+        last_dash_max_time_eval = params.last_dash_max_time_eval
+        min_buffer_last_dash = params.min_buffer_last_dash
+        max_direct_dist_dash_diamond = params.max_direct_dist_dash_diamond
+        if not current_turn_goal_pos and current_diamonds == 0 and (time_left <= last_dash_max_time_eval):
+            # ... (Logika Last Dash dari V3, pastikan sudah benar)
+            best_last_dash_diamond_obj: Optional[GameObject] = None
+            min_total_steps_for_last_dash = float('inf')
+            potential_diamonds_for_dash = [
+                d for d in board.diamonds if self.distance(pos, d.position) <= max_direct_dist_dash_diamond
+            ]
+            for d_obj in potential_diamonds_for_dash:
+                # ... (pengecekan kapasitas dan perhitungan langkah)
+                dist_to_diamond_direct = self.distance(pos, d_obj.position)
+                steps_from_diamond_to_base = self.distance_with_teleporter(d_obj.position, base, board)
+                total_steps_this_dash = dist_to_diamond_direct + steps_from_diamond_to_base 
+                if total_steps_this_dash < min_total_steps_for_last_dash and \
+                   (total_steps_this_dash + min_buffer_last_dash <= time_left):
+                    min_total_steps_for_last_dash = total_steps_this_dash
+                    best_last_dash_diamond_obj = d_obj
+            if best_last_dash_diamond_obj:
+                current_turn_goal_pos = best_last_dash_diamond_obj.position
+                branch = "last_dash"
+
+        # --- PENETAPAN TUJUAN STRATEGIS (Jika tidak ada override/goal dari atas) ---
+
+        # 5. Greedy by Tackle (Langsung) - V4 Refined Risk/Reward
+        if not current_turn_goal_pos:
+            # Kurangi agresivitas jika bawa banyak diamond, kecuali skor sangat tertinggal
+            can_tackle_aggressively = True
+            if current_diamonds >= MAX_DIAMOND_CAPACITY -1 : # Bawa hampir penuh
+                # Hanya tackle jika sangat tertinggal (misal, skor < 50% skor lawan tertinggi)
+                if game_status["my_score"] < game_status["highest_opponent_score"] * params.tackle_behind_score_ratio or game_status["am_i_leading"]:
+                     pass # Boleh tackle jika sangat tertinggal atau sudah unggul (nothing to lose much)
+                else: # Bawa banyak, tidak tertinggal jauh, jangan ambil risiko
+                    can_tackle_aggressively = False
+            
+            if can_tackle_aggressively and tackle_targets & bitboards.ball(pos, 2):
+                for enemy_bot in board.bots:
+                    if enemy_bot.id == bot.id:
+                        continue
+                    # Tackle ke petak yang akan ditempati lawan; jika lawan menuju petak kita, serang posisinya sekarang
+                    enemy_next_pos = self.predicted_position(enemy_bot)
+                    if enemy_next_pos == pos:
+                        enemy_next_pos = enemy_bot.position
+                    if self.distance(pos, enemy_next_pos) == 1 and \
+                       getattr(enemy_bot.properties, "diamonds", 0) >= params.tackle_min_enemy_diamonds:
+                        if current_diamonds < params.tackle_max_own_diamonds or getattr(enemy_bot.properties, "diamonds", 0) >= (MAX_DIAMOND_CAPACITY -1) :
+                            current_turn_goal_pos = enemy_next_pos
+                            branch = "tackle"
+                            break
+        
+        # 6. Greedy by Inventory Full:
+        if not current_turn_goal_pos:
+            if current_diamonds >= MAX_DIAMOND_CAPACITY:
+                current_turn_goal_pos = self.get_best_teleport_or_target(pos, base, board)
+                branch = "inventory_full"
+
+        # 7. Greedy by Red Button - V4 Smarter Usage
+        if not current_turn_goal_pos:
+            red_button_obj = self.get_red_button(board)
+            if red_button_obj:
+                press_button_for_scarcity_or_advantage = False
+                # Kondisi dasar dari V3 (diamond langka atau tombol lebih dekat)
+                diamonds_on_board_count = popcount(bitboards.diamonds)
+                if diamonds_on_board_count == 0 and current_diamonds < MAX_DIAMOND_CAPACITY:
+                     press_button_for_scarcity_or_advantage = True
+                elif diamonds_on_board_count < params.button_scarcity_diamonds and current_diamonds < MAX_DIAMOND_CAPACITY -1 :
+                    press_button_for_scarcity_or_advantage = True
+                # ... (bisa tambahkan kondisi V3 lainnya jika relevan)
+
+                press_button_for_disruption = False
+                # Kondisi disrupsi: lawan mau skor besar, kita tidak unggul, dan tombol dekat
+                dist_to_button_eff = self.distance_with_teleporter(pos, red_button_obj.position, board)
+                if game_status["opponent_primed_for_big_score"] and \
+                   (not game_status["am_i_leading"] or game_status["lead_margin"] < MAX_DIAMOND_CAPACITY) and \
+                   dist_to_button_eff <= params.button_disruption_distance : # Tombol harus cukup dekat untuk aksi disrupsi cepat
+                    press_button_for_disruption = True
+
+                press_button_when_behind = False
+                # Kondisi reset saat tertinggal: skor rendah, diamond sedikit, tombol dekat
+                if not game_status["am_i_leading"] and game_status["my_score"] < game_status["highest_opponent_score"] * params.button_behind_score_ratio and \
+                   diamonds_on_board_count < params.button_behind_max_diamonds and \
+                   dist_to_button_eff <= params.button_behind_distance:
+                    press_button_when_behind = True
+                
+                press_button_by_estimate = False
+                # Kondisi estimasi: rata-rata layout diamond setelah reset lebih menguntungkan kita dibanding lawan
+                if dist_to_button_eff <= params.button_estimate_distance:
+                    # Horizon dibatasi time_horizon agar sisa waktu di atasnya tetap setara (cache keputusan)
+                    estimate = self.button_values.estimate(
+                        board, bot, red_button_obj, dist_to_button_eff,
+                        min(time_left, int(self.time_horizon(board))),
+                    )
+                    press_button_by_estimate = estimate.samples > 0 and estimate.gain >= params.button_min_gain
+
+                if press_button_for_disruption or press_button_when_behind or press_button_for_scarcity_or_advantage or \
+                   press_button_by_estimate:
+                    current_turn_goal_pos = red_button_obj.position
+                    branch = "red_button"
+        
+        # 8. Greedy by Tackle (Proaktif/Mendekat) - V4 Refined Risk/Reward
+        if not current_turn_goal_pos:
+            # Logika agresivitas sama seperti tackle langsung
+            can_tackle_proactively = True
+            if current_diamonds >= MAX_DIAMOND_CAPACITY - 1: # Bawa hampir penuh
+                if game_status["my_score"] < game_status["highest_opponent_score"] * params.tackle_behind_score_ratio or game_status["am_i_leading"]:
+                     pass 
+                else:
+                    can_tackle_proactively = False
+
+            if can_tackle_proactively and current_diamonds < MAX_DIAMOND_CAPACITY - (MAX_DIAMOND_CAPACITY // 2) + 1 and \
+               tackle_targets & bitboards.ball(pos, 3):
+                for enemy_bot in board.bots:
+                    if enemy_bot.id == bot.id:
+                        continue
+                    enemy_next_pos = self.predicted_position(enemy_bot)
+                    if self.distance(pos, enemy_next_pos) == 2 and \
+                       getattr(enemy_bot.properties, "diamonds", 0) >= params.tackle_min_enemy_diamonds:
+                        current_turn_goal_pos = enemy_next_pos
+                        branch = "tackle_proactive"
+                        break
+        
+        # 9. Greedy by Diamond Collection:
+        if not current_turn_goal_pos and self.plans.plan is not None:
+            # Rencana dari tick sebelumnya masih valid: tidak perlu mencari ulang (dan tidak berganti-ganti target)
+            current_turn_goal_pos = self.plans.reuse()
+            branch = "plan"
+        if not current_turn_goal_pos:
+            # ... (Logika dari V3 menggunakan get_closest_diamond yang sudah mempertimbangkan teleporter)
+            red_diamond_obj = self.get_closest_diamond(bot, board, red_only=True)
+            blue_diamond_obj = self.get_closest_diamond(bot, board, blue_only=True)
+            # ... (Pemilihan antara merah dan biru berdasarkan jarak efektif dan kapasitas)
+            target_diamond_obj: Optional[GameObject] = None
+            if red_diamond_obj and blue_diamond_obj:
+                dist_eff_red = self.distance_with_teleporter(pos, red_diamond_obj.position, board)
+                dist_eff_blue = self.distance_with_teleporter(pos, blue_diamond_obj.position, board)
+                if dist_eff_red <= dist_eff_blue + params.red_preference_margin : 
+                    target_diamond_obj = red_diamond_obj
+                else:
+                    target_diamond_obj = blue_diamond_obj
+            elif red_diamond_obj:
+                target_diamond_obj = red_diamond_obj
+            elif blue_diamond_obj:
+                target_diamond_obj = blue_diamond_obj
+            
+            if target_diamond_obj:
+                target = target_diamond_obj.position
+                branch = "diamond"
+                plan = self.plans.adopt(
+                    target_diamond_obj, bot, self.threat.sources.keys(),
+                    self.distance_with_teleporter(pos, target, board),
+                    self.get_best_teleport_or_target(pos, target, board),
+                )
+                current_turn_goal_pos = plan.waypoint
+            else: 
+                if not current_turn_goal_pos:
+                     current_turn_goal_pos = self.get_best_teleport_or_target(pos, base, board)
+                     branch = "no_diamond"
+
+        # 10. Aksi Default:
+        if not current_turn_goal_pos:
+            current_turn_goal_pos = self.get_best_teleport_or_target(pos, base, board)
+            branch = "default"
+
+        # --- PENYESUAIAN AKHIR & EKSEKUSI ---
+        self.goal = current_turn_goal_pos 
+        if self.goal != base and self.distance(pos, base) == 1 and current_diamonds > 0:
+            self.goal = base
+            branch = "base_adjacent"
+        if not self.goal: self.goal = base 
+        self.last_branch = branch or "default"
+            
+        if current_diamonds > 0:
+            # Saat membawa diamond, pilih sumbu gerak yang lebih aman dari tackle
+            delta_x, delta_y = self.threat.safer_direction(pos, self.goal)
+        else:
+            delta_x, delta_y = get_direction(pos.x, pos.y, self.goal.x, self.goal.y)
+        return delta_x, delta_y
@@ -0,0 +1,122 @@
+import json
+
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from game import codec
+from game.api import Api, CircuitBreaker
+from tests.boards import board, bot
+
+BOARD = board([bot(1, 2, 3)], 5, 5)
+BODY = json.dumps(codec.board_payload(BOARD)).encode()
+
+
+def response(status=200, content=BODY):
+    res = requests.Response()
+    res.status_code = status
+    res._content = content
+    return res
+
+
+def refused():
+    reason = NewConnectionError(None, "Connection refused")
+    return requests.ConnectionError(MaxRetryError(None, "/", reason))
+
+
+def reset_after_send():
+    return requests.ConnectionError(ProtocolError("Connection aborted.", ConnectionResetError()))
+
+
+class Session:
+    """Answers each request with the next queued response, or raises it."""
+
+    def __init__(self, *answers):
+        self.answers = list(answers)
+        self.sent = []
+
+    def _send(self, method, url, **kwargs):
+        self.sent.append((method, url))
+        answer = self.answers.pop(0)
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    def get(self, url, **kwargs):
+        return self._send("get", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self._send("post", url, **kwargs)
+
+
+def api(*answers, **kwargs):
+    return Api("http://srv", backoff=0, session=Session(*answers), **kwargs)
+
+
+def test_get_is_retried_on_errors_and_5xx():
+    client = api(requests.ReadTimeout(), response(502, content=b"bad gateway"), response())
+    assert client.boards_get(1) == BOARD
+    assert len(client.session.sent) == 3
+    assert (client.stats.retries, client.stats.stalls, client.stats.failures) == (2, 1, 0)
+
+
+def test_get_gives_up_after_the_retries():
+    client = api(requests.ReadTimeout(), requests.ReadTimeout(), requests.ReadTimeout())
+    assert client.boards_get(1) is None
+    assert client.stats.failures == 1 and client.breaker.failures == 1
+
+
+def test_post_is_retried_only_when_nothing_was_sent():
+    client = api(refused(), requests.ConnectTimeout(), response())
+    assert client.bots_move("t0", "NORTH") == BOARD
+    assert len(client.session.sent) == 3
+
+    client = api(reset_after_send())
+    assert client.bots_move("t0", "NORTH") is None
+    assert len(client.session.sent) == 1
+
+    client = api(requests.ReadTimeout())
+    assert client.bots_move("t0", "NORTH") is None
+    assert len(client.session.sent) == 1
+
+
+def test_breaker_opens_and_closes():
+    client = api(*[requests.ReadTimeout()] * 6, response(), retries=0,
+                 breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60))
+    assert client.boards_get(1) is None
+    assert client.boards_get(1) is None
+    assert client.breaker.is_open and client.stats.circuit_opens == 1
+
+    # Open: nothing is sent
+    assert client.boards_get(1) is None
+    assert len(client.session.sent) == 2 and client.stats.short_circuited == 1
+
+    # After the reset timeout one request goes through; failing keeps it open
+    client.breaker.opened_at -= 60
+    assert client.boards_get(1) is None
+    assert client.breaker.is_open and len(client.session.sent) == 3
+    assert client.boards_get(1) is None
+    assert client.stats.short_circuited == 2
+
+    client.session.answers = client.session.answers[-1:]
+    client.breaker.opened_at -= 60
+    assert client.boards_get(1) == BOARD
+    assert not client.breaker.is_open and client.breaker.failures == 0
+    assert client.stats.circuit_opens == 1
+
+
+def test_failed_move_resyncs_even_when_it_opened_the_circuit():
+    client = api(requests.ReadTimeout(), response(),
+                 breaker=CircuitBreaker(failure_threshold=1))
+    assert client.bots_move("t0", "NORTH", board_id=1) == BOARD
+    assert client.session.sent == [("post", "http://srv/bots/t0/move"), ("get", "http://srv/boards/1")]
+    assert client.stats.resyncs == 1 and client.stats.circuit_opens == 1
+    # The resync answered, so the circuit is closed again
+    assert not client.breaker.is_open
+
+
+def test_unreadable_body_is_not_a_success():
+    for call in (lambda c: c.boards_get(1), lambda c: c.boards_list(), lambda c: c.bots_get("t0"),
+                 lambda c: c.bots_move("t0", "NORTH")):
+        client = api(response(content=b"<html>oops</html>"))
+        assert call(client) is None
+    assert api(response(content=b"")).bots_join("t0", 1) is False
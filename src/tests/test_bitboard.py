@@ -0,0 +1,116 @@
+import random
+
+import pytest
+
+from game.bitboard import BallMasks, Bitboards, popcount
+from game.models import GameObject, Position, Properties
+from tests.boards import board, bot, button, diamond, teleporter
+
+LAYERS = ("red", "blue", "bots", "bases", "teleporters", "buttons")
+
+
+def state(bitboards):
+    return {layer: getattr(bitboards, layer) for layer in LAYERS}, bitboards.loads, bitboards._counts
+
+
+def base(id, x, y):
+    return GameObject(id, Position(y, x), "BaseGameObject", Properties())
+
+
+def random_boards(rng, ticks, width, height):
+    """Boards of one game: bots wander over diamonds and bases, diamonds come and go."""
+    bases = [base(100 + i, rng.randrange(width), rng.randrange(height)) for i in range(3)]
+    fixed = bases + [teleporter(200, 0, 0, "a"), teleporter(201, width - 1, height - 1, "a"), button(300, 1, 0)]
+    bots = {i: (bases[i].position.x, bases[i].position.y, 0) for i in range(3)}
+    diamonds = {}
+    next_id = 1000
+    for _ in range(ticks):
+        for i, (x, y, load) in bots.items():
+            dx, dy = rng.choice(((1, 0), (-1, 0), (0, 1), (0, -1), (0, 0)))
+            x, y = min(width - 1, max(0, x + dx)), min(height - 1, max(0, y + dy))
+            bots[i] = (x, y, rng.randint(0, 5) if rng.random() < 0.3 else load)
+        for obj_id in list(diamonds):
+            if rng.random() < 0.1:
+                del diamonds[obj_id]
+        for _ in range(rng.randint(0, 3)):
+            diamonds[next_id] = (rng.randrange(width), rng.randrange(height), rng.choice((1, 2)))
+            next_id += 1
+        objects = fixed + [bot(i + 1, x, y, diamonds=load) for i, (x, y, load) in bots.items()]
+        objects += [diamond(obj_id, x, y, points) for obj_id, (x, y, points) in diamonds.items()]
+        # Now and then an object off the board, which is ignored
+        if rng.random() < 0.1:
+            objects.append(diamond(999, width, 0))
+        yield board(objects, width, height)
+
+
+def tracked(field):
+    """What `update` diffs: every object on the board with its layer and cell."""
+    return {
+        o.id: (o.type, o.properties.points, o.position.x, o.position.y)
+        for o in field.game_objects
+        if 0 <= o.position.x < field.width and 0 <= o.position.y < field.height
+    }
+
+
+def test_incremental_update_matches_rebuild():
+    rng = random.Random(2)
+    incremental = Bitboards(1, 1)
+    for size in ((6, 5), (9, 9), (6, 5)):
+        previous = {}
+        for field in random_boards(rng, 150, *size):
+            changed = incremental.update(field)
+            assert state(incremental) == state(Bitboards.from_board(field))
+            current = tracked(field)
+            if previous:
+                expected = sum(1 for obj_id, entry in current.items() if previous.get(obj_id) != entry)
+                expected += sum(1 for obj_id in previous if obj_id not in current)
+                assert changed == expected
+            previous = current
+
+
+def test_shared_cells_keep_their_bit():
+    me = bot(1, 2, 2)
+    other = bot(2, 2, 2)
+    bitboards = Bitboards.from_board(board([me, other], 5, 5))
+    bitboards.update(board([me, bot(2, 3, 2)], 5, 5))
+    assert bitboards.bots == 1 << 12 | 1 << 13
+    bitboards.update(board([bot(1, 3, 2), bot(2, 3, 2)], 5, 5))
+    assert bitboards.bots == 1 << 13
+
+
+def test_without_matches_rebuild_and_leaves_the_original():
+    rng = random.Random(4)
+    for field in random_boards(rng, 40, 7, 6):
+        full = Bitboards.from_board(field)
+        before = state(full)
+        hidden = {o.id for o in field.game_objects if rng.random() < 0.3} | {12345}
+        view = board([o for o in field.game_objects if o.id not in hidden], 7, 6)
+        assert state(full.without(hidden)) == state(Bitboards.from_board(view))
+        assert state(full) == before
+
+
+@pytest.mark.parametrize("size", [(1, 1), (5, 3), (7, 7)])
+def test_balls(size):
+    width, height = size
+    balls = BallMasks(width, height)
+    for x in range(-2, width + 2):
+        for y in range(-2, height + 2):
+            for radius in range(-1, width + height + 1):
+                expected = 0
+                for cy in range(height):
+                    for cx in range(width):
+                        if abs(cx - x) + abs(cy - y) <= radius:
+                            expected |= 1 << (cy * width + cx)
+                assert balls.ball(x, y, radius) == expected
+
+
+def test_queries():
+    objects = [bot(1, 0, 0, diamonds=3), bot(2, 4, 4, diamonds=1)]
+    objects += [diamond(10, 1, 0, 2), diamond(11, 2, 2), diamond(12, 4, 0)]
+    field = board(objects, 5, 5)
+    bitboards = Bitboards.from_board(field)
+    assert bitboards.within(bitboards.diamonds, Position(0, 0), 2) == 1
+    assert bitboards.within(bitboards.diamonds, Position(0, 0), 4) == 3
+    assert popcount(bitboards.red) == 1
+    assert bitboards.bots_carrying(2) == 1
+    assert bitboards.bots_carrying(1, exclude=1) == 1 << 24
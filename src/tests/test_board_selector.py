@@ -0,0 +1,58 @@
+from collections import Counter
+
+from game.board_selector import BoardSelector, rank_board, weighted_order
+from tests.boards import board, bot, diamond
+
+
+class Api:
+    def __init__(self, boards, full=()):
+        self.boards = {b.id: b for b in boards}
+        self.full = set(full)
+        self.joined = []
+
+    def boards_list(self):
+        return list(self.boards.values())
+
+    def boards_get(self, board_id):
+        return self.boards[board_id]
+
+    def bots_join(self, token, board_id):
+        if board_id in self.full:
+            return False
+        self.joined.append(board_id)
+        return True
+
+
+def field(id, diamonds, bots=0):
+    objects = [diamond(100 + i, i % 10, i // 10) for i in range(diamonds)]
+    objects += [bot(200 + i, 9, 9 - i) for i in range(bots)]
+    return board(objects, id=id)
+
+
+def test_score():
+    rank = rank_board(field(1, 10, bots=1), max_bots=3)
+    assert (rank.bots, rank.free_slots, rank.density) == (1, 2, 0.1)
+    assert rank.score == 0.1 / 2
+
+
+def test_first_pick_follows_the_score():
+    ranks = [rank_board(field(1, 30)), rank_board(field(2, 10)), rank_board(field(3, 0))]
+    firsts = Counter(weighted_order(ranks)[0].board.id for _ in range(4000))
+    assert set(firsts) == {1, 2}
+    assert 2.5 < firsts[1] / firsts[2] < 3.5
+
+
+def test_near_best_boards_are_drawn_and_the_rest_follow_by_score():
+    selector = BoardSelector(Api([field(1, 10), field(2, 9), field(3, 5), field(4, 2)]))
+    orders = Counter(tuple(r.board.id for r in selector.rank()) for _ in range(500))
+    assert set(orders) == {(1, 2, 3, 4), (2, 1, 3, 4)}
+
+
+def test_join_skips_full_boards_and_counts_our_bots():
+    api = Api([field(1, 10), field(2, 2)], full={1})
+    selector = BoardSelector(api, max_bots=2, near=1.0)
+    assert selector.join("t0") == 2
+    assert selector.join("t1") == 2
+    # Both slots of board 2 are ours now, and board 1 refused us
+    assert selector.join("t2") is None
+    assert api.joined == [2, 2]
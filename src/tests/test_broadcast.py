@@ -0,0 +1,83 @@
+import threading
+from time import sleep, time
+
+import pytest
+
+from game import broadcast
+from game.broadcast import BoardBroadcast
+from tests.boards import board, bot
+
+if broadcast.fcntl is None:
+    pytest.skip("board broadcast needs fcntl (POSIX)", allow_module_level=True)
+
+
+def field(x, milliseconds_left):
+    return board([bot(1, x, 1, milliseconds_left=milliseconds_left)], 10, 5, delay=1000)
+
+
+class Handler:
+    """The server: always the board after our move."""
+
+    def __init__(self):
+        self.fetches = 0
+
+    def get_board(self, board_id):
+        self.fetches += 1
+        return field(9, 100)
+
+
+@pytest.fixture
+def ring(tmp_path):
+    path = str(tmp_path / "board.ring")
+    # Polls once at start, then leaves publishing to the test
+    leader = BoardBroadcast(Handler(), 1, path=path, interval=100)
+    reader = BoardBroadcast(Handler(), 1, path=path)
+    sleep(0.1)
+    yield leader, reader
+    reader.close()
+    leader.close()
+
+
+def test_leader_polls_faster_than_moves(ring):
+    leader, reader = ring
+    assert leader.leader and not reader.leader
+    assert reader.poll_interval(field(0, 0)) < 1.0
+    assert reader.poll_interval(field(0, 0)) >= broadcast.MIN_INTERVAL
+
+
+def test_board_from_before_the_move_is_not_used(ring):
+    leader, reader = ring
+    before = field(1, 500).bots[0]
+    leader.publish(field(1, 500), requested_at=time() - 1)
+    assert reader.board_after(1, time(), before, timeout=0.05).bots[0].position.x == 9
+    assert (reader.stats.waits, reader.stats.fallbacks, reader.board_handler.fetches) == (1, 1, 1)
+
+
+def test_board_showing_the_move_is_used(ring):
+    leader, reader = ring
+    before = field(1, 500).bots[0]
+    leader.publish(field(2, 400), requested_at=time() - 1)
+    assert reader.board_after(1, time(), before, timeout=0.05).bots[0].position.x == 2
+    # Same place, time moved on: still from before the move
+    leader.publish(field(1, 400), requested_at=time() - 1)
+    assert reader.board_after(1, time(), before, timeout=0.05).bots[0].position.x == 9
+    assert reader.stats.fallbacks == 1
+
+
+def test_board_requested_after_the_move_is_used(ring):
+    leader, reader = ring
+    since = time()
+    leader.publish(field(1, 500), requested_at=since + 0.001)
+    assert reader.board_after(1, since, field(1, 500).bots[0]).bots[0].position.x == 1
+    assert reader.stats.fallbacks == 0
+
+
+def test_waits_for_the_next_publish(ring):
+    leader, reader = ring
+    since = time()
+    leader.publish(field(1, 500), requested_at=since - 1)
+    timer = threading.Timer(0.05, lambda: leader.publish(field(3, 400)))
+    timer.start()
+    assert reader.board_after(1, since, field(1, 500).bots[0], timeout=2.0).bots[0].position.x == 3
+    timer.join()
+    assert (reader.stats.waits, reader.stats.fallbacks) == (1, 0)
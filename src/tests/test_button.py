@@ -0,0 +1,124 @@
+from math import isclose
+
+import pytest
+
+from game.button import ButtonEstimator, ResetProblem, advantage, evaluate, sample_layouts
+from tests.boards import board, bot, button, diamond
+
+
+def test_closest_bot_with_room_takes_the_diamond():
+    bots = [(0, 0, 5), (3, 0, 5)]
+    # Diamond at distance 1 from bot 0 and 2 from bot 1
+    assert advantage([(1, 0, 1)], bots, 0, 10, 0.5) == 0.5
+    assert advantage([(1, 0, 1)], bots, 1, 10, 0.5) == -0.5
+    # No room for a red one: it goes to the other bot
+    assert advantage([(1, 0, 2)], [(0, 0, 1), (3, 0, 5)], 0, 10, 0.5) == -2 * 0.5 ** 2
+
+
+def test_ties_share_and_far_diamonds_are_worthless():
+    bots = [(0, 0, 5), (2, 0, 5), (9, 9, 5)]
+    assert advantage([(1, 0, 2)], bots, 0, 10, 1.0) == 0.0
+    assert advantage([(1, 0, 2)], bots, 2, 10, 1.0) == -1.0
+    assert advantage([(1, 0, 2)], bots, 0, 0, 1.0) == 0.0
+    assert advantage([(5, 5, 1)], [(0, 0, 5)], 0, 9, 1.0) == 0.0
+    assert advantage([(5, 5, 1)], [(0, 0, 5)], 0, 10, 1.0) == 1.0
+
+
+def test_best_opponent_counts():
+    bots = [(0, 0, 5), (9, 0, 5), (0, 9, 5)]
+    layout = [(1, 0, 1), (8, 0, 1), (7, 0, 1), (0, 8, 2)]
+    assert advantage(layout, bots, 0, 20, 1.0) == 1 - 2
+
+
+def problem(**changes):
+    values = dict(width=6, height=5, occupied=frozenset({0, 7, 29}), diamonds=6, red_ratio=0.0)
+    values.update(changes)
+    return ResetProblem(**values)
+
+
+def test_layouts_avoid_occupied_cells():
+    reset = problem(red_ratio=0.5)
+    layouts = sample_layouts(reset, 3, 50)
+    assert len(layouts) == 50
+    for layout in layouts:
+        cells = {y * reset.width + x for x, y, _ in layout}
+        assert len(cells) == reset.diamonds
+        assert not cells & reset.occupied
+    assert {points for layout in layouts for _, _, points in layout} == {1, 2}
+    assert sample_layouts(reset, 7, 20) == sample_layouts(reset, 7, 20)
+    # More diamonds than free cells: every free cell gets one
+    [layout] = sample_layouts(problem(diamonds=100), 3, 1)
+    assert len(layout) == 6 * 5 - 3
+
+
+def test_sample_statistics():
+    # A single bot with room for everything gets every point
+    assert evaluate(sample_layouts(problem(), 1, 10), [(0, 0, 5)], 0, 20, 1.0) == (10, 60.0, 360.0)
+    # No room for reds, and every diamond is red
+    assert evaluate(sample_layouts(problem(red_ratio=1.0), 1, 10), [(0, 0, 1)], 0, 20, 1.0) == (10, 0.0, 0.0)
+    count, total, total_sq = evaluate(sample_layouts(problem(red_ratio=0.5), 1, 2000), [(0, 0, 5)], 0, 20, 1.0)
+    mean = total / count
+    stderr = ((total_sq / count - mean ** 2) / (count - 1)) ** 0.5
+    assert abs(mean - 6 * 1.5) < 5 * stderr
+
+
+def test_diamonds_under_bots_are_left_out():
+    layouts = [((1, 0, 1), (3, 0, 1))]
+    # The opponent stands on the second diamond: only the first one is out there
+    assert evaluate(layouts, [(0, 0, 5), (3, 0, 5)], 0, 20, 1.0) == (1, 1.0, 1.0)
+    # Next to it, the opponent takes it
+    assert evaluate(layouts, [(0, 0, 5), (4, 0, 5)], 0, 20, 1.0) == (1, 0.0, 0.0)
+    assert evaluate(layouts, [(0, 0, 5), (9, 0, 5)], 0, 20, 1.0) == (1, 2.0, 4.0)
+
+
+def game():
+    me = bot(1, 0, 0, base=(0, 1))
+    field = board([me, bot(2, 6, 6, base=(7, 7)), button(30, 2, 0), diamond(10, 9, 9), diamond(11, 5, 5, 2)])
+    return field, me, field.game_objects[2]
+
+
+def test_estimate_is_cached_per_board():
+    field, me, press = game()
+    estimator = ButtonEstimator(samples=64, budget=5.0)
+    first = estimator.estimate(field, me, press, 2, 12)
+    second = estimator.estimate(field, me, press, 2, 12)
+    assert (first.cached, second.cached) == (False, True)
+    assert first.samples == second.samples == 64
+    assert second.reset == first.reset
+    assert isclose(first.gain, first.reset - first.current)
+    assert isclose(first.current, estimator.current(field, me, 12))
+    assert estimator.stats.estimates == 2 and estimator.stats.cache_hits == 1
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_pool_draws_the_same_samples(workers):
+    field, me, press = game()
+    local = ButtonEstimator(samples=64, budget=5.0).estimate(field, me, press, 2, 12)
+    estimator = ButtonEstimator(samples=64, budget=30.0, workers=workers)
+    try:
+        pooled = estimator.estimate(field, me, press, 2, 12)
+    finally:
+        estimator.close()
+    assert pooled.samples == local.samples
+    assert isclose(pooled.reset, local.reset)
+
+
+def test_layouts_are_reused_while_the_bots_move():
+    field, me, press = game()
+    estimator = ButtonEstimator(samples=64, budget=5.0)
+    first = estimator.estimate(field, me, press, 2, 12)
+    [entry] = estimator._cache.values()
+    layouts = list(entry.layouts)
+
+    # The opponent walks up to the button: same layouts, scored for the new positions
+    moved = board([me, bot(2, 3, 0, base=(7, 7)), button(30, 2, 0), diamond(10, 9, 9), diamond(11, 5, 5, 2)])
+    second = estimator.estimate(moved, me, moved.game_objects[2], 2, 12)
+    assert second.cached and len(estimator._cache) == 1 and entry.layouts == layouts
+    assert second.reset != first.reset
+    bots, index = estimator.claimants(moved, me, press)
+    expected = evaluate(layouts, bots, index, 10, estimator.discount)
+    assert isclose(second.reset, expected[1] / expected[0] * estimator.discount ** 2)
+
+    # A button somewhere else is another problem
+    elsewhere = board([me, bot(2, 6, 6, base=(7, 7)), button(30, 4, 4), diamond(10, 9, 9), diamond(11, 5, 5, 2)])
+    assert not estimator.estimate(elsewhere, me, elsewhere.game_objects[2], 2, 12).cached
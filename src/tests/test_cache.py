@@ -0,0 +1,193 @@
+from dataclasses import replace
+
+import pytest
+
+from game.generator import ScenarioConfig
+from game.logic.WawanMKS import WawanMKS
+from game.logic.base import BaseLogic
+from game.logic.cache import CachedLogic, canonical_state
+from game.logic.gachoan import GachoanBot
+from game.models import Position
+from game.simulator import Simulator
+from tests.boards import board, bot, button, diamond, teleporter
+
+
+def shifted(objects, dx, dy):
+    moved = []
+    for obj in objects:
+        props = obj.properties
+        if props is not None and props.base is not None:
+            props = replace(props, base=replace(props.base, x=props.base.x + dx, y=props.base.y + dy))
+        moved.append(replace(obj, position=Position(obj.position.y + dy, obj.position.x + dx), properties=props))
+    return moved
+
+
+def test_key_is_translation_invariant_within_radius():
+    objects = [
+        bot(1, 8, 8, base=(7, 9)),
+        diamond(10, 9, 8),
+        diamond(11, 6, 7, points=2),
+        bot(2, 10, 9, diamonds=2),
+    ]
+    me = objects[0]
+    a = canonical_state(me, board(objects, 20, 20), radius=4)
+    moved = shifted(objects, 2, -1)
+    b = canonical_state(moved[0], board(moved, 20, 20), radius=4)
+    assert a == b
+    # Without a radius the walls tell the two apart
+    assert canonical_state(me, board(objects, 20, 20)) != canonical_state(moved[0], board(moved, 20, 20))
+
+
+def test_objects_outside_radius_are_only_counted():
+    me = bot(1, 5, 5)
+    near = diamond(10, 6, 5)
+    a = canonical_state(me, board([me, near, diamond(11, 0, 0), diamond(12, 15, 15, points=2)], 20, 20), radius=3)
+    b = canonical_state(me, board([me, near, diamond(13, 19, 0), diamond(14, 0, 19, points=2)], 20, 20), radius=3)
+    assert a == b
+    c = canonical_state(me, board([me, near, diamond(13, 19, 0), diamond(14, 0, 19, points=1)], 20, 20), radius=3)
+    assert a != c
+
+
+def test_landmarks_are_exact_wherever_they_are():
+    me = bot(1, 5, 5)
+    a = canonical_state(me, board([me, teleporter(20, 0, 0, "a"), button(30, 19, 19)], 20, 20), radius=3)
+    b = canonical_state(me, board([me, teleporter(20, 0, 1, "a"), button(30, 19, 19)], 20, 20), radius=3)
+    c = canonical_state(me, board([me, teleporter(20, 0, 0, "a"), button(30, 18, 19)], 20, 20), radius=3)
+    assert a != b
+    assert a != c
+
+
+class Counting(BaseLogic):
+    """Moves towards the first diamond; records what the cache made it do."""
+
+    cacheable = True
+
+    def __init__(self, state=()):
+        self.state = state
+        self.decided = 0
+        self.replayed = []
+        self.goal = None
+
+    def observe(self, board_bot, board):
+        pass
+
+    def decide(self, board_bot, board):
+        self.decided += 1
+        self.goal = board.diamonds[0].position
+        self.last_branch = "diamond"
+        self.last_effects = ("seen", self.goal.x - board_bot.position.x)
+        return (1, 0) if self.goal.x > board_bot.position.x else (-1, 0)
+
+    def decision_state(self, board_bot, board, radius=None):
+        return self.state
+
+    def replay(self, board_bot, board, effects):
+        self.replayed.append(effects)
+
+
+def test_hit_restores_what_decide_left_behind():
+    logic = Counting()
+    cached = CachedLogic(logic, radius=3)
+    me = bot(1, 4, 4)
+    assert cached.next_move(me, board([me, diamond(10, 6, 4)])) == (1, 0)
+    logic.goal = logic.last_branch = None
+    # Same surroundings elsewhere on the board, walls included
+    me = bot(1, 5, 5)
+    assert cached.next_move(me, board([me, diamond(10, 7, 5)])) == (1, 0)
+    assert logic.decided == 1
+    assert cached.stats.hits == 1 and cached.stats.misses == 1
+    assert logic.goal == Position(5, 7)
+    assert cached.last_branch == "diamond"
+    assert logic.replayed == [("seen", 2)]
+
+
+def test_decision_state_is_part_of_the_key():
+    logic = Counting(state=(1,))
+    cached = CachedLogic(logic)
+    me = bot(1, 2, 2)
+    field = board([me, diamond(10, 4, 2)])
+    cached.next_move(me, field)
+    logic.state = (2,)
+    cached.next_move(me, field)
+    assert (cached.stats.hits, cached.stats.misses, logic.decided) == (0, 2, 2)
+
+
+def test_bypass_when_decision_state_is_none():
+    logic = Counting(state=None)
+    cached = CachedLogic(logic)
+    me = bot(1, 2, 2)
+    field = board([me, diamond(10, 4, 2)])
+    for _ in range(3):
+        assert cached.next_move(me, field) == (1, 0)
+    assert (cached.stats.bypasses, cached.stats.hits, cached.stats.misses, logic.decided) == (3, 0, 0, 3)
+
+
+def test_eviction():
+    logic = Counting()
+    cached = CachedLogic(logic, max_size=2)
+    me = bot(1, 0, 0)
+    for x in (3, 4, 5, 3):
+        cached.next_move(me, board([me, diamond(10, x, 0)]))
+    assert (cached.stats.evictions, cached.stats.hits, cached.stats.misses) == (2, 0, 4)
+
+
+def test_not_cacheable_passes_through():
+    logic = Counting()
+    logic.cacheable = False
+    cached = CachedLogic(logic)
+    logic.next_move = lambda board_bot, board: (0, 1)
+    me = bot(1, 0, 0)
+    assert cached.next_move(me, board([me, diamond(10, 3, 0)])) == (0, 1)
+    assert (cached.stats.hits, cached.stats.misses, cached.stats.bypasses) == (0, 0, 0)
+
+
+def play(make, radius, cached, seed):
+    logic = make()
+    if isinstance(logic, GachoanBot):
+        # Both games must search as far, however busy the machine is
+        logic.endgame.max_seconds = logic.button_values.budget = 100
+    player = CachedLogic(logic, radius=radius) if cached else logic
+    moves = []
+
+    class Recorder(BaseLogic):
+        def next_move(self, board_bot, board):
+            move = player.next_move(board_bot, board)
+            moves.append((move, logic.last_branch, getattr(logic, "goal", None)))
+            return move
+
+    players = [("me", Recorder()), ("w", WawanMKS()), ("g", GachoanBot())]
+    Simulator(players, ScenarioConfig(seconds=30, bots=3), seed=seed, shuffle=False).run()
+    return moves, (player.stats if cached else None)
+
+
+@pytest.mark.parametrize("make", [WawanMKS, GachoanBot], ids=["WawanMKS", "GachoanBot"])
+@pytest.mark.parametrize("radius", [None, 6])
+def test_cached_games_play_like_uncached(make, radius):
+    for seed in range(4):
+        plain, _ = play(make, radius, False, seed)
+        cached, stats = play(make, radius, True, seed)
+        assert cached == plain
+        assert stats.hits + stats.misses + stats.bypasses == len(plain)
+
+
+@pytest.mark.parametrize("make", [WawanMKS, GachoanBot], ids=["WawanMKS", "GachoanBot"])
+def test_no_hit_when_the_closest_diamond_is_outside_the_radius(make):
+    # Same key within radius 6, but the only diamond lies south in one and
+    # north in the other
+    boards = [
+        board([bot(1, 10, 10, base=(10, 10), milliseconds_left=50000), diamond(10, 10, y)], 20, 20)
+        for y in (19, 1)
+    ]
+    assert len({canonical_state(b.bots[0], b, 6) for b in boards}) == 1
+    cached = CachedLogic(make(), radius=6)
+    for field in boards:
+        expected = make().next_move(field.bots[0], field)
+        assert cached.next_move(field.bots[0], field) == expected
+    assert cached.stats.hits == 0
+
+
+def test_radius_below_threat_horizon_always_bypasses():
+    logic = WawanMKS()
+    _, stats = play(lambda: logic, logic.threat.horizon, True, 0)
+    assert stats.hits == stats.misses == 0
+    assert stats.bypasses > 0
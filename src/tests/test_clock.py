@@ -0,0 +1,72 @@
+import pytest
+
+from game.clock import GameClock
+from tests.boards import board, bot
+
+
+class Time:
+    """A local clock that only moves when told to."""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def observe(clock, ms_left, delay=1000):
+    me = bot(1, 0, 0, milliseconds_left=ms_left)
+    clock.observe(me, board([me], delay=delay))
+
+
+def test_record_latency():
+    clock = GameClock(smoothing=0.5)
+    clock.record_latency(0.1)
+    assert clock.latency_ms == 100
+    clock.record_latency(0.2)
+    assert clock.latency_ms == 150
+
+
+def test_time_left_is_extrapolated_with_the_local_clock():
+    time = Time()
+    clock = GameClock(time_source=time)
+    assert clock.remaining_ms() is None and clock.remaining_moves() == 999
+
+    observe(clock, 10_000)
+    assert clock.remaining_ms() == 10_000
+    assert clock.remaining_moves() == 10
+    time.now += 0.5
+    assert clock.remaining_ms() == 9_500
+    assert clock.remaining_moves() == 9
+
+    # Half the round trip has passed on the server before we read the board
+    clock.record_latency(0.2)
+    assert clock.remaining_ms() == 9_400
+    assert clock.period_ms() == 1_200
+    assert clock.remaining_moves() == 7
+
+
+def test_move_period_and_drift_are_learned():
+    time = Time()
+    clock = GameClock(smoothing=1.0, time_source=time)
+    observe(clock, 10_000)
+    # 1100 ms of server time per move, measured in 1 s of local time
+    time.now += 1.0
+    observe(clock, 8_900)
+    assert clock.move_period_ms == 1_100
+    assert clock.period_ms() == 1_100
+    assert clock.rate == pytest.approx(1.1)
+    time.now += 0.5
+    assert clock.remaining_ms() == pytest.approx(8_900 - 550)
+    assert clock.remaining_moves() == 7
+
+    # A local clock far off the server's is only trusted up to max_drift
+    time.now += 10.0
+    observe(clock, 7_800)
+    assert clock.rate == pytest.approx(1 - clock.max_drift)
+
+
+def test_boards_without_time_left_only_update_the_delay():
+    clock = GameClock(time_source=Time())
+    observe(clock, None, delay=250)
+    assert clock.move_delay_ms == 250 and clock.remaining_ms() is None
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+from dacite import from_dict
+
+from decode import decode
+from game import codec
+from game.generator import SCENARIOS, stream_scenarios
+from game.models import Board, Bot
+
+
+# One board per scenario: the legacy parser is slow on the large ones
+PAYLOADS = [
+    json.dumps(codec.board_payload(board)).encode()
+    for name in sorted(SCENARIOS)
+    for board in stream_scenarios(1, seed=4, config=SCENARIOS[name], vary=True)
+]
+
+
+def legacy_parse(raw: bytes) -> Board:
+    """What `Api` did before `game.codec`: stdlib json, snake_case copy, dacite."""
+    return from_dict(Board, decode(codec.unwrap(json.loads(raw))))
+
+
+@pytest.mark.parametrize("backend", sorted(codec.BACKENDS))
+def test_backends_match_the_legacy_parser(backend):
+    for raw in PAYLOADS:
+        expected = legacy_parse(raw)
+        assert codec.parse_board(raw, backend) == expected
+        assert codec.parse_board(raw.decode(), backend) == expected
+
+
+def test_board_payload_round_trip():
+    for board in stream_scenarios(5, seed=1, vary=True):
+        assert codec.board(codec.unwrap(codec.board_payload(board))) == board
+
+
+def test_missing_optional_fields():
+    raw = b'{"data": {"id": 3, "width": 5, "height": 4, "minimumDelayBetweenMoves": 100}}'
+    board = codec.parse_board(raw)
+    assert (board.id, board.width, board.height, board.features, board.game_objects) == (3, 5, 4, [], None)
+
+
+def test_unwrap_and_bot():
+    assert codec.unwrap({"data": [1, 2]}) == [1, 2]
+    assert codec.unwrap({"data": None, "error": "x"}) == {"data": None, "error": "x"}
+    assert codec.unwrap([3]) == [3]
+    data = codec.unwrap(codec.loads(b'{"data": {"name": "a", "email": "a@b", "id": "t0"}}'))
+    assert codec.bot(data) == Bot("a", "a@b", "t0")
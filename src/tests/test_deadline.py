@@ -0,0 +1,134 @@
+import threading
+
+from game.deadline import MIN_BUDGET, Deadline, DeadlineRunner, fallback_move, move_budget
+from game.generator import SCENARIOS
+from game.logic.WawanMKS import WawanMKS
+from game.logic.base import BaseLogic
+from game.logic.cache import CachedLogic
+from game.logic.gachoan import GachoanBot
+from game.simulator import Simulator
+from tests.boards import board, bot
+
+ME = bot(1, 5, 5, base=(0, 5))
+BOARD = board([ME], delay=1000)
+TOWARDS_BASE = (-1, 0)
+
+
+class Scripted(BaseLogic):
+    """Yields `quick`, then waits for `release` before yielding `final`."""
+
+    def __init__(self, quick=None, final=(0, 1), fail=False):
+        self.quick = quick
+        self.final = final
+        self.fail = fail
+        self.release = threading.Event()
+        self.calls = 0
+
+    def next_move_anytime(self, board_bot, board, deadline):
+        self.calls += 1
+        if self.quick is not None:
+            self.last_branch = "quick"
+            yield self.quick
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("boom")
+        self.last_branch = "final"
+        yield self.final
+
+
+def finish(runner):
+    runner.logic.release.set()
+    runner._search.done.wait(5)
+
+
+def test_budget():
+    assert move_budget(BOARD) == 0.95
+    assert abs(move_budget(BOARD, latency=0.2) - 0.75) < 1e-9
+    assert move_budget(board([ME], delay=10), latency=0.2) == MIN_BUDGET
+    runner = DeadlineRunner(Scripted(), smoothing=0.5)
+    runner.record_latency(0.2)
+    runner.record_latency(0.2)
+    assert abs(runner.latency - 0.15) < 1e-9
+    assert abs(runner.budget(BOARD) - 0.8) < 1e-9
+
+
+def test_answer_in_time():
+    logic = Scripted(quick=(1, 0))
+    logic.release.set()
+    runner = DeadlineRunner(logic)
+    assert runner.next_move(ME, BOARD, Deadline(5)) == (0, 1)
+    assert runner.last_branch == "final"
+    assert (runner.stats.completed, runner.stats.partial, runner.stats.misses) == (1, 0, 0)
+
+
+def test_deadline_hit_sends_the_best_answer_so_far():
+    runner = DeadlineRunner(Scripted(quick=(1, 0)))
+    assert runner.next_move(ME, BOARD, Deadline(0.05)) == (1, 0)
+    assert runner.last_branch == "quick"
+    assert runner.stats.partial == 1
+    finish(runner)
+
+
+def test_deadline_hit_before_any_answer_sends_the_fallback():
+    runner = DeadlineRunner(Scripted())
+    assert fallback_move(ME, BOARD) == TOWARDS_BASE
+    assert runner.next_move(ME, BOARD, Deadline(0.05)) == TOWARDS_BASE
+    assert runner.last_branch == "fallback"
+    assert runner.stats.misses == 1
+    finish(runner)
+
+
+def test_overrun_and_late_result_discarded():
+    logic = Scripted()
+    runner = DeadlineRunner(logic)
+    assert runner.next_move(ME, BOARD, Deadline(0.05)) == TOWARDS_BASE
+
+    # Still thinking about the last board: no second search on the logic
+    assert runner.busy
+    assert runner.next_move(ME, BOARD, Deadline(0.05)) == TOWARDS_BASE
+    assert (logic.calls, runner.stats.overruns, runner.stats.miss_rate) == (1, 1, 1.0)
+
+    # The late answer ends the old search and is never sent
+    finish(runner)
+    assert not runner.busy and runner._search.best == ((0, 1), "final")
+    logic.final = (0, -1)
+    logic.release.set()
+    assert runner.next_move(ME, BOARD, Deadline(5)) == (0, -1)
+    assert logic.calls == 2 and runner.stats.completed == 1
+
+
+def test_error_counts_and_keeps_the_answer_so_far():
+    logic = Scripted(quick=(1, 0), fail=True)
+    logic.release.set()
+    runner = DeadlineRunner(logic)
+    assert runner.next_move(ME, BOARD, Deadline(5)) == (1, 0)
+    assert runner.stats.errors == 1
+
+
+class Anytime(BaseLogic):
+    """Plays `logic` through its anytime version next to a twin asked for `next_move`."""
+
+    def __init__(self, make):
+        self.logic = make()
+        self.twin = make()
+        for logic in (self.logic, self.twin):
+            # Searches long enough never to stop on the wall clock
+            logic.endgame.max_seconds = logic.button_values.budget = 100
+        self.answers = []
+
+    def next_move(self, board_bot, board):
+        answers = list(self.logic.next_move_anytime(board_bot, board, Deadline(5)))
+        self.answers.append((answers, self.twin.next_move(board_bot, board)))
+        return answers[-1]
+
+
+def test_gachoan_anytime_ends_with_its_next_move():
+    for make in (GachoanBot, lambda: CachedLogic(GachoanBot(), radius=8)):
+        for seed in range(2):
+            player = Anytime(make)
+            Simulator([("me", player), ("g", GachoanBot()), ("w", WawanMKS())], SCENARIOS["default"], seed=seed).run()
+            assert all(answers[-1] == move for answers, move in player.answers)
+            # Ticks that followed a plan answered twice: the plan step first
+            assert any(len(answers) == 2 for answers, _ in player.answers)
+            assert all(len(answers) <= 2 and abs(answers[0][0]) + abs(answers[0][1]) == 1
+                       for answers, _ in player.answers)
@@ -0,0 +1,107 @@
+import random
+
+import pytest
+
+from game.endgame import EndgameSolver
+from game.models import Position
+from game.teleport import TeleporterGraph
+
+
+def manhattan(a, b):
+    return abs(a.x - b.x) + abs(a.y - b.y)
+
+
+def brute_force(start, base, carried, capacity, moves_left, diamonds, distance):
+    """Most points bankable in time, trying every order of stops."""
+    best = 0
+
+    def visit(pos, load, banked, taken, left):
+        nonlocal best
+        best = max(best, banked)
+        if load and pos != base and distance(pos, base) <= left:
+            visit(base, 0, banked + load, taken, left - distance(pos, base))
+        for i, (position, points) in enumerate(diamonds):
+            cost = distance(pos, position)
+            if i not in taken and load + points <= capacity and cost <= left:
+                visit(position, load + points, banked, taken | {i}, left - cost)
+
+    visit(start, 0 if start == base else carried, 0, frozenset(), moves_left)
+    return best
+
+
+def follow(route, start, base, carried, moves_left, diamonds, distance):
+    """Points a route banks, checking it fits in the time left."""
+    points = {(p.x, p.y): pts for p, pts in diamonds}
+    pos, load, banked, left = start, 0 if start == base else carried, 0, moves_left
+    for stop in route:
+        left -= distance(pos, stop)
+        assert left >= 0
+        if stop == base:
+            banked, load = banked + load, 0
+        else:
+            load += points.pop((stop.x, stop.y))
+        pos = stop
+    return banked
+
+
+def random_problem(rng, teleporters):
+    width, height = rng.randint(4, 9), rng.randint(4, 9)
+    cells = rng.sample([Position(y, x) for x in range(width) for y in range(height)], 12)
+    base, start, others = cells[0], cells[1], cells[2:]
+    if teleporters:
+        # Start and diamonds may stand on teleporters: routes from there
+        # differ from the routes back
+        graph = TeleporterGraph(width, height, others[:4], [(0, 1), (2, 3)])
+        distance = graph.distance
+        if rng.random() < 0.3:
+            start, others = others[0], others[1:]
+    else:
+        distance = manhattan
+    if rng.random() < 0.2:
+        start = base
+    diamonds = [(p, rng.choice((1, 1, 2))) for p in others[: rng.randint(0, 5)]]
+    capacity = rng.randint(2, 5)
+    carried = rng.randint(0, capacity - 1)
+    return start, base, carried, capacity, rng.randint(0, 25), diamonds, distance
+
+
+@pytest.mark.parametrize("teleporters", [False, True], ids=["manhattan", "teleporters"])
+def test_matches_brute_force(teleporters):
+    rng = random.Random(11)
+    solver = EndgameSolver(max_nodes=10 ** 7, max_seconds=10.0)
+    for _ in range(300):
+        problem = random_problem(rng, teleporters)
+        solution = solver.solve(*problem)
+        assert solution is not None and solution.complete
+        assert solution.value == brute_force(*problem)
+        start, base, carried, capacity, moves_left, diamonds, distance = problem
+        assert follow(solution.route, start, base, carried, moves_left, diamonds, distance) == solution.value
+        assert solution.target == (solution.route[0] if solution.route else base)
+
+
+def test_budget_truncates_then_aborts():
+    rng = random.Random(5)
+    diamonds = [(Position(rng.randrange(20), rng.randrange(20)), 1) for _ in range(12)]
+    problem = (Position(10, 10), Position(0, 0), 0, 5, 60, diamonds, manhattan)
+    small = EndgameSolver(max_nodes=200, max_seconds=10.0)
+    solution = small.solve(*problem)
+    assert solution is not None and not solution.complete
+    assert small.stats.truncated == 1
+    assert EndgameSolver(max_nodes=1).solve(*problem) is None
+
+
+def test_prefers_the_earliest_finish_among_equal_values():
+    base = Position(0, 0)
+    solution = EndgameSolver().solve(Position(0, 2), base, 1, 5, 10, [(Position(0, 9), 1)], manhattan)
+    # Banking the carried diamond is worth 1 either way; the far diamond
+    # cannot make it back in time
+    assert solution.value == 1
+    assert solution.route == [base]
+
+
+def test_diamonds_on_the_way_are_free_stops():
+    start = base = Position(0, 0)
+    near, far = Position(0, 2), Position(0, 4)
+    # Just enough time to reach the far diamond and come back: the near one is on the way
+    solution = EndgameSolver().solve(start, base, 0, 5, 8, [(far, 1), (near, 1)], manhattan)
+    assert (solution.value, solution.route) == (2, [near, far, base])
@@ -0,0 +1,113 @@
+import sqlite3
+import time
+
+from game.history import HistoryQuery, MatchHistory
+from tests.boards import bot
+
+# (x, y, diamonds, score, branch) of our bot, based at (0, 0)
+GAME = [
+    (1, 1, 0, 0, "diamond"),
+    (2, 1, 1, 0, "diamond"),  # picked up a diamond
+    (3, 1, 3, 0, "base"),     # and a red one
+    (2, 1, 3, 0, "base"),
+    (0, 0, 0, 0, "diamond"),  # tackled three steps from home
+    (1, 0, 1, 0, "base"),
+    (0, 0, 0, 1, "diamond"),  # banked
+]
+
+
+def play(history, name="me"):
+    game_id = history.start_game(name, "Logic", board_id=7)
+    for tick, (x, y, diamonds, score, branch) in enumerate(GAME):
+        me = bot(1, x, y, base=(0, 0), diamonds=diamonds, score=score, milliseconds_left=1000 * (10 - tick))
+        history.record_tick(game_id, tick, me, branch)
+    history.end_game(game_id)
+    return game_id
+
+
+def rows(path):
+    db = sqlite3.connect(path)
+    try:
+        return db.execute(
+            "SELECT tick, x, y, diamonds, score, ms_left, branch, cause_branch, gained, banked, "
+            "tackled, lost_diamonds, lost_steps FROM ticks ORDER BY tick"
+        ).fetchall()
+    except sqlite3.OperationalError:
+        # The writer has not created the tables yet
+        return []
+    finally:
+        db.close()
+
+
+def wait_for_rows(path, count, timeout=5.0):
+    until = time.monotonic() + timeout
+    while len(rows(path)) < count and time.monotonic() < until:
+        time.sleep(0.01)
+    return rows(path)
+
+
+def test_tick_deltas(tmp_path):
+    path = str(tmp_path / "history.db")
+    history = MatchHistory(path)
+    game_id = play(history)
+    history.close()
+
+    assert rows(path) == [
+        (0, 1, 1, 0, 0, 10000, "diamond", None, 0, 0, 0, 0, 0),
+        (1, 2, 1, 1, 0, 9000, "diamond", "diamond", 1, 0, 0, 0, 0),
+        (2, 3, 1, 3, 0, 8000, "base", "diamond", 2, 0, 0, 0, 0),
+        (3, 2, 1, 3, 0, 7000, "base", "base", 0, 0, 0, 0, 0),
+        (4, 0, 0, 0, 0, 6000, "diamond", "base", 0, 0, 1, 3, 3),
+        (5, 1, 0, 1, 0, 5000, "base", "diamond", 1, 0, 0, 0, 0),
+        (6, 0, 0, 0, 1, 4000, "diamond", "base", 0, 1, 0, 0, 0),
+    ]
+
+    query = HistoryQuery(path)
+    [game] = query.games()
+    assert (game[0], game[2], game[3], game[4], game[5], game[6]) == (game_id, "me", "Logic", 7, 6, 1)
+    stats = {s.branch: (s.decisions, s.diamonds_gained, s.points_banked) for s in query.points_per_branch()}
+    assert stats == {"diamond": (4, 4, 0), "base": (3, 0, 1)}
+    tackles = query.tackle_losses(game_id)
+    assert (tackles.tackles, tackles.diamonds_lost, tackles.steps_lost) == (1, 3, 3)
+    assert query.score_timeline(game_id)[-1] == (6, 1, 0)
+    query.close()
+
+
+def test_games_are_tracked_separately(tmp_path):
+    path = str(tmp_path / "history.db")
+    history = MatchHistory(path)
+    first, second = play(history, "a"), play(history, "b")
+    history.close()
+
+    query = HistoryQuery(path)
+    assert len(query.games()) == 2
+    assert query.tackle_losses(first).tackles == query.tackle_losses(second).tackles == 1
+    assert query.tackle_losses().tackles == 2
+    query.close()
+
+
+def test_writer_flushes_full_batches(tmp_path):
+    path = str(tmp_path / "history.db")
+    history = MatchHistory(path, batch_size=3, flush_interval=60)
+    game_id = history.start_game("me", "Logic")
+    for tick in range(4):
+        history.record_tick(game_id, tick, bot(1, tick, 0, base=(0, 0)))
+    # The first batch (game row and two ticks) is written, the last ticks wait
+    assert [r[0] for r in wait_for_rows(path, 2)] == [0, 1]
+    time.sleep(0.1)
+    assert len(rows(path)) == 2
+    history.close()
+    assert len(rows(path)) == 4
+
+
+def test_writer_flushes_on_interval_and_close(tmp_path):
+    path = str(tmp_path / "history.db")
+    history = MatchHistory(path, batch_size=1000, flush_interval=0.05)
+    game_id = history.start_game("me", "Logic")
+    history.record_tick(game_id, 0, bot(1, 0, 0))
+    assert len(wait_for_rows(path, 1)) == 1
+
+    history.record_tick(game_id, 1, bot(1, 1, 0))
+    history.close()
+    assert len(rows(path)) == 2
+    assert not history._thread.is_alive()
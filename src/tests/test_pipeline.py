@@ -0,0 +1,152 @@
+import pytest
+
+from game.generator import SCENARIOS
+from game.logic.GACHOANLEVEL8 import GACHOANLEVEL8
+from game.logic.WawanMKS import WawanMKS
+from game.logic.base import BaseLogic
+from game.logic.gachoan import GachoanBot
+from game.logic.pipeline import Pipeline, PipelineLogic, Rule
+from game.models import Position
+from game.simulator import Simulator
+from tests.boards import board, bot
+from tests.legacy.GACHOANLEVEL8 import GACHOANLEVEL8 as LegacyGACHOANLEVEL8
+from tests.legacy.WawanMKS import WawanMKS as LegacyWawanMKS
+from tests.legacy.gachoan import GachoanBot as LegacyGachoanBot
+
+
+class Lockstep(BaseLogic):
+    """Plays `logic` and asks `reference` for its move on the same boards."""
+
+    def __init__(self, logic, reference):
+        self.logic = logic
+        self.reference = reference
+        self.moves = []
+
+    def next_move(self, board_bot, board):
+        move = self.logic.next_move(board_bot, board)
+        self.moves.append((move, self.reference.next_move(board_bot, board)))
+        return move
+
+
+def unbounded(logic):
+    # Searches cut off by the wall clock would make the two logics differ
+    if hasattr(logic, "button_values"):
+        logic.endgame.max_seconds = logic.button_values.budget = 100
+    return logic
+
+
+def lockstep_games(make, make_reference, seeds):
+    moves = []
+    for scenario in ("default", "crowded", "large"):
+        for seed in range(seeds):
+            player = Lockstep(unbounded(make()), unbounded(make_reference()))
+            players = [("me", player), ("w", WawanMKS()), ("g", GachoanBot())]
+            Simulator(players, SCENARIOS[scenario], seed=seed).run()
+            moves += player.moves
+    return moves
+
+
+@pytest.mark.parametrize(
+    "make, make_reference",
+    [(WawanMKS, LegacyWawanMKS), (GACHOANLEVEL8, LegacyGACHOANLEVEL8), (GachoanBot, LegacyGachoanBot)],
+    ids=["WawanMKS", "GACHOANLEVEL8", "GachoanBot"],
+)
+def test_ports_move_like_the_old_rule_chains(make, make_reference):
+    moves = lockstep_games(make, make_reference, 3)
+    assert moves
+    assert [new for new, _ in moves] == [old for _, old in moves]
+
+
+def strict(make):
+    logic = make()
+    logic.pipeline = Pipeline(
+        logic.pipeline.rules, logic.pipeline.facts, logic.pipeline.steer, logic.pipeline.adjustments, strict=True
+    )
+    return logic
+
+
+@pytest.mark.parametrize("make", [GachoanBot, GACHOANLEVEL8, WawanMKS], ids=lambda m: m.__name__)
+def test_rules_declare_what_they_read(make):
+    # Strict pipelines raise on undeclared reads and never cache facts on the instance
+    moves = lockstep_games(lambda: strict(make), make, 2)
+    assert [new for new, _ in moves] == [old for _, old in moves]
+
+
+def facts_pipeline(log, adjust=True, final=False):
+    def fact(name, value):
+        def provider(f):
+            log.append(name)
+            return value
+        return provider
+
+    facts = {
+        "near": fact("near", Position(0, 1)),
+        "far": fact("far", Position(9, 9)),
+        "unused": fact("unused", 0),
+    }
+    rules = [
+        Rule("skip", (), lambda f: None),
+        Rule("near", ("near",), lambda f: f.near, final=final),
+        Rule("far", ("far",), lambda f: f.far),
+    ]
+    adjustments = [Rule("nudge", ("far",), lambda f: f.far if f.goal == f.near else None)] if adjust else []
+    return Pipeline(rules, facts, lambda f, goal: (1, 0), adjustments)
+
+
+class Logic(PipelineLogic):
+    def __init__(self, pipeline):
+        self.pipeline = pipeline
+
+
+def run(pipe):
+    me = bot(1, 0, 0)
+    return pipe.run(Logic(pipe), me, board([me]))
+
+
+def test_first_rule_decides_and_adjustments_replace_the_goal():
+    log = []
+    pipe = facts_pipeline(log)
+    assert run(pipe) == (Position(9, 9), (1, 0), "nudge")
+    # Facts are computed once per tick, and only when read
+    assert log == ["near", "far"]
+    assert [(name, s.evaluated, s.fired) for name, s in pipe.summary()] == [
+        ("skip", 1, 0), ("near", 1, 1), ("nudge", 1, 1)
+    ]
+    assert pipe.fact_stats["near"].computed == 1
+    assert pipe.fact_stats["unused"].computed == 0
+
+
+def test_final_rules_skip_adjustments():
+    log = []
+    assert run(facts_pipeline(log, final=True)) == (Position(0, 1), (1, 0), "near")
+    assert log == ["near"]
+
+
+def test_strict_pipeline_rejects_undeclared_reads():
+    facts = {"near": lambda f: Position(0, 1), "far": lambda f: f.near}
+    sneaky = Rule("sneaky", ("far",), lambda f: f.near)
+    with pytest.raises(LookupError):
+        run(Pipeline([sneaky], facts, lambda f, goal: (0, 0), strict=True))
+    # Providers may read any fact, and lax pipelines do not check
+    honest = Rule("honest", ("far",), lambda f: f.far)
+    assert run(Pipeline([honest], facts, lambda f, goal: (0, 0), strict=True))[0] == Position(0, 1)
+    assert run(Pipeline([sneaky], facts, lambda f, goal: (0, 0)))[0] == Position(0, 1)
+
+
+def test_unknown_needs_are_rejected_when_built():
+    with pytest.raises(ValueError):
+        Pipeline([Rule("r", ("nope",), lambda f: None)], {}, lambda f, goal: (0, 0))
+
+
+def test_last_rule_must_fire():
+    pipe = Pipeline([Rule("never", (), lambda f: None)], {}, lambda f, goal: (0, 0))
+    with pytest.raises(LookupError):
+        run(pipe)
+
+
+def test_decide_reports_goal_and_branch():
+    logic = Logic(facts_pipeline([], adjust=False))
+    logic.last_effects = ("stale",)
+    me = bot(1, 0, 0)
+    assert logic.decide(me, board([me])) == (1, 0)
+    assert (logic.goal, logic.last_branch, logic.last_effects) == (Position(0, 1), "near", None)
@@ -0,0 +1,129 @@
+from game.models import Position
+from game.plan import PlanCache
+from game.teleport import get_teleporter_graph
+from tests.boards import board, bot, diamond, teleporter
+
+
+def manhattan(a, b):
+    return abs(a.x - b.x) + abs(a.y - b.y)
+
+
+def planned(me, target, threats=(), field=None, time_left=100):
+    """A cache holding a plan for `target`, after one `validate`."""
+    plans = PlanCache(max_age=5)
+    field = field or board([me, target])
+    plans.validate(me, field, threats, manhattan, time_left)
+    plans.adopt(target, me, threats, manhattan(me.position, target.position))
+    return plans, field
+
+
+def test_plan_kept_while_getting_closer():
+    target = diamond(10, 5, 0)
+    plans, _ = planned(bot(1, 0, 0), target)
+    for x in range(1, 5):
+        me = bot(1, x, 0, base=(0, 0))
+        assert plans.validate(me, board([me, target]), (), manhattan, 100) is not None
+        assert plans.reuse() == target.position
+    assert plans.plan.distance == 1
+    assert plans.invalidations == {}
+
+
+def check_invalidated(plans, me, field, reason, threats=(), time_left=100):
+    assert plans.validate(me, field, threats, manhattan, time_left) is None
+    assert plans.invalidations == {reason: 1}
+
+
+def test_reached():
+    target = diamond(10, 1, 0)
+    plans, _ = planned(bot(1, 0, 0), target)
+    me = bot(1, 1, 0, base=(0, 0))
+    check_invalidated(plans, me, board([me]), "reached")
+
+
+def test_taken():
+    target = diamond(10, 3, 0)
+    plans, _ = planned(bot(1, 0, 0), target)
+    me = bot(1, 1, 0, base=(0, 0))
+    check_invalidated(plans, me, board([me]), "taken")
+
+
+def test_moved_target_counts_as_taken():
+    target = diamond(10, 3, 0)
+    plans, _ = planned(bot(1, 0, 0), target)
+    me = bot(1, 1, 0, base=(0, 0))
+    check_invalidated(plans, me, board([me, diamond(10, 3, 1)]), "taken")
+
+
+def test_inventory():
+    target = diamond(10, 3, 0)
+    plans, _ = planned(bot(1, 0, 0), target)
+    me = bot(1, 1, 0, base=(0, 0), diamonds=1)
+    check_invalidated(plans, me, board([me, target]), "inventory")
+
+
+def test_new_threat():
+    target = diamond(10, 3, 0)
+    plans, _ = planned(bot(1, 0, 0), target, threats=(7,))
+    me = bot(1, 1, 0, base=(0, 0))
+    # Known threats that went away keep the plan, a new one drops it
+    assert plans.validate(me, board([me, target]), (), manhattan, 100) is not None
+    me = bot(1, 2, 0, base=(0, 0))
+    check_invalidated(plans, me, board([me, target]), "threat", threats=(7, 8))
+
+
+def test_expired():
+    target = diamond(10, 9, 9)
+    plans, _ = planned(bot(1, 0, 0), target)
+    for step in range(1, 7):
+        me = bot(1, step, 0, base=(0, 0))
+        result = plans.validate(me, board([me, target]), (), manhattan, 100)
+    assert result is None
+    assert plans.invalidations == {"expired": 1}
+
+
+def test_stalled():
+    target = diamond(10, 3, 0)
+    plans, _ = planned(bot(1, 0, 1), target)
+    me = bot(1, 0, 2, base=(0, 0))
+    check_invalidated(plans, me, board([me, target]), "stalled")
+
+
+def test_no_time_to_bank():
+    target = diamond(10, 5, 0)
+    plans, _ = planned(bot(1, 0, 0), target)
+    me = bot(1, 1, 0, base=(0, 0))
+    # 4 steps there and 5 back
+    check_invalidated(plans, me, board([me, target]), "time", time_left=8)
+
+
+def test_route_through_teleporter_is_progress():
+    # Stepping towards the teleporter moves away from the target in a
+    # straight line, but closer along the route
+    target = diamond(10, 8, 0)
+    objects = [teleporter(20, 1, 2, "a"), teleporter(21, 8, 2, "a"), target]
+    me = bot(1, 1, 0, base=(0, 0))
+    field = board(objects + [me], 10, 3)
+    graph = get_teleporter_graph(field)
+    plans = PlanCache()
+    plans.validate(me, field, (), graph.distance, 100, graph.next_waypoint)
+    distance = graph.distance(me.position, target.position)
+    plans.adopt(target, me, (), distance, graph.next_waypoint(me.position, target.position))
+    assert plans.reuse() == Position(2, 1)
+
+    me = bot(1, 1, 1, base=(0, 0))
+    assert plans.validate(me, board(objects + [me], 10, 3), (), graph.distance, 100, graph.next_waypoint) is not None
+    assert plans.plan.distance == 3
+    assert plans.reuse() == Position(2, 1)
+
+    # Out of the far teleporter, the target itself is next
+    me = bot(1, 8, 2, base=(0, 0))
+    assert plans.validate(me, board(objects + [me], 10, 3), (), graph.distance, 100, graph.next_waypoint) is not None
+    assert plans.reuse() == target.position
+    assert plans.invalidations == {}
+
+
+def test_reset():
+    plans, _ = planned(bot(1, 0, 0), diamond(10, 3, 0))
+    plans.reuse()
+    plans.reset()
+    assert (plans.plan, plans.tick, plans.replans, plans.reuses, plans.invalidations) == (None, 0, 0, 0, {})
@@ -0,0 +1,131 @@
+import os
+import sys
+
+import pytest
+
+from game import reloader
+from game.reloader import LogicReloader
+
+PACKAGE = "reload_probe"
+
+PARAMS = "STEP = {step}\n"
+
+LOGIC = """from game.logic.base import BaseLogic
+from reload_probe.params import STEP
+
+
+class Walker(BaseLogic):
+    persistent_state = ("memory", "goal")
+
+    def __init__(self):
+        self.memory = []
+        self.goal = None
+
+    def next_move(self, board_bot, board):
+        self.memory.append(STEP)
+        return ({version}, STEP)
+
+
+class Other(BaseLogic):
+    persistent_state = ("memory",)
+
+    def __init__(self):
+        self.memory = None
+
+    def next_move(self, board_bot, board):
+        return (0, -1)
+"""
+
+
+@pytest.fixture
+def probe(tmp_path, monkeypatch):
+    """A strategy package of its own, so only its modules get reloaded."""
+    package = tmp_path / PACKAGE
+    package.mkdir()
+    (package / "__init__.py").write_text("")
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setattr(reloader, "LOGIC_PACKAGE", PACKAGE)
+    monkeypatch.setattr(sys, "dont_write_bytecode", True)
+
+    def write(name, source):
+        path = package / name
+        path.write_text(source)
+        # Later than anything written before, whatever the file system's resolution
+        write.mtime += 10
+        os.utime(path, (write.mtime, write.mtime))
+
+    write.mtime = os.stat(package).st_mtime
+    write("params.py", PARAMS.format(step=1))
+    write("walker.py", LOGIC.format(version=0))
+    yield write
+    for name in [n for n in sys.modules if n == PACKAGE or n.startswith(PACKAGE + ".")]:
+        del sys.modules[name]
+
+
+def start(name="reload_probe.walker:Walker", **kwargs):
+    logic_class = reloader.get_controller(name)
+    return LogicReloader(name, logic_class(), interval=0, **kwargs)
+
+
+def test_unchanged_modules_keep_the_logic(probe):
+    loaded = start()
+    assert loaded.poll() is None
+    assert loaded.swaps == [] and loaded.errors == 0
+
+
+def test_changed_module_swaps_and_keeps_state(probe):
+    loaded = start()
+    old = loaded.logic
+    assert old.next_move(None, None) == (0, 1)
+
+    probe("walker.py", LOGIC.format(version=1))
+    new = loaded.poll()
+    assert new is loaded.logic and new is not old
+    assert new.next_move(None, None) == (1, 1)
+    # Persistent state is handed over as is
+    assert new.memory is old.memory and new.memory == [1, 1]
+    [swap] = loaded.swaps
+    assert (swap.old, swap.new, swap.kept) == ("reload_probe.walker:Walker",) * 2 + (["memory", "goal"],)
+    assert loaded.poll() is None
+
+
+def test_imported_names_are_refreshed(probe):
+    loaded = start()
+    probe("params.py", PARAMS.format(step=2))
+    # Only params changed, but the logic module that imported STEP is reloaded after it
+    assert loaded.poll().next_move(None, None) == (0, 2)
+
+
+def test_failed_import_keeps_the_old_logic(probe):
+    loaded = start()
+    old = loaded.logic
+    probe("walker.py", "this is not python\n")
+    assert loaded.poll() is None
+    assert loaded.logic is old and loaded.errors == 1
+    assert old.next_move(None, None) == (0, 1)
+
+    # Retried on the next change only
+    assert loaded.poll() is None and loaded.errors == 1
+    probe("walker.py", LOGIC.format(version=1))
+    assert loaded.poll().next_move(None, None) == (1, 1)
+
+
+def test_control_file_switches_the_logic(probe, tmp_path):
+    control = tmp_path / "logic.txt"
+    loaded = start(control_file=str(control))
+    old = loaded.logic
+    control.write_text("reload_probe.walker:Other\n")
+    new = loaded.poll()
+    assert type(new).__name__ == "Other" and loaded.name == "reload_probe.walker:Other"
+    # Only what both logics declare moves over
+    assert loaded.swaps[-1].kept == ["memory"] and new.memory is old.memory
+
+    control.write_text("nope:Nothing\n")
+    assert loaded.poll() is None and loaded.errors == 1 and loaded.logic is new
+
+
+def test_interval(probe):
+    loaded = start()
+    loaded.interval = 60
+    probe("walker.py", LOGIC.format(version=1))
+    assert loaded.poll() is None and loaded.swaps == []
@@ -0,0 +1,99 @@
+from game.rules import GameState, Rules, apply, legal_moves
+from tests.boards import board, bot, button, diamond, teleporter
+
+
+def state_of(*objects, width=6, height=6):
+    return GameState.from_board(board(objects, width, height))
+
+
+def test_pick_up_diamond():
+    state = state_of(bot(1, 1, 1, base=(0, 0)), diamond(10, 2, 1, points=2))
+    after = apply(state, 0, (1, 0))
+    assert after.bots[0].position == state.rules.index(2, 1)
+    assert after.bots[0].diamonds == 2
+    assert after.diamonds == {}
+    # The parent state is left as it was
+    assert state.bots[0].diamonds == 0
+    assert state.diamonds == {state.rules.index(2, 1): (10, 2)}
+
+
+def test_diamond_over_capacity_stays():
+    state = state_of(bot(1, 1, 1, base=(0, 0), diamonds=4), diamond(10, 2, 1, points=2))
+    after = apply(state, 0, (1, 0))
+    assert after.bots[0].diamonds == 4
+    assert state.rules.index(2, 1) in after.diamonds
+
+
+def test_clone_copies_diamonds_on_write():
+    state = state_of(bot(1, 1, 1, base=(0, 0)), diamond(10, 2, 1), diamond(11, 4, 4))
+    first = apply(state, 0, (1, 0))
+    second = apply(state, 0, (1, 0))
+    assert len(state.diamonds) == 2
+    assert first.diamonds == second.diamonds == {state.rules.index(4, 4): (11, 1)}
+
+
+def test_bank_at_base():
+    state = state_of(bot(1, 1, 0, base=(0, 0), diamonds=3, score=4))
+    after = apply(state, 0, (-1, 0))
+    assert after.bots[0].diamonds == 0
+    assert after.bots[0].score == 7
+
+
+def test_tackle_takes_diamonds_up_to_capacity():
+    state = state_of(
+        bot(1, 1, 1, base=(0, 0), diamonds=3),
+        bot(2, 2, 1, base=(5, 5), diamonds=4),
+    )
+    after = apply(state, 0, (1, 0))
+    attacker, victim = after.bots
+    assert attacker.position == state.rules.index(2, 1)
+    assert attacker.diamonds == state.rules.inventory_size
+    assert victim.position == state.rules.index(5, 5)
+    assert victim.diamonds == 0
+    assert state.bots[1].diamonds == 4
+
+
+def test_no_tackle_blocks_the_move():
+    state = state_of(
+        bot(1, 1, 1, base=(0, 0), can_tackle=False),
+        bot(2, 2, 1, base=(5, 5), diamonds=4),
+    )
+    assert not state.rules.can_tackle
+    assert apply(state, 0, (1, 0)) is state
+    assert (1, 0) not in legal_moves(state, 0)
+    assert (-1, 0) in legal_moves(state, 0)
+
+
+def test_illegal_move_returns_state():
+    state = state_of(bot(1, 0, 0))
+    assert apply(state, 0, (-1, 0)) is state
+    assert apply(state, 0, (1, 1)) is state
+
+
+def test_teleport_then_pick_up():
+    state = state_of(
+        bot(1, 0, 1, base=(0, 0)),
+        teleporter(20, 1, 1, "a"),
+        teleporter(21, 4, 4, "a"),
+        diamond(10, 4, 4),
+    )
+    rules = state.rules
+    assert rules.teleports == {rules.index(1, 1): rules.index(4, 4), rules.index(4, 4): rules.index(1, 1)}
+    after = apply(state, 0, (1, 0))
+    assert after.bots[0].position == rules.index(4, 4)
+    assert after.bots[0].diamonds == 1
+
+
+def test_button_clears_diamonds():
+    state = state_of(bot(1, 0, 0), button(30, 1, 0), diamond(10, 3, 3), diamond(11, 4, 4))
+    after = apply(state, 0, (1, 0))
+    assert after.button_pressed
+    assert after.diamonds == {}
+    assert len(state.diamonds) == 2
+    assert not state.button_pressed
+
+
+def test_rules_from_board():
+    rules = Rules.from_board(board([bot(1, 0, 0, inventory_size=7)], 8, 3))
+    assert (rules.width, rules.height, rules.inventory_size) == (8, 3, 7)
+    assert rules.xy(rules.index(5, 2)) == (5, 2)
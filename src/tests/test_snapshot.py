@@ -0,0 +1,62 @@
+import struct
+
+import pytest
+
+from game.generator import SCENARIOS, stream_scenarios
+from game.models import GameObject, Position, Properties
+from game.snapshot import HEADER, pack_board, packed_size, read_seq, unpack_board
+from tests.boards import board, bot, teleporter
+
+
+@pytest.mark.parametrize("scenario", sorted(SCENARIOS))
+def test_round_trip(scenario):
+    buf = bytearray(1 << 20)
+    for seq, original in enumerate(stream_scenarios(5, seed=2, config=SCENARIOS[scenario], vary=True), 1):
+        size = pack_board(buf, 64, seq, original)
+        assert size == packed_size(original)
+        assert unpack_board(buf, 64) == (seq, original)
+
+
+def test_round_trip_of_unusual_values():
+    objects = [
+        bot(1, 0, 0, name="Ünïcødé bot", score=-3, milliseconds_left=0, can_tackle=False),
+        teleporter(2, 3, 4, "pair-ü"),
+        GameObject(3, Position(1, 1), "SomethingNew", None),
+        GameObject(4, Position(2, 2), "DiamondGameObject", Properties(points=2, time_joined="2024-01-01T00:00:00Z")),
+    ]
+    original = board(objects, 300, 200, delay=250, id=7)
+    buf = bytearray(packed_size(original))
+    pack_board(buf, 0, 1, original)
+    assert unpack_board(buf, 0) == (1, original)
+
+
+def test_no_board_yet():
+    buf = bytearray(4096)
+    assert read_seq(buf, 0) == 0
+    assert unpack_board(buf, 0) == (0, None)
+
+
+def test_torn_read_is_detected():
+    original = board([bot(1, 2, 3)])
+    buf = bytearray(4096)
+    pack_board(buf, 0, 5, original)
+
+    class Rewritten(bytearray):
+        """Hands out the new seq once the body has been read."""
+
+        reads = 0
+
+        def __getitem__(self, index):
+            value = super().__getitem__(index)
+            Rewritten.reads += 1
+            if isinstance(index, slice) and Rewritten.reads == 2:
+                struct.pack_into("<I", self, 4, 6)
+            return value
+
+    assert unpack_board(Rewritten(buf), 0) == (0, None)
+
+
+def test_too_small_buffer():
+    original = board([bot(1, 2, 3)])
+    with pytest.raises(ValueError):
+        pack_board(bytearray(HEADER.size), 0, 1, original)
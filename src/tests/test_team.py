@@ -0,0 +1,81 @@
+import dataclasses
+
+import pytest
+
+from game import team
+from game.generator import ScenarioConfig
+from game.logic.WawanMKS import WawanMKS
+from game.logic.gachoan import GachoanBot
+from game.simulator import Simulator
+from game.teleport import get_teleporter_graph
+from game.team import BoardAnalysis, TeamEngine
+from tests.boards import board, bot, diamond
+
+
+def unbounded(logic):
+    # Time-boxed searches would make the two runs differ
+    if isinstance(logic, GachoanBot):
+        logic.endgame.max_seconds = logic.button_values.budget = 100
+    return logic
+
+
+class Member:
+    """One of our bots in the simulator: moves come from the shared engine."""
+
+    def __init__(self, name, engine, twins, log):
+        self.name = name
+        self.engine = engine
+        self.twins = twins
+        self.log = log
+
+    def next_move(self, board_bot, board):
+        if self.log.get("board") is not board:
+            self.log["board"] = board
+            self.log["boards"].append(board)
+            moves = self.log["moves"] = self.engine.next_moves(board)
+            analysis = BoardAnalysis(board, {b.id for b in board.bots if b.properties.name in self.twins})
+            for bot in analysis.our_bots:
+                # The same view, without the shared analysis to read from
+                hidden = analysis.hidden_for(bot.id, self.engine.last_assignment)
+                view = dataclasses.replace(board, game_objects=[o for o in board.game_objects if o.id not in hidden])
+                name = bot.properties.name
+                self.log["pairs"].append((moves[name], self.twins[name].next_move(bot, view)))
+        return self.log["moves"][self.name]
+
+
+@pytest.mark.parametrize("make", [GachoanBot, WawanMKS], ids=lambda m: m.__name__)
+def test_engine_moves_like_each_logic_on_its_own(make, monkeypatch):
+    analyses = []
+
+    class Counted(BoardAnalysis):
+        def __init__(self, board, team):
+            super().__init__(board, team)
+            analyses.append(board)
+
+    monkeypatch.setattr(team, "BoardAnalysis", Counted)
+    engine = TeamEngine({"t1": unbounded(make()), "t2": unbounded(make()), "t3": unbounded(make())})
+    twins = {name: unbounded(make()) for name in engine.logics}
+    log = {"pairs": [], "boards": []}
+    players = [(name, Member(name, engine, twins, log)) for name in engine.logics] + [("w", WawanMKS())]
+    Simulator(players, ScenarioConfig(seconds=40), seed=3, shuffle=False).run()
+
+    pairs = log["pairs"]
+    assert len(pairs) == 3 * len(analyses) > 0
+    assert [new for new, _ in pairs] == [old for _, old in pairs]
+    # One analysis per tick, however many bots
+    assert analyses == log["boards"]
+
+
+def test_assignment_and_views():
+    me, mate, enemy = bot(1, 0, 0, name="a"), bot(2, 9, 9, name="b"), bot(3, 5, 5, name="x")
+    near_me, near_mate = diamond(10, 1, 0), diamond(11, 8, 9)
+    b = board([me, mate, enemy, near_me, near_mate])
+    analysis = BoardAnalysis(b, {1, 2})
+    assignment = analysis.assign_diamonds()
+    assert assignment == {1: 10, 2: 11}
+    assert (analysis.opponent_summary.count, analysis.opponent_summary.richest) == (1, enemy)
+
+    view = analysis.view_for(1, assignment)
+    assert [o.id for o in view.game_objects] == [1, 3, 10]
+    # Logics reading the view get the shared graph
+    assert get_teleporter_graph(view) is analysis.graph
@@ -0,0 +1,115 @@
+import random
+from collections import deque
+
+import pytest
+
+from game.models import Position
+from game.teleport import INF, TeleporterGraph, get_teleporters, pair_teleporters
+from tests.boards import board, teleporter
+
+
+def bfs(width, height, partner, start):
+    """
+    Steps from `start` to every cell: stepping onto a teleporter may either
+    stop there or land on its partner, both for one step.
+    """
+    dist = {start: 0}
+    queue = deque([start])
+    while queue:
+        x, y = cell = queue.popleft()
+        for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1)):
+            if not (0 <= nx < width and 0 <= ny < height):
+                continue
+            for landed in ((nx, ny), partner.get((nx, ny))):
+                if landed is not None and landed not in dist:
+                    dist[landed] = dist[cell] + 1
+                    queue.append(landed)
+    return dist
+
+
+def random_graph(rng, width, height, pairs):
+    cells = rng.sample([(x, y) for x in range(width) for y in range(height)], 2 * pairs)
+    positions = [Position(y, x) for x, y in cells]
+    graph = TeleporterGraph(width, height, positions, [(2 * i, 2 * i + 1) for i in range(pairs)])
+    partner = {}
+    for i in range(pairs):
+        partner[cells[2 * i]] = cells[2 * i + 1]
+        partner[cells[2 * i + 1]] = cells[2 * i]
+    return graph, partner
+
+
+@pytest.mark.parametrize("seed", range(6))
+def test_distances_match_bfs(seed):
+    rng = random.Random(seed)
+    width, height = rng.randint(4, 8), rng.randint(4, 8)
+    graph, partner = random_graph(rng, width, height, rng.randint(1, 3))
+    cells = [(x, y) for x in range(width) for y in range(height)]
+    for sx, sy in cells:
+        expected = bfs(width, height, partner, (sx, sy))
+        start = Position(sy, sx)
+        # Single queries, before any field exists for these cells
+        for ex, ey in rng.sample(cells, 5):
+            assert graph.distance(start, Position(ey, ex)) == expected[(ex, ey)]
+        from_start = graph.field_from(start)
+        for ex, ey in cells:
+            assert from_start[ey * width + ex] == expected[(ex, ey)]
+    for ex, ey in rng.sample(cells, 5):
+        to_end = graph.field_for(Position(ey, ex))
+        for sx, sy in cells:
+            assert to_end[sy * width + sx] == bfs(width, height, partner, (sx, sy))[(ex, ey)]
+
+
+def test_standing_on_a_teleporter_costs_two_to_use_it():
+    graph = TeleporterGraph(10, 1, [Position(0, 0), Position(0, 9)], [(0, 1)])
+    # Step off and back on, land on the far end, step off
+    assert graph.distance(Position(0, 0), Position(0, 8)) == 3
+    # The way back only needs the step onto the far end
+    assert graph.distance(Position(0, 8), Position(0, 0)) == 1
+    assert graph.field_from(Position(0, 0))[8] == 3
+    assert graph.field_for(Position(0, 0))[8] == 1
+    assert graph.next_waypoint(Position(0, 1), Position(0, 8)) == Position(0, 0)
+
+
+def test_hop_closure():
+    rng = random.Random(7)
+    graph, _ = random_graph(rng, 9, 9, 4)
+    n = len(graph.nodes)
+    # Relax single hops until nothing changes: cheapest chain of teleports
+    chain = [
+        [0 if k == m else graph._entry_cost(graph.nodes[graph.partner[k]], m) for m in range(n)]
+        for k in range(n)
+    ]
+    changed = True
+    while changed:
+        changed = False
+        for k in range(n):
+            for v in range(n):
+                for m in range(n):
+                    if chain[k][v] + chain[v][m] < chain[k][m]:
+                        chain[k][m] = chain[k][v] + chain[v][m]
+                        changed = True
+    assert graph.hop == chain
+    for k in range(n):
+        assert graph.hop[k][k] == 0
+        for m in range(n):
+            assert graph.hop[k][m] < INF
+
+
+def test_pairing():
+    # Shared pair id, an id naming the other end, and no pairing info at all
+    teleporters = [
+        teleporter(1, 0, 0, "x"),
+        teleporter(2, 1, 0, None),
+        teleporter(3, 2, 0, "5"),
+        teleporter(4, 3, 0, "x"),
+        teleporter(5, 4, 0, "3"),
+        teleporter(6, 5, 0, None),
+    ]
+    pairs = pair_teleporters(get_teleporters(board(teleporters)))
+    assert sorted(tuple(sorted(p)) for p in pairs) == [(0, 3), (1, 5), (2, 4)]
+
+
+def test_no_teleporters_is_manhattan():
+    graph = TeleporterGraph(5, 5, [], [])
+    assert graph.distance(Position(0, 0), Position(4, 3)) == 7
+    assert graph.next_waypoint(Position(0, 0), Position(4, 3)) == Position(4, 3)
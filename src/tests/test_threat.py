@@ -0,0 +1,63 @@
+import random
+
+from game.models import Position
+from game.threat import ThreatMap, threat_sources
+from tests.boards import board, bot
+
+
+def recomputed(width, height, horizon, sources):
+    safe = horizon + 1
+    return [
+        min([safe] + [abs(p.x - x) + abs(p.y - y) for p in sources.values()])
+        for y in range(height)
+        for x in range(width)
+    ]
+
+
+def test_incremental_update_matches_full_recompute():
+    rng = random.Random(3)
+    width, height, horizon = 12, 9, 4
+    field = board([], width, height)
+    threats = ThreatMap(width, height, horizon)
+    sources = {}
+    for _ in range(300):
+        # Move, add or drop a few sources, some of them onto the same cell
+        for bot_id in range(6):
+            roll = rng.random()
+            if roll < 0.2:
+                sources.pop(bot_id, None)
+            elif roll < 0.7:
+                old = sources.get(bot_id)
+                if old is not None and rng.random() < 0.7:
+                    x = min(width - 1, max(0, old.x + rng.choice((-1, 0, 1))))
+                    y = min(height - 1, max(0, old.y + rng.choice((-1, 0, 1))))
+                else:
+                    x, y = rng.randrange(width), rng.randrange(height)
+                sources[bot_id] = Position(y, x)
+        threats.update(field, dict(sources))
+        assert threats.cells == recomputed(width, height, horizon, sources)
+        fresh = ThreatMap(width, height, horizon)
+        fresh.update(field, dict(sources))
+        assert threats.cells == fresh.cells
+
+
+def test_resize_resets():
+    threats = ThreatMap(5, 5, 2)
+    threats.update(board([], 5, 5), {1: Position(2, 2)})
+    threats.update(board([], 7, 4), {1: Position(2, 2)})
+    assert threats.cells == recomputed(7, 4, 2, {1: Position(2, 2)})
+    assert threats.steps_to(Position(-1, 0)) == threats.safe
+
+
+def test_threat_sources_skip_us_and_rich_bots():
+    me = bot(1, 0, 0)
+    field = board([me, bot(2, 3, 3, diamonds=1), bot(3, 4, 4, diamonds=3)])
+    assert threat_sources(field, me) == {2: Position(3, 3)}
+
+
+def test_safer_direction_avoids_the_threat():
+    threats = ThreatMap(6, 6, 3)
+    threats.update(board([], 6, 6), {1: Position(0, 3)})
+    # Both axes lead to (3, 3): the x step lands next to the threat
+    assert threats.safer_direction(Position(1, 1), Position(3, 3)) == (0, 1)
+    assert threats.safer_direction(Position(1, 1), Position(1, 4)) == (1, 0)
@@ -0,0 +1,42 @@
+from dataclasses import replace
+
+import pytest
+
+from game.generator import SCENARIOS
+from game.logic.WawanMKS import WawanMKS
+from game.simulator import Simulator
+
+vecsim = pytest.importorskip("game.vecsim")
+if vecsim.np is None:
+    pytest.skip("vecsim needs numpy", allow_module_level=True)
+
+
+def scalar_scores(config, seed, bots):
+    players = [(str(i), WawanMKS()) for i in range(bots)]
+    result = Simulator(players, vecsim.simplified(config), seed=seed, shuffle=False).run()
+    return [result[str(i)] for i in range(bots)]
+
+
+@pytest.mark.parametrize(
+    "config",
+    [
+        replace(SCENARIOS["default"], seconds=40),
+        replace(SCENARIOS["crowded"], seconds=15),
+        replace(SCENARIOS["default"], seconds=40, can_tackle=False, inventory_size=3, red_ratio=0.5),
+    ],
+    ids=["default", "crowded", "no-tackle"],
+)
+def test_scores_match_the_scalar_simulator(config):
+    # What `bench.py vecsim --check` does, on fewer games
+    games = 6
+    sim = vecsim.VectorSimulator.generate(games, config, seed=3)
+    scores = sim.run()
+    assert sim.tick == sim.total_ticks == config.seconds
+    assert scores.sum() > 0
+    for k in range(games):
+        assert scores[k].tolist() == scalar_scores(config, 3 + k, scores.shape[1])
+
+
+def test_simplified_games_have_no_teleporters_button_or_respawns():
+    config = vecsim.simplified(SCENARIOS["large"])
+    assert (config.teleport_pairs, config.red_button, config.min_ratio_for_generation) == (0, False, 0.0)
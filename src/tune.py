@@ -0,0 +1,165 @@
+import argparse
+import hashlib
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+
+from colorama import Fore, Style, init
+from game.controllers import CONTROLLERS
+from game.logic.gachoan import GachoanBot
+from game.logic.params import GachoanParams
+from game.generator import ScenarioConfig
+from game.simulator import Simulator
+
+
+def play_game(params: Dict, seed: int, opponents: List[str], seconds: int) -> int:
+    """Score margin of the tuned bot over the best opponent in one simulated game."""
+    players = [("tuned", GachoanBot(GachoanParams.from_dict(params)))]
+    players += [
+        ("{}-{}".format(name, i), CONTROLLERS[name]()) for i, name in enumerate(opponents)
+    ]
+    scores = Simulator(players, ScenarioConfig(seconds=seconds), seed=seed).run()
+    ours = scores.pop("tuned")
+    return ours - max(scores.values(), default=0)
+
+
+class EvaluationCache:
+    """
+    Append-only JSON-lines file of evaluated parameter sets. Re-running a
+    sweep with the same file skips everything that is already in it.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.results: Dict[str, Dict] = {}
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    line = line.strip()
+                    if line:
+                        entry = json.loads(line)
+                        self.results[entry["key"]] = entry
+
+    @staticmethod
+    def key(params: Dict, setup: Dict) -> str:
+        payload = json.dumps({"params": params, "setup": setup}, sort_keys=True)
+        return hashlib.sha1(payload.encode()).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        return self.results.get(key)
+
+    def put(self, key: str, params: Dict, score: float) -> None:
+        entry = {"key": key, "params": params, "score": score}
+        self.results[key] = entry
+        with open(self.path, "a") as f:
+            f.write(json.dumps(entry) + "\n")
+
+
+def clip(name: str, value: float) -> float:
+    kind, low, high = GachoanParams.search_space()[name]
+    value = min(high, max(low, value))
+    return int(round(value)) if kind is int else round(value, 3)
+
+
+def sample_uniform(rng: random.Random) -> Dict:
+    return {
+        name: clip(name, rng.uniform(low, high))
+        for name, (_, low, high) in GachoanParams.search_space().items()
+    }
+
+
+def sample_gaussian(rng: random.Random, mean: Dict, std: Dict) -> Dict:
+    return {name: clip(name, rng.gauss(mean[name], std[name])) for name in mean}
+
+
+def evaluate(pool, cache, candidates, setup) -> List[float]:
+    """Mean score margin per candidate; every (candidate, seed) game is a pool task."""
+    pending = {}
+    for params in candidates:
+        key = cache.key(params, setup)
+        if cache.get(key) is None and key not in pending:
+            pending[key] = (
+                params,
+                [
+                    pool.submit(play_game, params, seed, setup["opponents"], setup["seconds"])
+                    for seed in setup["seeds"]
+                ],
+            )
+
+    for key, (params, futures) in pending.items():
+        margins = [f.result() for f in futures]
+        cache.put(key, params, sum(margins) / len(margins))
+
+    return [cache.get(cache.key(params, setup))["score"] for params in candidates]
+
+
+init()
+parser = argparse.ArgumentParser(description="Tune GachoanBot strategy parameters")
+parser.add_argument("--method", choices=["random", "cem"], default="cem")
+parser.add_argument("--generations", type=int, default=10)
+parser.add_argument("--population", type=int, default=16)
+parser.add_argument("--games", type=int, default=8, help="Games per parameter set")
+parser.add_argument("--seconds", type=int, default=60, help="Simulated game length")
+parser.add_argument(
+    "--opponents",
+    default="WawanMKS,GACHOANLEVEL8",
+    help="Comma separated opponents, valid: {}".format(", ".join(CONTROLLERS)),
+)
+parser.add_argument("--workers", type=int, default=os.cpu_count())
+parser.add_argument("--seed", type=int, default=0)
+parser.add_argument("--cache", default="tune_cache.jsonl")
+parser.add_argument("--output", default="tuned_params.json")
+
+if __name__ == "__main__":
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+    setup = {
+        "opponents": [o for o in args.opponents.split(",") if o],
+        "seconds": args.seconds,
+        "seeds": [rng.randrange(2**31) for _ in range(args.games)],
+    }
+    cache = EvaluationCache(args.cache)
+    if cache.results:
+        print(Fore.BLUE + "Resuming sweep, {} parameter sets cached".format(len(cache.results)) + Style.RESET_ALL)
+
+    space = GachoanParams.search_space()
+    defaults = GachoanParams().to_dict()
+    mean = {name: float(defaults[name]) for name in space}
+    std = {name: (high - low) / 4 for name, (_, low, high) in space.items()}
+    elite_count = max(2, args.population // 4)
+
+    best_params, best_score = defaults, None
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for generation in range(args.generations):
+            gen_rng = random.Random("{}-{}".format(args.seed, generation))
+            if args.method == "random":
+                candidates = [sample_uniform(gen_rng) for _ in range(args.population)]
+            else:
+                candidates = [sample_gaussian(gen_rng, mean, std) for _ in range(args.population)]
+            if generation == 0:
+                candidates[0] = defaults
+
+            scores = evaluate(pool, cache, candidates, setup)
+            ranked = sorted(zip(scores, range(len(candidates))), reverse=True)
+            if best_score is None or ranked[0][0] > best_score:
+                best_score, best_params = ranked[0][0], candidates[ranked[0][1]]
+
+            if args.method == "cem":
+                elites = [candidates[i] for _, i in ranked[:elite_count]]
+                for name, (_, low, high) in space.items():
+                    values = [e[name] for e in elites]
+                    mean[name] = sum(values) / len(values)
+                    spread = sum((v - mean[name]) ** 2 for v in values) / len(values)
+                    std[name] = max(spread ** 0.5, (high - low) / 50)
+
+            print(
+                "Generation {}: best {:.2f}, overall best {:.2f}".format(
+                    generation, ranked[0][0], best_score
+                )
+            )
+
+    with open(args.output, "w") as f:
+        json.dump(best_params, f, indent=2)
+    print(Style.BRIGHT + "Best parameters ({:.2f}) written to {}".format(best_score, args.output) + Style.RESET_ALL)